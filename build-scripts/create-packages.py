@@ -12,6 +12,9 @@ Usage:
     python build-scripts/create-packages.py
     ou
     python3 build-scripts/create-packages.py
+
+    # Cache d'artefacts partagé entre les jobs CI
+    python3 build-scripts/create-packages.py --cache-dir /mnt/cache/pageforge
 """
 
 import os
@@ -19,19 +22,3262 @@ import shutil
 import zipfile
 import tarfile
 import json
+import hashlib
+import struct
+import time
+import uuid
+import zlib
+import argparse
+import contextlib
+import base64
+import bisect
+import functools
+import urllib.request
+import hmac
+import http.client
+import threading
+import urllib.parse
+import mmap
+import tempfile
+import gzip
+import io
+import math
+import queue
+import random
+import re
+import socket
+import socketserver
+import sqlite3
+import subprocess
+import sys
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
+from http.server import BaseHTTPRequestHandler, SimpleHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
+from xml.etree import ElementTree
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """Calcule l'empreinte SHA-256 d'un fichier par blocs"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class MappedFile(io.RawIOBase):
+    """Fichier en lecture seule projeté en mémoire (mmap), utilisable par zipfile et tarfile"""
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        self.size = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b''
+        self._view = memoryview(self._map)
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        n = max(0, min(len(buffer), self.size - self._pos))
+        buffer[:n] = self._view[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            offset += self._pos
+        elif whence == os.SEEK_END:
+            offset += self.size
+        self._pos = max(0, offset)
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+    def close(self):
+        if not self.closed:
+            self._view.release()
+            if self.size:
+                self._map.close()
+            self._file.close()
+        super().close()
+
+
+class ArtifactCache:
+    """Cache local adressé par contenu, partageable entre plusieurs workers CI.
+
+    Chaque entrée est un fichier `.meta.json` qui désigne son fichier de données
+    par l'empreinte SHA-256 de celui-ci (`<clé>.<sha256>`). Les écritures passent
+    par un fichier temporaire puis `os.replace` (données d'abord, métadonnées
+    ensuite) : un lecteur concurrent voit toujours une paire cohérente, même
+    quand une clé est réécrite avec un autre contenu (même sur NFS). L'éviction
+    est de type LRU, basée sur la date de modification mise à jour à chaque lecture.
+    """
+
+    KINDS = ('archives', 'manifests', 'payloads', 'stages')
+    ORPHAN_AGE = 3600
+
+    def __init__(self, root, max_size=2 * 1024 ** 3):
+        self.root = Path(root)
+        self.max_size = max_size
+        self.hits = dict.fromkeys(self.KINDS, 0)
+        self.misses = dict.fromkeys(self.KINDS, 0)
+        self.stores = 0
+        self.evictions = 0
+        for kind in self.KINDS + ('tmp',):
+            (self.root / kind).mkdir(parents=True, exist_ok=True)
+
+    def _meta_path(self, kind, key):
+        return self.root / kind / key[:2] / f'{key}.meta.json'
+
+    def _data_path(self, kind, key, sha256):
+        return self.root / kind / key[:2] / f'{key}.{sha256}'
+
+    def _atomic_write(self, target, data):
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.root / 'tmp' / f'{os.getpid()}-{uuid.uuid4().hex}'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, target)
+
+    def _read_meta(self, kind, key):
+        """Métadonnées d'une entrée et chemin des données qu'elles désignent"""
+        meta = json.loads(self._meta_path(kind, key).read_text(encoding='utf-8'))
+        return meta, self._data_path(kind, key, meta['sha256'])
+
+    def get(self, kind, key):
+        """Retourne le chemin d'une entrée vérifiée, ou None (miss)"""
+        try:
+            meta, data_path = self._read_meta(kind, key)
+            if file_sha256(data_path) != meta['sha256']:
+                # Entrée corrompue : on la supprime et on la traite comme absente
+                self._remove(data_path)
+                self.misses[kind] += 1
+                return None
+            os.utime(data_path)
+        except (OSError, ValueError, KeyError):
+            self.misses[kind] += 1
+            return None
+
+        self.hits[kind] += 1
+        return data_path
+
+    def get_bytes(self, kind, key):
+        """Retourne (données, métadonnées) d'une entrée vérifiée, ou None"""
+        try:
+            meta, data_path = self._read_meta(kind, key)
+            data = data_path.read_bytes()
+        except (OSError, ValueError, KeyError):
+            self.misses[kind] += 1
+            return None
+
+        if hashlib.sha256(data).hexdigest() != meta['sha256']:
+            self._remove(data_path)
+            self.misses[kind] += 1
+            return None
+
+        try:
+            os.utime(data_path)
+        except OSError:
+            pass
+        self.hits[kind] += 1
+        return data, meta
+
+    def put_file(self, kind, key, src_path, meta=None):
+        """Copie un fichier (chemin ou fichier ouvert) dans le cache (copie temporaire puis renommage atomique)"""
+        tmp_path = self.root / 'tmp' / f'{os.getpid()}-{uuid.uuid4().hex}'
+        if hasattr(src_path, 'read'):
+            with open(tmp_path, 'wb') as dst:
+                shutil.copyfileobj(src_path, dst, 1024 * 1024)
+        else:
+            shutil.copyfile(src_path, tmp_path)
+        meta = dict(meta or {}, sha256=file_sha256(tmp_path), size=tmp_path.stat().st_size)
+        data_path = self._data_path(kind, key, meta['sha256'])
+        data_path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp_path, data_path)
+        self._atomic_write(self._meta_path(kind, key), json.dumps(meta).encode('utf-8'))
+        self.stores += 1
+        return data_path
+
+    def put_bytes(self, kind, key, data, meta=None):
+        """Enregistre des données en mémoire dans le cache"""
+        meta = dict(meta or {}, sha256=hashlib.sha256(data).hexdigest(), size=len(data))
+        data_path = self._data_path(kind, key, meta['sha256'])
+        self._atomic_write(data_path, data)
+        self._atomic_write(self._meta_path(kind, key), json.dumps(meta).encode('utf-8'))
+        self.stores += 1
+        return data_path
+
+    def _remove(self, data_path):
+        # Les métadonnées d'abord (si elles désignent encore ces données) : un lecteur concurrent verra un miss propre
+        key, _, sha256 = data_path.name.rpartition('.')
+        meta_path = data_path.with_name(f'{key}.meta.json')
+        try:
+            if json.loads(meta_path.read_text(encoding='utf-8')).get('sha256') == sha256:
+                meta_path.unlink()
+        except (OSError, ValueError):
+            pass
+        try:
+            data_path.unlink()
+        except OSError:
+            pass
+
+    def _is_current(self, data_path):
+        """Vrai si les métadonnées de la clé désignent ces données (sinon : version remplacée)"""
+        key, _, sha256 = data_path.name.rpartition('.')
+        try:
+            meta = json.loads(data_path.with_name(f'{key}.meta.json').read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return False
+        return meta.get('sha256') == sha256
+
+    def enforce_size_limit(self):
+        """Évince les entrées les moins récemment utilisées au-delà de max_size"""
+        entries = []
+        total = 0
+        cutoff = time.time() - self.ORPHAN_AGE
+        for kind in self.KINDS:
+            for data_path in (self.root / kind).glob('*/*'):
+                if data_path.name.endswith('.meta.json'):
+                    continue
+                try:
+                    stat = data_path.stat()
+                except OSError:
+                    continue
+                # Données d'une version remplacée : un lecteur a pu les obtenir juste avant, gardées une heure
+                if stat.st_mtime < cutoff and not self._is_current(data_path):
+                    try:
+                        data_path.unlink()
+                    except OSError:
+                        pass
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, data_path))
+                total += stat.st_size
+
+        entries.sort()
+        for _, size, data_path in entries:
+            if total <= self.max_size:
+                break
+            self._remove(data_path)
+            total -= size
+            self.evictions += 1
+
+        # Fichiers temporaires orphelins (worker interrompu)
+        for tmp_path in (self.root / 'tmp').iterdir():
+            try:
+                if tmp_path.stat().st_mtime < cutoff:
+                    tmp_path.unlink()
+            except OSError:
+                pass
+
+        return total
+
+
+class BuildHistory:
+    """Historique SQLite des métriques de build (tailles, durées, plus gros fichiers).
+
+    Chaque exécution ajoute une ligne dans `runs` ; les métriques par cible,
+    par phase et les plus gros contributeurs y sont rattachés. La référence
+    d'une métrique est la médiane des `window` dernières exécutions.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            started_at TEXT NOT NULL,
+            version TEXT NOT NULL,
+            git_commit TEXT,
+            build_seconds REAL NOT NULL,
+            regressions INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS targets (
+            run_id INTEGER NOT NULL REFERENCES runs(id),
+            target TEXT NOT NULL,
+            archive_bytes INTEGER NOT NULL,
+            uncompressed_bytes INTEGER NOT NULL,
+            files INTEGER NOT NULL,
+            seconds REAL,
+            cached INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (run_id, target)
+        );
+        CREATE TABLE IF NOT EXISTS phases (
+            run_id INTEGER NOT NULL REFERENCES runs(id),
+            phase TEXT NOT NULL,
+            seconds REAL NOT NULL,
+            PRIMARY KEY (run_id, phase)
+        );
+        CREATE TABLE IF NOT EXISTS contributors (
+            run_id INTEGER NOT NULL REFERENCES runs(id),
+            target TEXT NOT NULL,
+            path TEXT NOT NULL,
+            bytes INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS targets_by_name ON targets (target, run_id);
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.path)
+        self.db.executescript(self.SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def record(self, version, git_commit, build_seconds, targets, phases, contributors, regressions=0):
+        with self.db:
+            cursor = self.db.execute(
+                'INSERT INTO runs (started_at, version, git_commit, build_seconds, regressions) VALUES (?, ?, ?, ?, ?)',
+                (time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()), version, git_commit, build_seconds, regressions),
+            )
+            run_id = cursor.lastrowid
+            self.db.executemany(
+                'INSERT INTO targets VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [(run_id, name, t['archive_bytes'], t['uncompressed_bytes'], t['files'], t.get('seconds'), int(t.get('cached', False)))
+                 for name, t in targets.items()],
+            )
+            self.db.executemany('INSERT INTO phases VALUES (?, ?, ?)', [(run_id, k, v) for k, v in phases.items()])
+            self.db.executemany(
+                'INSERT INTO contributors VALUES (?, ?, ?, ?)',
+                [(run_id, target, path, size) for target, files in contributors.items() for path, size in files],
+            )
+        return run_id
+
+    @staticmethod
+    def _median(values):
+        values = sorted(values)
+        if not values:
+            return None
+        middle = len(values) // 2
+        return values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2
+
+    def baseline(self, target, column, window=5):
+        """Médiane d'une métrique de cible sur les dernières exécutions (hors restaurations du cache pour les durées)"""
+        where = 'target = ? AND cached = 0' if column == 'seconds' else 'target = ?'
+        rows = self.db.execute(
+            f'SELECT {column} FROM targets WHERE {where} AND {column} IS NOT NULL ORDER BY run_id DESC LIMIT ?',
+            (target, window),
+        ).fetchall()
+        return self._median([row[0] for row in rows])
+
+    def recent_timings(self, target, window=5):
+        """(durée, octets non compressés) des dernières exécutions non restaurées du cache"""
+        return self.db.execute(
+            'SELECT seconds, uncompressed_bytes FROM targets WHERE target = ? AND cached = 0 AND seconds IS NOT NULL '
+            'ORDER BY run_id DESC LIMIT ?',
+            (target, window),
+        ).fetchall()
+
+    def build_baseline(self, window=5):
+        rows = self.db.execute('SELECT build_seconds FROM runs ORDER BY id DESC LIMIT ?', (window,)).fetchall()
+        return self._median([row[0] for row in rows])
+
+    def trends(self, target=None):
+        """Moyennes par version et par cible, dans l'ordre chronologique"""
+        query = """
+            SELECT r.version, t.target, COUNT(*), AVG(t.archive_bytes), AVG(t.files),
+                   AVG(CASE WHEN t.cached = 0 THEN t.seconds END), AVG(r.build_seconds), MIN(r.id)
+            FROM targets t JOIN runs r ON r.id = t.run_id
+            {where}
+            GROUP BY r.version, t.target
+            ORDER BY MIN(r.id), t.target
+        """
+        if target:
+            return self.db.execute(query.format(where='WHERE t.target = ?'), (target,)).fetchall()
+        return self.db.execute(query.format(where='')).fetchall()
+
+    def top_contributors(self, target, limit=10):
+        row = self.db.execute('SELECT MAX(run_id) FROM contributors WHERE target = ?', (target,)).fetchone()
+        if not row or row[0] is None:
+            return []
+        return self.db.execute(
+            'SELECT path, bytes FROM contributors WHERE run_id = ? AND target = ? ORDER BY bytes DESC LIMIT ?',
+            (row[0], target, limit),
+        ).fetchall()
+
+
+def parse_size(value):
+    """Convertit "350 KB", "1.5 MB" ou un entier (octets) en nombre d'octets"""
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = re.fullmatch(r'\s*([\d.]+)\s*([KMG]?B?)\s*', value.upper())
+    if not match:
+        raise ValueError(f"Taille invalide: {value!r}")
+    unit = match.group(2).rstrip('B')
+    return int(float(match.group(1)) * 1024 ** ' KMG'.index(unit or ' '))
+
+
+def _tar_member_compressed_sizes(path, members, source=None):
+    """Répartit les octets compressés d'un .tar.gz entre ses membres.
+
+    Le flux gzip est décompressé par petits blocs ; les octets compressés de
+    chaque bloc sont attribués aux membres au prorata des octets décompressés
+    qu'il produit dans leurs données. Le reste (en-têtes, bourrage) est renvoyé
+    à part.
+    """
+    intervals = sorted((m.offset_data, m.offset_data + m.size, m.name) for m in members if m.isfile() and m.size)
+    sizes = {name: 0.0 for _, _, name in intervals}
+    overhead = 0.0
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    position = 0
+    index = 0
+    if source is not None:
+        source.seek(0)
+    with contextlib.nullcontext(source) if source is not None else open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024), b''):
+            produced = len(decompressor.decompress(chunk))
+            # Archive segmentée : un décompresseur neuf pour chaque membre gzip
+            while decompressor.eof and decompressor.unused_data:
+                rest = decompressor.unused_data
+                decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                produced += len(decompressor.decompress(rest))
+            if not produced:
+                overhead += len(chunk)
+                continue
+            start, end = position, position + produced
+            attributed = 0
+            while index < len(intervals) and intervals[index][1] <= start:
+                index += 1
+            i = index
+            while i < len(intervals) and intervals[i][0] < end:
+                overlap = min(end, intervals[i][1]) - max(start, intervals[i][0])
+                if overlap > 0:
+                    sizes[intervals[i][2]] += len(chunk) * overlap / produced
+                    attributed += overlap
+                i += 1
+            overhead += len(chunk) * (produced - attributed) / produced
+            position = end
+    return {name: round(size) for name, size in sizes.items()}, round(overhead)
+
+
+def analyze_archive(path, source=None):
+    """Taille compressée et décompressée de chaque fichier d'une archive (zip ou tar.gz).
+
+    `source` : fichier déjà ouvert lu à la place de `path` (archive en volumes).
+    """
+    path = Path(path)
+    files = []
+    if path.name.endswith('.zip'):
+        with zipfile.ZipFile(source or path) as archive:
+            for info in archive.infolist():
+                if not info.is_dir():
+                    files.append((info.filename, info.compress_size, info.file_size))
+    else:
+        with tarfile.open(path, 'r:gz', fileobj=source) as archive:
+            members = archive.getmembers()
+        compressed, _ = _tar_member_compressed_sizes(path, members, source)
+        files = [(m.name, compressed.get(m.name, 0), m.size) for m in members if m.isfile()]
+    
+    archive_bytes = source.seek(0, os.SEEK_END) if source else path.stat().st_size
+    entries = []
+    for name, compressed_size, size in files:
+        # Chemins relatifs à la racine du package (sans le dossier pageforge-<cible>-vX)
+        rel = name.split('/', 1)[1] if '/' in name else name
+        entries.append({'path': rel, 'compressed': compressed_size, 'uncompressed': size})
+    return {
+        'archive': path.name,
+        'archive_bytes': archive_bytes,
+        'uncompressed_bytes': sum(e['uncompressed'] for e in entries),
+        'overhead_bytes': archive_bytes - sum(e['compressed'] for e in entries),
+        'files': sorted(entries, key=lambda e: e['compressed'], reverse=True),
+    }
+
+
+GZIP_FLUSH_MARKER = b'\x00\x00\xff\xff'  # bloc stocké vide qui termine un vidage (Z_FULL_FLUSH)
+
+
+class GzipCheckpointReader:
+    """Lecture séquentielle d'un .gz projeté en mémoire, à partir d'un point de reprise.
+
+    Un point de reprise est un offset d'où deflate repart sans historique : début
+    d'un membre gzip, ou vidage complet écrit entre deux membres tar. Avec
+    `record`, les points rencontrés sont relevés ; un vidage n'est retenu qu'après
+    comparaison d'une décompression repartie de zéro avec le flux séquentiel.
+    """
+
+    CHUNK = 64 * 1024
+    PROBE = 512
+
+    def __init__(self, data, checkpoint=(0, 0, 'member'), record=False, spacing=1024 ** 2):
+        self.data = data
+        self.pos, self.position, kind = checkpoint
+        self.decompressor = None if kind == 'member' else zlib.decompressobj(-15)
+        # Membre entamé en cours de route : son crc ne peut pas être contrôlé
+        self.crc = None
+        self.record = record
+        self.spacing = spacing
+        self.checkpoints = []
+        self.pending = deque()
+        self.recent = bytearray()
+        self.recent_start = self.position
+
+    def read(self, size=-1):
+        if size == 0:
+            return b''
+        limit = size if size and size > 0 else 16 * self.CHUNK
+        while True:
+            if self.decompressor is None and not self._next_member():
+                return b''
+            end = min(self.pos + self.CHUNK, len(self.data))
+            if end == self.pos:
+                raise EOFError("Flux gzip tronqué")
+            marker = self.data.find(GZIP_FLUSH_MARKER, max(self.pos - 3, 0), end) if self.record else -1
+            if marker >= 0:
+                end = marker + len(GZIP_FLUSH_MARKER)
+            chunk = self.data[self.pos:end]
+            out = self.decompressor.decompress(chunk, limit)
+            self.position += len(out)
+            if self.crc is not None:
+                self.crc = zlib.crc32(out, self.crc)
+            if self.decompressor.eof:
+                # Fin du membre : ce qui suit (trailer, membre suivant) est dans unused_data
+                self.pos = end - len(self.decompressor.unused_data)
+                self._end_member()
+            else:
+                self.pos += len(chunk) - len(self.decompressor.unconsumed_tail)
+                if marker >= 0 and self.pos == end and len(out) < limit:
+                    self._candidate(end)
+            if self.record:
+                self._confirm(out)
+            if out:
+                return out
+
+    def _next_member(self):
+        """Entête du membre gzip suivant (RFC 1952) ; False en fin de fichier"""
+        data, p = self.data, self.pos
+        if p >= len(data):
+            return False
+        if data[p:p + 3] != b'\x1f\x8b\x08':
+            raise ValueError(f"Entête gzip invalide à l'offset {p}")
+        if self.record:
+            self.checkpoints.append((p, self.position, 'member'))
+        flags = data[p + 3]
+        p += 10
+        if flags & 4:
+            p += 2 + struct.unpack('<H', data[p:p + 2])[0]
+        for flag in (8, 16):
+            if flags & flag:
+                p = data.find(b'\x00', p) + 1
+        if flags & 2:
+            p += 2
+        self.pos = p
+        self.decompressor = zlib.decompressobj(-15)
+        self.crc = 0
+        self.member_start = self.position
+        return True
+
+    def _end_member(self):
+        crc, isize = struct.unpack('<2L', self.data[self.pos:self.pos + 8])
+        if self.crc is not None and (crc != self.crc or isize != (self.position - self.member_start) & 0xFFFFFFFF):
+            raise ValueError(f"CRC gzip invalide (membre terminé à l'offset {self.pos})")
+        self.pos += 8
+        self.decompressor = None
+
+    def _candidate(self, offset):
+        """Vidage probable : début de décompression repartie de zéro, à confirmer"""
+        last = max([c[1] for c in self.checkpoints[-1:]] + [c[1] for c in self.pending] + [-self.spacing])
+        if self.position - last < self.spacing:
+            return
+        try:
+            prefix = zlib.decompressobj(-15).decompress(self.data[offset:offset + 16 * 1024], self.PROBE)
+        except zlib.error:
+            return
+        if prefix:
+            self.pending.append((offset, self.position, prefix))
+
+    def _confirm(self, out):
+        self.recent += out
+        while self.pending and self.pending[0][1] + len(self.pending[0][2]) <= self.position:
+            offset, position, prefix = self.pending.popleft()
+            start = position - self.recent_start
+            if start >= 0 and self.recent[start:start + len(prefix)] == prefix:
+                self.checkpoints.append((offset, position, 'flush'))
+        # Seuls les octets utiles aux confirmations en attente sont gardés
+        keep = self.pending[0][1] if self.pending else self.position
+        del self.recent[:keep - self.recent_start]
+        self.recent_start = keep
+
+
+class PackageInspector:
+    """Lecture directe d'un package, sans extraction complète.
+
+    Zip : répertoire central lu sur le fichier projeté en mémoire. tar.gz : index
+    de reprise (points de reprise gzip, membres avec offset et empreintes)
+    construit en un passage puis mis en cache à côté de l'archive.
+    """
+
+    def __init__(self, path, checkpoint_spacing=1024 ** 2):
+        self.path = Path(path)
+        self.checkpoint_spacing = checkpoint_spacing
+        self.index_built = False
+        volume_index = self.path.with_name(f'{self.path.name}.volumes.json')
+        # Zip livré en volumes (--volume-size) : lu à travers leur concaténation
+        volumes = not self.path.exists() and volume_index.exists()
+        self.is_zip = volumes or zipfile.is_zipfile(self.path)
+        if self.is_zip:
+            self.mapped = VolumeReader(volume_index) if volumes else MappedFile(self.path)
+            self.zip = zipfile.ZipFile(self.mapped)
+        else:
+            self._file = open(self.path, 'rb')
+            self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.index = self.load_seek_index()
+        self.by_name = {m['name']: m for m in self.members()}
+        first = next(iter(self.by_name), '')
+        self.root = first.split('/', 1)[0]
+
+    @property
+    def index_path(self):
+        return self.path.with_name(f'{self.path.name}.seek.json')
+
+    def load_seek_index(self):
+        """Index de reprise du tar.gz : relu depuis le cache s'il correspond encore à l'archive"""
+        stat = self.path.stat()
+        try:
+            index = json.loads(self.index_path.read_text(encoding='utf-8'))
+            if index['version'] == 1 and index['size'] == stat.st_size and index['mtime_ns'] == stat.st_mtime_ns:
+                return index
+        except (OSError, ValueError, KeyError):
+            pass
+        index = self.build_seek_index(stat)
+        self.index_built = True
+        try:
+            atomic_write(self.index_path, json.dumps(index, separators=(',', ':')).encode('utf-8'))
+        except OSError:
+            pass  # Dossier en lecture seule : l'index n'est simplement pas mis en cache
+        return index
+
+    def build_seek_index(self, stat):
+        """Passage complet : points de reprise, offset, SHA-256 et CRC-32 de chaque membre"""
+        reader = GzipCheckpointReader(self.data, record=True, spacing=self.checkpoint_spacing)
+        types = {tarfile.REGTYPE: 'file', tarfile.AREGTYPE: 'file', tarfile.DIRTYPE: 'dir',
+                 tarfile.LNKTYPE: 'hardlink', tarfile.SYMTYPE: 'symlink'}
+        members = []
+        with tarfile.open(fileobj=reader, mode='r|') as tar:
+            for info in tar:
+                entry = {'name': info.name.rstrip('/'), 'type': types.get(info.type, 'other'), 'size': info.size,
+                         'mode': info.mode, 'mtime': info.mtime, 'offset': info.offset_data}
+                if info.isfile():
+                    digest = hashlib.sha256()
+                    crc = 0
+                    source = tar.extractfile(info)
+                    for chunk in iter(lambda: source.read(1024 * 1024), b''):
+                        digest.update(chunk)
+                        crc = zlib.crc32(chunk, crc)
+                    entry.update(sha256=digest.hexdigest(), crc32=crc)
+                elif info.islnk() or info.issym():
+                    entry['linkname'] = info.linkname
+                members.append(entry)
+        while reader.read(1024 * 1024):
+            pass
+        return {
+            'format': 'pageforge-seek-index',
+            'version': 1,
+            'archive': self.path.name,
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'checkpoints': sorted(reader.checkpoints, key=lambda c: c[1]),
+            'members': members,
+        }
+
+    def members(self):
+        """Membres : nom, type, taille, CRC-32 (et SHA-256 pour un tar.gz)"""
+        if not self.is_zip:
+            return self.index['members']
+        return [{
+            'name': info.filename.rstrip('/'),
+            'type': 'dir' if info.is_dir() else 'file',
+            'size': info.file_size,
+            'mode': (info.external_attr >> 16) & 0o7777,
+            'mtime': time.mktime(info.date_time + (0, 0, -1)),
+            'crc32': info.CRC,
+        } for info in self.zip.infolist()]
+
+    def resolve(self, name):
+        """Nom complet d'un membre, donné tel quel ou relatif à la racine du package"""
+        for candidate in (name.strip('/'), f'{self.root}/{name.strip("/")}'):
+            if candidate in self.by_name:
+                return candidate
+        raise ValueError(f"{name} absent de {self.path.name}")
+
+    def iter_member(self, name, chunk_size=1024 * 1024):
+        """Contenu d'un membre par blocs ; tar.gz : décompression depuis le point de reprise le plus proche"""
+        name = self.resolve(name)
+        entry = self.by_name[name]
+        if entry['type'] == 'hardlink':
+            entry = self.by_name[entry['linkname']]
+        if entry['type'] != 'file':
+            raise ValueError(f"{name} n'est pas un fichier ({entry['type']})")
+        if self.is_zip:
+            with self.zip.open(entry['name']) as source:
+                yield from iter(lambda: source.read(chunk_size), b'')
+            return
+
+        checkpoint = max((c for c in self.index['checkpoints'] if c[1] <= entry['offset']), key=lambda c: c[1])
+        reader = GzipCheckpointReader(self.data, tuple(checkpoint))
+        skip = entry['offset'] - checkpoint[1]
+        while skip:
+            chunk = reader.read(min(skip, chunk_size))
+            if not chunk:
+                raise EOFError(f"{self.path.name} tronquée avant {name}")
+            skip -= len(chunk)
+        remaining = entry['size']
+        digest = hashlib.sha256()
+        while remaining:
+            chunk = reader.read(min(remaining, chunk_size))
+            if not chunk:
+                raise EOFError(f"{self.path.name} tronquée dans {name}")
+            remaining -= len(chunk)
+            digest.update(chunk)
+            yield chunk
+        if digest.hexdigest() != entry['sha256']:
+            raise ValueError(f"{name} : SHA-256 différent de l'index de reprise")
+
+    def file_digests(self):
+        """Chemin relatif à la racine -> (taille, CRC-32, SHA-256 ou None), hardlinks et doublons partagés résolus"""
+        digests = {}
+        for entry in self.by_name.values():
+            if entry['type'] == 'hardlink':
+                entry = dict(self.by_name.get(entry['linkname'], {}), name=entry['name'])
+            if entry.get('type') != 'file':
+                continue
+            rel = entry['name'].split('/', 1)[1] if '/' in entry['name'] else entry['name']
+            digests[rel] = (entry['size'], entry['crc32'], entry.get('sha256'))
+
+        # Zip à doublons partagés : chaque doublon prend l'empreinte de sa source
+        if '.pageforge-duplicates.json' in digests:
+            data = b''.join(self.iter_member('.pageforge-duplicates.json'))
+            for dup, src in json.loads(data)['files'].items():
+                if src in digests:
+                    digests[dup] = digests[src]
+        return digests
+
+    def close(self):
+        if self.is_zip:
+            self.zip.close()
+            self.mapped.close()
+        else:
+            self.data.close()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def diff_packages(old, new):
+    """Compare deux packages membre à membre (chemins relatifs à la racine), sans extraction.
+
+    SHA-256 quand les deux archives en ont (tar.gz indexés), sinon taille et CRC-32.
+    """
+    before, after = old.file_digests(), new.file_digests()
+
+    def same(a, b):
+        return a[2] == b[2] if a[2] and b[2] else a[:2] == b[:2]
+
+    common = sorted(before.keys() & after.keys())
+    changed = [{'path': path, 'old_size': before[path][0], 'new_size': after[path][0]}
+               for path in common if not same(before[path], after[path])]
+    return {
+        'old': old.path.name,
+        'new': new.path.name,
+        'added': [{'path': path, 'size': after[path][0]} for path in sorted(after.keys() - before.keys())],
+        'removed': [{'path': path, 'size': before[path][0]} for path in sorted(before.keys() - after.keys())],
+        'changed': changed,
+        'unchanged': len(common) - len(changed),
+    }
+
+
+class ZipPayloadWriter:
+    """Écrit une archive ZIP à partir de membres déjà compressés (deflate brut).
+
+    Permet de réutiliser des payloads compressés mis en cache sans les
+    recompresser, ce que `zipfile` ne sait pas faire.
+    """
+
+    ZIP64_LIMIT = 0xFFFFFFFF
+
+    def __init__(self, fileobj):
+        self.fp = fileobj
+        self.offset = 0
+        self.entries = []
+        self.segments = []
+        self.segment_start = (0, 0)
+
+    def _write(self, data):
+        self.fp.write(data)
+        self.offset += len(data)
+
+    @staticmethod
+    def _dos_datetime(mtime):
+        t = time.localtime(mtime)
+        if t.tm_year < 1980:
+            return 0, (0 << 9) | (1 << 5) | 1
+        dos_time = (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2)
+        dos_date = ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+        return dos_time, dos_date
+
+    def add_member(self, arcname, payload, crc, size, mtime, mode=0o100644, method=zipfile.ZIP_DEFLATED):
+        name = arcname.encode('utf-8')
+        flags = 0 if arcname.isascii() else 0x800
+        dos_time, dos_date = self._dos_datetime(mtime)
+        header_offset = self.offset
+
+        # Le payload peut être un fichier (compression en flux à mémoire bornée)
+        if isinstance(payload, (bytes, bytearray, memoryview)):
+            payload_size = len(payload)
+        else:
+            payload_size = payload.seek(0, os.SEEK_END)
+            payload.seek(0)
+
+        # Zip64 forcé dès qu'une taille dépasse 4 Go (champs à 0xFFFFFFFF + extra 0x0001)
+        zip64 = max(size, payload_size) >= self.ZIP64_LIMIT
+        if zip64:
+            extra = struct.pack('<2H2Q', 0x0001, 16, size, payload_size)
+            header_sizes = (self.ZIP64_LIMIT, self.ZIP64_LIMIT)
+        else:
+            extra = b''
+            header_sizes = (payload_size, size)
+
+        self._write(struct.pack(
+            '<4s5H3L2H', b'PK\x03\x04', 45 if zip64 else 20, flags, method, dos_time, dos_date,
+            crc, header_sizes[0], header_sizes[1], len(name), len(extra)
+        ))
+        self._write(name)
+        self._write(extra)
+        if isinstance(payload, (bytes, bytearray, memoryview)):
+            self._write(payload)
+        else:
+            for chunk in iter(lambda: payload.read(1024 * 1024), b''):
+                self._write(chunk)
+        self.entries.append((name, flags, method, dos_time, dos_date, crc, payload_size, size, mode, header_offset))
+
+    def add_streamed_member(self, arcname, source, size, mtime, mode=0o100644, level=6, on_read=None, store=False,
+                            chunk_size=1024 * 1024):
+        """Écrit un membre en une seule passe, sans tampon ni retour en arrière.
+
+        Le crc et les tailles ne sont connus qu'à la fin : ils suivent les données
+        dans un descripteur (bit 3). Retourne le SHA-256 du contenu.
+        """
+        name = arcname.encode('utf-8')
+        flags = 0x08 | (0 if arcname.isascii() else 0x800)
+        method = zipfile.ZIP_STORED if store else zipfile.ZIP_DEFLATED
+        dos_time, dos_date = self._dos_datetime(mtime)
+        header_offset = self.offset
+        
+        # Zip64 décidé d'avance sur la taille source (marge pour l'expansion deflate)
+        zip64 = size + (size >> 10) + 1024 >= self.ZIP64_LIMIT
+        extra = struct.pack('<2H2Q', 0x0001, 16, 0, 0) if zip64 else b''
+        header_size = self.ZIP64_LIMIT if zip64 else 0
+        self._write(struct.pack(
+            '<4s5H3L2H', b'PK\x03\x04', 45 if zip64 else 20, flags, method, dos_time, dos_date,
+            0, header_size, header_size, len(name), len(extra)
+        ))
+        self._write(name)
+        self._write(extra)
+        
+        compressor = None if store else zlib.compressobj(level, zlib.DEFLATED, -15)
+        digest = hashlib.sha256()
+        crc = 0
+        csize = usize = 0
+        for chunk in iter(lambda: source.read(chunk_size), b''):
+            if on_read:
+                on_read(len(chunk))
+            crc = zlib.crc32(chunk, crc)
+            digest.update(chunk)
+            usize += len(chunk)
+            out = compressor.compress(chunk) if compressor else chunk
+            self._write(out)
+            csize += len(out)
+        if compressor:
+            out = compressor.flush()
+            self._write(out)
+            csize += len(out)
+        
+        if zip64:
+            self._write(struct.pack('<4sL2Q', b'PK\x07\x08', crc, csize, usize))
+        else:
+            self._write(struct.pack('<4s3L', b'PK\x07\x08', crc, csize, usize))
+        self.entries.append((name, flags, method, dos_time, dos_date, crc, csize, usize, mode, header_offset))
+        return digest.hexdigest()
+
+    def cut(self, files=0, data_bytes=0):
+        """Clôt un segment (--segments) : plage de membres extractible indépendamment des autres"""
+        first, offset = self.segment_start
+        if len(self.entries) > first:
+            self.segments.append({'offset': offset, 'length': self.offset - offset, 'first': first,
+                                  'count': len(self.entries) - first, 'files': files, 'bytes': data_bytes})
+        self.segment_start = (len(self.entries), self.offset)
+
+    def close(self):
+        limit = self.ZIP64_LIMIT
+        cd_offset = self.offset
+        for name, flags, method, dos_time, dos_date, crc, csize, size, mode, header_offset in self.entries:
+            # Extra Zip64 du répertoire central : seulement les champs qui débordent, dans cet ordre
+            values = [v for v in (size, csize, header_offset) if v >= limit]
+            extra = struct.pack(f'<2H{len(values)}Q', 0x0001, 8 * len(values), *values) if values else b''
+            version = 45 if values else 20
+            self._write(struct.pack(
+                '<4s6H3L5H2L', b'PK\x01\x02', (3 << 8) | version, version, flags, method, dos_time, dos_date,
+                crc, min(csize, limit), min(size, limit), len(name), len(extra), 0, 0, 0,
+                (mode & 0xFFFF) << 16, min(header_offset, limit)
+            ))
+            self._write(name)
+            self._write(extra)
+        cd_size = self.offset - cd_offset
+        count = len(self.entries)
+
+        if count >= 0xFFFF or cd_offset >= limit or cd_size >= limit:
+            zip64_eocd_offset = self.offset
+            self._write(struct.pack(
+                '<4sQ2H2L4Q', b'PK\x06\x06', 44, (3 << 8) | 45, 45, 0, 0, count, count, cd_size, cd_offset
+            ))
+            self._write(struct.pack('<4sLQL', b'PK\x06\x07', 0, zip64_eocd_offset, 1))
+        self._write(struct.pack(
+            '<4s4H2LH', b'PK\x05\x06', 0, 0, min(count, 0xFFFF), min(count, 0xFFFF),
+            min(cd_size, limit), min(cd_offset, limit), 0
+        ))
+
+
+FICLONE = 0x40049409  # ioctl Linux : clone (reflink) d'un fichier entier (Btrfs, XFS, bcachefs…)
+
+
+def copy_file_fast(src, dst, stat=None):
+    """Copie un fichier sans faire transiter les données par des tampons Python.
+
+    Reflink si le système de fichiers le permet, sinon copy_file_range puis sendfile ;
+    copie classique en dernier recours. Conserve droits et dates (lus par les archives).
+    """
+    stat = stat or os.stat(src)
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        infd, outfd = fsrc.fileno(), fdst.fileno()
+        try:
+            if not stat.st_size:
+                pass
+            elif fcntl and _try_reflink(infd, outfd):
+                pass
+            elif hasattr(os, 'copy_file_range'):
+                while os.copy_file_range(infd, outfd, 1 << 30):
+                    pass
+            else:
+                offset = 0
+                while True:
+                    sent = os.sendfile(outfd, infd, offset, 1 << 30)
+                    if not sent:
+                        break
+                    offset += sent
+        except OSError:
+            # Noyau ancien, systèmes de fichiers croisés ou sendfile limité aux sockets (macOS)
+            os.lseek(infd, 0, os.SEEK_SET)
+            os.lseek(outfd, 0, os.SEEK_SET)
+            os.ftruncate(outfd, 0)
+            shutil.copyfileobj(fsrc, fdst, 1024 * 1024)
+    os.chmod(dst, stat.st_mode & 0o7777)
+    os.utime(dst, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    return dst
+
+
+def _try_reflink(infd, outfd):
+    try:
+        fcntl.ioctl(outfd, FICLONE, infd)
+        return True
+    except OSError:
+        return False
+
+
+def deflate_payload(data, level=9):
+    """Compresse en deflate brut ; stocke tel quel si la compression n'apporte rien"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    payload = compressor.compress(data) + compressor.flush()
+    if len(payload) >= len(data):
+        return data, zipfile.ZIP_STORED
+    return payload, zipfile.ZIP_DEFLATED
+
+
+def deflate_file(path, level=6, buffer_size=1024 * 1024, on_read=None, store=False):
+    """Compresse un fichier en flux vers un tampon borné (débordant sur disque).
+
+    Retourne (payload, crc, sha256, méthode) ; le payload est un fichier à
+    fermer par l'appelant. Un fichier incompressible (ou `store=True`) est
+    renvoyé tel quel, ouvert en lecture, sans copie.
+    """
+    compressor = None if store else zlib.compressobj(level, zlib.DEFLATED, -15)
+    payload = None if store else tempfile.SpooledTemporaryFile(max_size=buffer_size)
+    crc = 0
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(buffer_size), b''):
+            if on_read:
+                on_read(len(chunk))
+            crc = zlib.crc32(chunk, crc)
+            digest.update(chunk)
+            size += len(chunk)
+            if compressor:
+                payload.write(compressor.compress(chunk))
+    if compressor:
+        payload.write(compressor.flush())
+        if payload.tell() < size:
+            return payload, crc, digest.hexdigest(), zipfile.ZIP_DEFLATED
+        payload.close()
+    return open(path, 'rb'), crc, digest.hexdigest(), zipfile.ZIP_STORED
+
+
+def compress_block(data, level, final=True, zdict=b''):
+    """Deflate brut d'un bloc ; `final=False` termine par un flush synchronisé (bloc concaténable).
+
+    `zdict` (les 32 Ko précédents du flux) garde le taux de compression d'un flux continu.
+    """
+    if zdict:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15, zdict=zdict)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+def send_frame(sock, header, body=b''):
+    """Trame du protocole des nœuds de build : longueurs, entête JSON, données brutes"""
+    encoded = json.dumps(header).encode('utf-8')
+    sock.sendall(struct.pack('>2I', len(encoded), len(body)) + encoded)
+    if body:
+        sock.sendall(body)
+
+
+def _recv_exact(sock, size):
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:])
+        if not count:
+            raise ConnectionError("Connexion fermée par le pair")
+        received += count
+    return bytes(buffer)
+
+
+def recv_frame(sock):
+    header_size, body_size = struct.unpack('>2I', _recv_exact(sock, 8))
+    header = json.loads(_recv_exact(sock, header_size))
+    return header, _recv_exact(sock, body_size) if body_size else b''
+
+
+class CompressionNode(socketserver.ThreadingTCPServer):
+    """Nœud de build : compresse les blocs envoyés par le coordinateur (un thread par connexion).
+
+    Avec `max_items`, le nœud tombe après N blocs : les connexions sont ensuite
+    fermées sans réponse, comme pour un nœud perdu (essai de reprise).
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, max_items=None):
+        super().__init__(address, _CompressionNodeHandler)
+        self.items = 0
+        self.max_items = max_items
+        self.lock = threading.Lock()
+
+
+class _CompressionNodeHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        while True:
+            try:
+                header, body = recv_frame(self.request)
+            except (ConnectionError, OSError, ValueError):
+                return
+            with self.server.lock:
+                if self.server.max_items is not None and self.server.items >= self.server.max_items:
+                    return
+                self.server.items += 1
+            data = body[header['dict']:]
+            try:
+                payload = compress_block(data, header['level'], header['final'], body[:header['dict']])
+                reply = {'crc32': zlib.crc32(data)}
+            except (zlib.error, ValueError, KeyError) as e:
+                payload = b''
+                reply = {'error': str(e)}
+            send_frame(self.request, reply, payload)
+
+
+class DistributedCompressor:
+    """Coordinateur : répartit des blocs à compresser entre des nœuds de build (TCP).
+
+    Chaque nœud est servi par `connections` threads du coordinateur. Un bloc en
+    cours sur un nœud perdu repart dans la file et est repris par un autre ; sans
+    plus aucun nœud joignable, le coordinateur compresse lui-même la suite.
+    """
+
+    BLOCK_SIZE = 1024 * 1024
+    DICT_SIZE = 32 * 1024
+
+    def __init__(self, nodes, connections=2, retries=3, timeout=60, memo_limit=256 * 1024 ** 2):
+        self.nodes = [self.parse_address(node) for node in nodes]
+        self.retries = retries
+        self.timeout = timeout
+        self.memo_limit = memo_limit
+        # Blocs en vol pour un même flux : de quoi occuper toutes les connexions
+        self.window = max(2, 2 * len(self.nodes) * connections)
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._memo = {}
+        self._memo_bytes = 0
+        self.items = {f'{host}:{port}': 0 for host, port in self.nodes}
+        self.local_items = 0
+        self.retried = 0
+        self.memo_hits = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._alive = len(self.nodes) * connections
+        self._threads = [
+            threading.Thread(target=self._serve, args=(address,), name=f'node-{address[0]}:{address[1]}', daemon=True)
+            for address in self.nodes for _ in range(connections)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    @staticmethod
+    def parse_address(spec):
+        host, port = spec.rsplit(':', 1)
+        return host, int(port)
+
+    def submit(self, data, level, final=True, zdict=b''):
+        """Envoie un bloc ; la Future rend (payload, crc32)"""
+        future = Future()
+        with self._lock:
+            self.bytes_in += len(data)
+            if self._alive:
+                self._queue.put((future, data, level, final, zdict))
+                return future
+        self._compress_locally(future, data, level, final, zdict)
+        return future
+
+    def deflate(self, data, level, key=None):
+        """Compresse un contenu complet, mémorisé par clé de contenu (fichiers communs aux cibles)"""
+        with self._lock:
+            if key in self._memo:
+                self.memo_hits += 1
+                return self._memo[key]
+        future = self.submit(data, level)
+        if key:
+            with self._lock:
+                if self._memo_bytes + len(data) <= self.memo_limit:
+                    self._memo[key] = future
+                    self._memo_bytes += len(data)
+        return future
+
+    def deflate_stream(self, chunks, level):
+        """Compresse une suite de blocs en un seul flux deflate (blocs chaînés, façon pigz).
+
+        Rend les morceaux compressés dans l'ordre, avec au plus `window` blocs en vol.
+        """
+        pending = deque()
+        previous = b''
+        for chunk in chunks:
+            pending.append(self.submit(chunk, level, False, previous[-self.DICT_SIZE:]))
+            previous = chunk
+            while len(pending) >= self.window:
+                yield pending.popleft().result()[0]
+        while pending:
+            yield pending.popleft().result()[0]
+        # Bloc final vide : clôt le flux après les flushs synchronisés
+        yield compress_block(b'', level)
+
+    def deflate_file(self, path, level, on_read=None):
+        """Équivalent réparti de deflate_file : crc et SHA-256 calculés ici au fil de la lecture"""
+        crc = 0
+        digest = hashlib.sha256()
+        
+        def chunks():
+            nonlocal crc
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(self.BLOCK_SIZE), b''):
+                    if on_read:
+                        on_read(len(chunk))
+                    crc = zlib.crc32(chunk, crc)
+                    digest.update(chunk)
+                    yield chunk
+        
+        payload = tempfile.SpooledTemporaryFile(max_size=8 * 1024 ** 2)
+        for piece in self.deflate_stream(chunks(), level):
+            payload.write(piece)
+        return payload, crc, digest.hexdigest(), zipfile.ZIP_DEFLATED
+
+    def _compress_locally(self, future, data, level, final, zdict):
+        payload = compress_block(data, level, final, zdict)
+        with self._lock:
+            self.local_items += 1
+            self.bytes_out += len(payload)
+        future.set_result((payload, zlib.crc32(data)))
+
+    def _serve(self, address):
+        name = f'{address[0]}:{address[1]}'
+        sock = None
+        failures = 0
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            future, data, level, final, zdict = item
+            try:
+                if sock is None:
+                    sock = socket.create_connection(address, timeout=self.timeout)
+                send_frame(sock, {'level': level, 'final': final, 'dict': len(zdict)}, zdict + data)
+                header, payload = recv_frame(sock)
+            except (OSError, ValueError):
+                # Nœud perdu ou injoignable : le bloc repart dans la file pour une autre connexion
+                if sock:
+                    sock.close()
+                    sock = None
+                failures += 1
+                with self._lock:
+                    self.retried += 1
+                self._queue.put(item)
+                if failures > self.retries:
+                    break
+                time.sleep(min(0.1 * 2 ** failures, 2.0))
+                continue
+            failures = 0
+            if 'error' in header:
+                future.set_exception(RuntimeError(f"Nœud {name}: {header['error']}"))
+                continue
+            with self._lock:
+                self.items[name] += 1
+                self.bytes_out += len(payload)
+            future.set_result((payload, header['crc32']))
+        
+        if sock:
+            sock.close()
+        with self._lock:
+            self._alive -= 1
+            orphaned = not self._alive and item is not None
+        if orphaned:
+            # Plus aucun nœud : le coordinateur compresse lui-même les blocs restants
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None:
+                    self._compress_locally(*item)
+
+    def close(self):
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+
+    def stats(self):
+        return {
+            'nodes': list(self.items),
+            'items': dict(self.items),
+            'local_items': self.local_items,
+            'retried': self.retried,
+            'memo_hits': self.memo_hits,
+            'bytes_in': self.bytes_in,
+            'bytes_out': self.bytes_out,
+        }
+
+
+class ParallelGzipWriter:
+    """Flux .gz compressé par blocs sur les nœuds de build (cible de tarfile en mode 'w')"""
+
+    def __init__(self, fileobj, compressor, level):
+        self.fp = fileobj
+        self.compressor = compressor
+        self.level = level
+        self.buffer = bytearray()
+        self.pending = deque()
+        self.previous = b''
+        self.crc = 0
+        self.size = 0
+        self.closed = False
+        # Entête gzip : deflate, sans nom de fichier, OS inconnu
+        self.fp.write(struct.pack('<4BL2B', 0x1f, 0x8b, 8, 0, int(time.time()), 0, 255))
+
+    def write(self, data):
+        self.buffer += data
+        self.crc = zlib.crc32(data, self.crc)
+        self.size += len(data)
+        block = self.compressor.BLOCK_SIZE
+        while len(self.buffer) >= block:
+            self._submit(bytes(self.buffer[:block]))
+            del self.buffer[:block]
+        return len(data)
+
+    def tell(self):
+        return self.size
+
+    def _submit(self, chunk):
+        dict_size = self.compressor.DICT_SIZE
+        self.pending.append(self.compressor.submit(chunk, self.level, False, self.previous[-dict_size:]))
+        self.previous = chunk
+        while len(self.pending) >= self.compressor.window:
+            self.fp.write(self.pending.popleft().result()[0])
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        if self.buffer:
+            self._submit(bytes(self.buffer))
+        while self.pending:
+            self.fp.write(self.pending.popleft().result()[0])
+        self.fp.write(compress_block(b'', self.level))
+        self.fp.write(struct.pack('<2L', self.crc, self.size & 0xFFFFFFFF))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class DigestReader:
+    """Lecture séquentielle qui calcule le SHA-256 (et signale la progression) au passage"""
+
+    def __init__(self, inner, on_read=None):
+        self.inner = inner
+        self.on_read = on_read
+        self.digest = hashlib.sha256()
+
+    def read(self, size=-1):
+        chunk = self.inner.read(size)
+        self.digest.update(chunk)
+        if self.on_read:
+            self.on_read(len(chunk))
+        return chunk
+
+
+SEGMENT_INDEX_NAME = '.pageforge-segments.json'
+
+GZIP_MEMBER_HEADER = struct.pack('<4BL2B', 0x1f, 0x8b, 8, 0, 0, 0, 255)  # deflate, sans nom ni date, OS inconnu
+
+
+def stored_gzip_member(data):
+    """Membre gzip non compressé : sa taille ne dépend que de celle des données (réécriture en place)"""
+    compressor = zlib.compressobj(0, zlib.DEFLATED, -15)
+    return (GZIP_MEMBER_HEADER + compressor.compress(data) + compressor.flush()
+            + struct.pack('<2L', zlib.crc32(data), len(data) & 0xFFFFFFFF))
+
+
+def tar_member_bytes(info, data):
+    """Entête, données et bourrage d'un membre tar écrit sans passer par tarfile"""
+    return (info.tobuf(tarfile.DEFAULT_FORMAT, 'utf-8', 'surrogateescape') + data
+            + tarfile.NUL * (-len(data) % tarfile.BLOCKSIZE))
+
+
+class SegmentPlanner:
+    """Place les coupures de segments entre deux fichiers, par taille ou par dossier.
+
+    Tout segment non final compte au moins `minimum` octets de données : le
+    nombre de segments, donc la taille de l'index, est borné d'avance.
+    """
+
+    def __init__(self, mode, segment_size):
+        self.mode = mode
+        self.segment_size = segment_size
+        self.minimum = max(1, segment_size // 4 if mode == 'directory' else segment_size)
+        self.files = 0
+        self.bytes = 0
+        self.directory = None
+
+    def add(self, directory, size):
+        """Compte un fichier ; retourne (fichiers, octets) du segment à clore avant lui, sinon None"""
+        if self.mode == 'directory':
+            full = self.bytes >= 2 * self.segment_size or (directory != self.directory and self.bytes >= self.minimum)
+        else:
+            full = self.bytes >= self.segment_size
+        closed = self.take() if self.files and full else None
+        self.files += 1
+        self.bytes += size
+        self.directory = directory
+        return closed
+
+    def take(self):
+        """Retourne (fichiers, octets) du segment en cours et repart de zéro"""
+        closed = (self.files, self.bytes)
+        self.files = self.bytes = 0
+        return closed
+
+
+class SegmentedGzipWriter:
+    """Flux .gz en membres gzip indépendants (segments), cible de tarfile en mode 'w'.
+
+    gzip et tar lisent la suite de membres comme un seul flux ; chaque segment se
+    décompresse aussi seul depuis son offset. cut() clôt le membre en cours,
+    toujours entre deux membres tar.
+    """
+
+    def __init__(self, fileobj, level):
+        self.fp = fileobj
+        self.level = level
+        self.offset = 0
+        self.size = 0
+        self.segments = []
+        self.compressor = None
+        self.closed = False
+
+    def _emit(self, data):
+        self.fp.write(data)
+        self.offset += len(data)
+
+    def write(self, data):
+        if self.compressor is None:
+            self.compressor = zlib.compressobj(self.level, zlib.DEFLATED, -15)
+            self.start = (self.offset, self.size)
+            self.crc = 0
+            self.digest = hashlib.sha256()
+            self._emit(GZIP_MEMBER_HEADER)
+        self.crc = zlib.crc32(data, self.crc)
+        self.digest.update(data)
+        self.size += len(data)
+        self._emit(self.compressor.compress(data))
+        return len(data)
+
+    def write_stored(self, data):
+        """Écrit hors segment un membre non compressé (l'index, réécrit à la fin) ; retourne sa taille"""
+        self.cut()
+        member = stored_gzip_member(data)
+        self._emit(member)
+        self.size += len(data)
+        return len(member)
+
+    def tell(self):
+        return self.size
+
+    def cut(self, files=0, data_bytes=0):
+        """Termine le segment en cours (sans effet s'il est vide)"""
+        if self.compressor is None:
+            return
+        size = self.size - self.start[1]
+        self._emit(self.compressor.flush())
+        self._emit(struct.pack('<2L', self.crc, size & 0xFFFFFFFF))
+        self.segments.append({'offset': self.start[0], 'length': self.offset - self.start[0], 'size': size,
+                              'files': files, 'bytes': data_bytes, 'sha256': self.digest.hexdigest()})
+        self.compressor = None
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.cut()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class RangeReader:
+    """Lecture séquentielle limitée à une plage d'octets d'un fichier (un segment)"""
+
+    def __init__(self, f, offset, length):
+        f.seek(offset)
+        self.f = f
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        chunk = self.f.read(size)
+        self.remaining -= len(chunk)
+        return chunk
+
+
+def read_segment_index(archive):
+    """Lit l'index placé en tête d'une archive segmentée (None si l'archive ne l'est pas)"""
+    if zipfile.is_zipfile(archive):
+        with zipfile.ZipFile(archive) as zipf:
+            infos = zipf.infolist()
+            if infos and infos[0].filename.endswith('/' + SEGMENT_INDEX_NAME):
+                return json.loads(zipf.read(infos[0]))
+        return None
+
+    # tar.gz : seul le premier membre gzip est décompressé, et seulement s'il contient l'index
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    data = bytearray()
+    info = None
+    try:
+        with open(archive, 'rb') as f:
+            while True:
+                if info is None and len(data) >= tarfile.BLOCKSIZE:
+                    info = tarfile.TarInfo.frombuf(bytes(data[:tarfile.BLOCKSIZE]), 'utf-8', 'surrogateescape')
+                    if not info.name.endswith('/' + SEGMENT_INDEX_NAME):
+                        return None
+                if info is not None and len(data) >= tarfile.BLOCKSIZE + info.size:
+                    return json.loads(bytes(data[tarfile.BLOCKSIZE:tarfile.BLOCKSIZE + info.size]))
+                chunk = f.read(64 * 1024)
+                if not chunk or decompressor.eof:
+                    return None
+                data += decompressor.decompress(chunk)
+    except (zlib.error, tarfile.HeaderError, ValueError):
+        return None
+
+
+def _segment_target(dest, name):
+    """Chemin d'extraction d'un membre, refusé s'il sort du dossier de destination"""
+    path = Path(name)
+    if not path.parts or path.is_absolute() or '..' in path.parts:
+        raise ValueError(f"Chemin refusé dans l'archive: {name}")
+    return dest / path
+
+
+def extract_segment(archive, kind, segment, dest):
+    """Extrait un segment (processus de travail) et le vérifie contre son empreinte dans l'index.
+
+    Retourne (fichiers, octets, liens) : les liens sont créés une fois tous les
+    segments extraits, leur cible pouvant appartenir à un autre segment.
+    """
+    dest = Path(dest)
+    files = size = 0
+    links = []
+    if kind == 'zip':
+        digests = []
+        with zipfile.ZipFile(archive) as zipf:
+            for info in zipf.infolist()[segment['first']:segment['first'] + segment['count']]:
+                target = _segment_target(dest, info.filename)
+                if info.is_dir():
+                    target.mkdir(parents=True, exist_ok=True)
+                    continue
+                target.parent.mkdir(parents=True, exist_ok=True)
+                digest = hashlib.sha256()
+                with zipf.open(info) as source, open(target, 'wb') as out:
+                    for chunk in iter(lambda: source.read(1024 * 1024), b''):
+                        digest.update(chunk)
+                        out.write(chunk)
+                digests.append(digest.hexdigest())
+                mode = (info.external_attr >> 16) & 0o7777
+                if mode:
+                    os.chmod(target, mode)
+                mtime = time.mktime(info.date_time + (0, 0, -1))
+                os.utime(target, (mtime, mtime))
+                files += 1
+                size += info.file_size
+        actual = hashlib.sha256('\n'.join(digests).encode('ascii')).hexdigest()
+    else:
+        with open(archive, 'rb') as f, \
+                gzip.GzipFile(fileobj=RangeReader(f, segment['offset'], segment['length'])) as stream:
+            reader = DigestReader(stream)
+            with tarfile.open(fileobj=reader, mode='r|') as tar:
+                for info in tar:
+                    target = _segment_target(dest, info.name)
+                    if info.isdir():
+                        target.mkdir(parents=True, exist_ok=True)
+                    elif info.islnk() or info.issym():
+                        links.append((info.name, info.linkname, info.issym()))
+                    elif info.isfile():
+                        target.parent.mkdir(parents=True, exist_ok=True)
+                        with tar.extractfile(info) as source, open(target, 'wb') as out:
+                            shutil.copyfileobj(source, out, 1024 * 1024)
+                        os.chmod(target, info.mode & 0o7777)
+                        os.utime(target, (info.mtime, info.mtime))
+                        files += 1
+                        size += info.size
+            # Bourrage de fin lu aussi : l'empreinte couvre tout le flux tar du segment
+            for _ in iter(lambda: reader.read(1024 * 1024), b''):
+                pass
+        actual = reader.digest.hexdigest()
+    if actual != segment['sha256']:
+        raise ValueError(f"Segment à l'offset {segment['offset']} corrompu (SHA-256 différent de l'index)")
+    return files, size, links
+
+
+def extract_segmented_archive(archive, dest, jobs=None):
+    """Extrait une archive segmentée (--segments) sur `jobs` processus, un segment par tâche.
+
+    Liens et doublons partagés (zip) sont recréés une fois tous les segments vérifiés.
+    """
+    index = read_segment_index(archive)
+    if index is None:
+        raise ValueError(f"{Path(archive).name} n'est pas segmentée (pas d'index {SEGMENT_INDEX_NAME} en tête)")
+    dest = Path(dest)
+    dest.mkdir(parents=True, exist_ok=True)
+    jobs = max(1, jobs or os.cpu_count() or 1)
+
+    # Plus gros segments d'abord : meilleur équilibrage entre processus
+    segments = sorted(index['segments'], key=lambda s: s['length'], reverse=True)
+    worker = functools.partial(extract_segment, str(archive), index['archive'], dest=str(dest))
+    if jobs > 1 and len(segments) > 1:
+        with ProcessPoolExecutor(min(jobs, len(segments))) as pool:
+            results = list(pool.map(worker, segments))
+    else:
+        results = [worker(segment) for segment in segments]
+
+    for name, linkname, symbolic in (link for _, _, links in results for link in links):
+        target = _segment_target(dest, name)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if target.is_symlink() or target.exists():
+            target.unlink()
+        if symbolic:
+            os.symlink(linkname, target)
+            continue
+        source = _segment_target(dest, linkname)
+        try:
+            os.link(source, target)
+        except OSError:
+            shutil.copy2(source, target)
+
+    # Zip à doublons partagés : copies recréées depuis leur source
+    root = dest / index['root']
+    duplicates_path = root / '.pageforge-duplicates.json'
+    if index['archive'] == 'zip' and duplicates_path.exists():
+        for dup, src in json.loads(duplicates_path.read_text(encoding='utf-8'))['files'].items():
+            target = _segment_target(root, dup)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(_segment_target(root, src), target)
+
+    return {
+        'segments': len(segments),
+        'jobs': jobs,
+        'files': sum(r[0] for r in results),
+        'bytes': sum(r[1] for r in results),
+    }
+
+
+STREAM_STAGING_DIR = '/dev/shm'  # tmpfs : l'assemblage d'un flux n'écrit rien sur le disque local
+
+
+class StreamSink:
+    """Sortie non adressable d'une archive : stdout (-), descripteur (fd:N) ou socket (tcp:hôte:port).
+
+    Les octets sont comptés et hachés au passage pour le récepteur.
+    """
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.socket = None
+        self.bytes = 0
+        self.digest = hashlib.sha256()
+        self.closed = False
+        if spec == '-':
+            # sys.stdout peut avoir été redirigé vers stderr pour les messages
+            self.fp = sys.__stdout__.buffer
+        elif spec.startswith('fd:'):
+            self.fp = os.fdopen(int(spec[3:]), 'wb', closefd=False)
+        elif spec.startswith('tcp:'):
+            host, port = spec[4:].rsplit(':', 1)
+            self.socket = socket.create_connection((host, int(port)))
+            self.fp = self.socket.makefile('wb')
+        else:
+            raise ValueError(f"Sortie de flux inconnue: {spec} (attendu -, fd:N ou tcp:hôte:port)")
+
+    def write(self, data):
+        self.fp.write(data)
+        self.bytes += len(data)
+        self.digest.update(data)
+        return len(data)
+
+    def flush(self):
+        self.fp.flush()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.fp.flush()
+        if self.socket:
+            # Fin de flux signalée au récepteur
+            self.fp.close()
+            self.socket.shutdown(socket.SHUT_WR)
+            self.socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ProgressMeter:
+    """Progression d'une longue écriture : pourcentage, débit et temps restant"""
+
+    def __init__(self, label, total, interval=1.0):
+        self.label = label
+        self.total = total
+        self.interval = interval
+        self.done = 0
+        self.start = time.perf_counter()
+        self._last = self.start
+        self._lock = threading.Lock()
+
+    def update(self, nbytes):
+        with self._lock:
+            self.done += nbytes
+            now = time.perf_counter()
+            if now - self._last >= self.interval:
+                self._last = now
+                self._print(now)
+
+    def _print(self, now, end=''):
+        elapsed = max(now - self.start, 1e-9)
+        rate = self.done / elapsed
+        share = self.done / self.total if self.total else 1.0
+        eta = (self.total - self.done) / rate if rate else 0
+        print(f"\r  ⏳ {self.label}: {share:6.1%}  {PageForgePackageGenerator.format_size(self.done)} / "
+              f"{PageForgePackageGenerator.format_size(self.total)}  "
+              f"{PageForgePackageGenerator.format_size(rate)}/s  ETA {eta:4.0f}s ", end=end, flush=True)
+
+    def close(self):
+        self._print(time.perf_counter(), end='\n')
+
+
+class TraceRecorder:
+    """Spans d'un build au format Trace Event (ui.perfetto.dev, chrome://tracing).
+
+    Un span coûte deux lectures d'horloge et un append : assez léger pour rester
+    actif sur tous les builds de CI.
+    """
 
-class PageForgePackageGenerator:
     def __init__(self):
+        self.start = time.perf_counter_ns()
+        self.pid = os.getpid()
+        self.events = []
+        self.threads = {}
+
+    @contextlib.contextmanager
+    def span(self, name, cat, **args):
+        """Mesure un bloc ; le dict renvoyé reçoit les compteurs (octets…) connus en fin de span"""
+        begin = time.perf_counter_ns()
+        try:
+            yield args
+        finally:
+            self.add(name, cat, begin, **args)
+
+    def add(self, name, cat, begin, **args):
+        """Enregistre un span commencé à `begin` (perf_counter_ns) et terminé maintenant"""
+        tid = threading.get_native_id()
+        if tid not in self.threads:
+            self.threads[tid] = threading.current_thread().name
+        self.events.append((name, cat, tid, begin, time.perf_counter_ns() - begin, args))
+
+    def write(self, path):
+        events = [{'name': 'process_name', 'ph': 'M', 'pid': self.pid, 'tid': 0,
+                   'args': {'name': 'create-packages.py'}}]
+        events += [{'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': tid, 'args': {'name': name}}
+                   for tid, name in self.threads.items()]
+        events += [{'name': name, 'cat': cat, 'ph': 'X', 'pid': self.pid, 'tid': tid,
+                    'ts': (begin - self.start) / 1000, 'dur': duration / 1000, 'args': args}
+                   for name, cat, tid, begin, duration, args in self.events]
+        atomic_write(path, json.dumps({'traceEvents': events, 'displayTimeUnit': 'ms'}).encode('utf-8'))
+        return len(self.events)
+
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+# Chunks conservés : indispensables au décodage ou au rendu des couleurs
+PNG_KEPT_CHUNKS = {b'IHDR', b'PLTE', b'tRNS', b'gAMA', b'cHRM', b'sRGB', b'iCCP', b'sBIT', b'IEND'}
+
+
+def optimize_png(data):
+    """Optimisation PNG sans perte : IDAT re-compressé au maximum, métadonnées retirées.
+
+    Les pixels (données filtrées) sont inchangés ; seuls le flux zlib et les
+    chunks annexes (texte, date, EXIF, pHYs…) changent. Retourne les nouvelles
+    données, ou None si le fichier n'est pas un PNG simple ou ne diminue pas.
+    """
+    if not data.startswith(PNG_SIGNATURE):
+        return None
+    
+    chunks = []
+    idat = []
+    pos = len(PNG_SIGNATURE)
+    try:
+        while pos < len(data):
+            length, kind = struct.unpack('>I4s', data[pos:pos + 8])
+            body = data[pos + 8:pos + 8 + length]
+            if len(body) != length or zlib.crc32(kind + body) != struct.unpack('>I', data[pos + 8 + length:pos + 12 + length])[0]:
+                return None
+            pos += 12 + length
+            if kind == b'acTL':
+                return None  # APNG : laissé tel quel
+            if kind == b'IDAT':
+                if idat and chunks[-1] != b'IDAT':
+                    return None  # IDAT non contigus : invalide
+                if not idat:
+                    chunks.append(b'IDAT')
+                idat.append(body)
+            elif kind in PNG_KEPT_CHUNKS:
+                chunks.append((kind, body))
+            if kind == b'IEND':
+                break
+        raw = zlib.decompress(b''.join(idat))
+    except (struct.error, zlib.error):
+        return None
+    
+    best = None
+    for strategy in (zlib.Z_DEFAULT_STRATEGY, zlib.Z_FILTERED):
+        compressor = zlib.compressobj(9, zlib.DEFLATED, 15, 9, strategy)
+        candidate = compressor.compress(raw) + compressor.flush()
+        if best is None or len(candidate) < len(best):
+            best = candidate
+    
+    def chunk(kind, body):
+        return struct.pack('>I', len(body)) + kind + body + struct.pack('>I', zlib.crc32(kind + body))
+    
+    out = [PNG_SIGNATURE]
+    for entry in chunks:
+        out.append(chunk(b'IDAT', best) if entry == b'IDAT' else chunk(*entry))
+    optimized = b''.join(out)
+    return optimized if len(optimized) < len(data) else None
+
+
+def atomic_write(path, data):
+    """Écrit un fichier via un temporaire dans le même dossier puis renommage atomique"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f'.{path.name}.{os.getpid()}-{uuid.uuid4().hex}.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+# Table "gear" pour le découpage par contenu (déterministe d'une exécution à l'autre)
+_gear_rng = random.Random(0x50414745)
+CDC_GEAR = [_gear_rng.getrandbits(64) for _ in range(256)]
+# Un bit par octet (bit de poids fort de sa valeur gear) : b'0' ou b'1', via bytes.translate
+CDC_MARKS = bytes.maketrans(bytes(range(256)), bytes(0x31 if g >> 63 else 0x30 for g in CDC_GEAR))
+CDC_ANCHOR = b'101100'
+CDC_WINDOW = 48
+
+
+def iter_content_chunks(data, min_size=2048, avg_size=8192, max_size=65536):
+    """Découpe des données en blocs définis par le contenu (style FastCDC).
+
+    Les frontières dépendent des octets voisins et non de la position : une
+    insertion ne décale que les blocs qui la touchent. Aucune boucle Python par
+    octet : les candidats (fin d'un motif de 6 bits dans la suite des bits
+    gear, environ un octet sur 64) sont cherchés en C par translate + find, et
+    un candidat sur `avg_size / 64` est retenu selon le CRC-32 des 48 octets
+    qui le précèdent.
+    """
+    mask = max(avg_size // 64, 1) - 1
+    data = bytes(data)
+    marks = data.translate(CDC_MARKS)
+    width = len(CDC_ANCHOR)
+    view = memoryview(data)
+    length = len(data)
+    start = 0
+    
+    while start < length:
+        end = min(start + max_size, length)
+        if start + min_size >= end:
+            yield view[start:end]
+            start = end
+            continue
+        
+        cut = end
+        i = marks.find(CDC_ANCHOR, start + min_size - width, end)
+        while i >= 0:
+            if not zlib.crc32(view[i + width - CDC_WINDOW:i + width]) & mask:
+                cut = i + width
+                break
+            i = marks.find(CDC_ANCHOR, i + 1, end)
+        
+        yield view[start:cut]
+        start = cut
+
+
+class ChunkStore:
+    """Stockage dédupliqué de l'historique des packages publiés.
+
+    Chaque package est décrit par une "recette" JSON (gzip) : une suite de segments
+    qui, concaténés, redonnent exactement le fichier d'origine. Les entêtes
+    d'archive (qui contiennent le nom et la version du package) sont gardés
+    en ligne dans la recette ; le contenu des fichiers est découpé en blocs
+    définis par le contenu, chaque bloc unique étant stocké une seule fois
+    (compressé zlib) sous son SHA-256. Les membres deflate des ZIP et le flux
+    des `.tar.gz` sont stockés décompressés puis recompressés à la lecture,
+    uniquement si la recompression reproduit les octets exacts (vidages complets
+    de --gzip-checkpoints compris, rejoués aux mêmes positions).
+
+    Le fichier `.lock` est pris en partage par put et get, en exclusif par
+    remove et gc : un gc n'efface jamais les blocs d'un put encore en cours.
+    """
+
+    INLINE_MAX = 4096
+    LEVELS = (6, 9, 1, 2, 3, 4, 5, 7, 8)
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.chunks_dir = self.root / 'chunks'
+        self.recipes_dir = self.root / 'recipes'
+        self.chunks_dir.mkdir(parents=True, exist_ok=True)
+        self.recipes_dir.mkdir(parents=True, exist_ok=True)
+
+    @contextlib.contextmanager
+    def _locked(self, exclusive=False):
+        if fcntl is None:
+            # Sans flock (Windows) : verrou exclusif par création atomique d'un dossier
+            lock_dir = self.root / '.lock.d'
+            while True:
+                try:
+                    lock_dir.mkdir()
+                    break
+                except FileExistsError:
+                    time.sleep(0.05)
+            try:
+                yield
+            finally:
+                lock_dir.rmdir()
+            return
+        with open(self.root / '.lock', 'a+b') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _chunk_path(self, digest):
+        return self.chunks_dir / digest[:2] / digest
+
+    def _recipe_path(self, name):
+        return self.recipes_dir / f'{name}.json.gz'
+
+    @staticmethod
+    def _read_recipe(recipe_path):
+        return json.loads(gzip.decompress(recipe_path.read_bytes()))
+
+    @staticmethod
+    def _deflate(content, level, flushes=()):
+        """Flux deflate brut, avec un vidage complet à chaque position de `flushes`"""
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+        out = []
+        start = 0
+        for position in flushes:
+            out.append(compressor.compress(content[start:position]))
+            out.append(compressor.flush(zlib.Z_FULL_FLUSH))
+            start = position
+        out.append(compressor.compress(content[start:]))
+        out.append(compressor.flush())
+        return b''.join(out)
+
+    def _find_level(self, content, deflated, hint, flushes=()):
+        """Niveau zlib qui reproduit exactement `deflated`, ou None"""
+        for level in (hint,) + tuple(l for l in self.LEVELS if l != hint):
+            if self._deflate(content, level, flushes) == deflated:
+                return level
+        return None
+
+    def _split_gzip(self, raw):
+        """Retourne (entête, contenu, niveau, vidages) si le gzip est recompressible à l'identique"""
+        if raw[:3] != b'\x1f\x8b\x08':
+            return None
+        
+        flags = raw[3]
+        pos = 10
+        if flags & 0x04:
+            pos += 2 + struct.unpack('<H', raw[pos:pos + 2])[0]
+        for flag in (0x08, 0x10):
+            if flags & flag:
+                pos = raw.index(b'\x00', pos) + 1
+        if flags & 0x02:
+            pos += 2
+        
+        decompressor = zlib.decompressobj(-15)
+        content = decompressor.decompress(raw[pos:])
+        if not decompressor.eof or len(decompressor.unused_data) != 8:
+            return None
+        
+        deflated = raw[pos:len(raw) - 8]
+        level = self._find_level(content, deflated, 9)
+        flushes = []
+        if level is None and GZIP_FLUSH_MARKER in deflated:
+            # Points de reprise (--gzip-checkpoints) : positions relevées puis rejouées à la recompression
+            reader = GzipCheckpointReader(raw, record=True, spacing=0)
+            while reader.read(64 * 1024 * 1024):
+                pass
+            flushes = [checkpoint[1] for checkpoint in reader.checkpoints if checkpoint[2] == 'flush']
+            level = self._find_level(content, deflated, 9, flushes) if flushes else None
+        if level is None:
+            return None
+        return raw[:pos], content, level, flushes
+
+    def _segments_zip(self, raw):
+        try:
+            infos = zipfile.ZipFile(io.BytesIO(raw)).infolist()
+        except zipfile.BadZipFile:
+            return None
+        
+        segments = []
+        pos = 0
+        level = 6
+        for info in sorted(infos, key=lambda i: i.header_offset):
+            if info.header_offset < pos:
+                return None
+            name_len, extra_len = struct.unpack('<2H', raw[info.header_offset + 26:info.header_offset + 30])
+            data_start = info.header_offset + 30 + name_len + extra_len
+            data_end = data_start + info.compress_size
+            segments.append(('header', raw[pos:data_start]))
+            
+            payload = raw[data_start:data_end]
+            found = None
+            if info.compress_type == zipfile.ZIP_DEFLATED:
+                content = zlib.decompress(payload, -15)
+                found = self._find_level(content, payload, level)
+            if found is None:
+                segments.append(('data', payload))
+            else:
+                segments.append(('deflate', content, found))
+                level = found
+            pos = data_end
+        
+        segments.append(('header', raw[pos:]))
+        return segments
+
+    def _segments_tar(self, content):
+        try:
+            members = tarfile.open(fileobj=io.BytesIO(content), mode='r:').getmembers()
+        except tarfile.TarError:
+            return None
+        
+        segments = []
+        pos = 0
+        for member in members:
+            if member.isfile() and member.size:
+                segments.append(('header', content[pos:member.offset_data]))
+                segments.append(('data', content[member.offset_data:member.offset_data + member.size]))
+                pos = member.offset_data + member.size
+        segments.append(('header', content[pos:]))
+        return segments
+
+    def _store_chunks(self, data, stats):
+        digests = []
+        for chunk in iter_content_chunks(data):
+            digest = hashlib.sha256(chunk).hexdigest()
+            chunk_path = self._chunk_path(digest)
+            if not chunk_path.exists():
+                compressed = zlib.compress(chunk, 9)
+                atomic_write(chunk_path, compressed)
+                stats['new_bytes'] += len(compressed)
+                stats['new_chunks'] += 1
+            stats['chunks'] += 1
+            digests.append(digest)
+        return digests
+
+    def _encode_segments(self, segments, stats):
+        encoded = []
+        for segment in segments:
+            if segment[0] == 'deflate':
+                encoded.append(['z', segment[2], self._store_chunks(segment[1], stats)])
+            elif segment[0] == 'header' and len(segment[1]) <= self.INLINE_MAX:
+                # Entêtes d'archive : petits et propres à chaque package, gardés en ligne
+                if segment[1]:
+                    encoded.append(['i', segment[1].hex()])
+            else:
+                encoded.append(['d', self._store_chunks(segment[1], stats)])
+        return encoded
+
+    def _decode_segments(self, encoded):
+        parts = []
+        for segment in encoded:
+            if segment[0] == 'i':
+                parts.append(bytes.fromhex(segment[1]))
+                continue
+            
+            data = b''.join(zlib.decompress(self._chunk_path(d).read_bytes()) for d in segment[-1])
+            if segment[0] == 'z':
+                compressor = zlib.compressobj(segment[1], zlib.DEFLATED, -15)
+                data = compressor.compress(data) + compressor.flush()
+            parts.append(data)
+        return b''.join(parts)
+
+    def put(self, archive_path, replace=False, data=None):
+        """Ajoute un package (contenu lu sur disque ou fourni par `data`) ; retourne les statistiques de déduplication"""
+        archive_path = Path(archive_path)
+        raw = archive_path.read_bytes() if data is None else data
+        with self._locked():
+            return self._put(archive_path.name, raw, replace)
+
+    def _put(self, name, raw, replace):
+        sha256 = hashlib.sha256(raw).hexdigest()
+        stats = {'name': name, 'size': len(raw), 'chunks': 0, 'new_chunks': 0, 'new_bytes': 0}
+        
+        recipe_path = self._recipe_path(name)
+        if recipe_path.exists():
+            existing = self._read_recipe(recipe_path)
+            if existing['sha256'] == sha256:
+                return stats
+            if not replace:
+                raise ValueError(f"{name} existe déjà dans le store avec un contenu différent")
+        
+        recipe = {'name': name, 'sha256': sha256, 'size': len(raw), 'created': datetime.now().isoformat()}
+        segments = None
+        split = self._split_gzip(raw) if name.endswith('.gz') else None
+        if split:
+            header, content, level, flushes = split
+            recipe['gzip'] = {'header': header.hex(), 'level': level}
+            if flushes:
+                recipe['gzip']['flushes'] = flushes
+            segments = self._segments_tar(content) or [('data', content)]
+        elif name.endswith('.zip'):
+            segments = self._segments_zip(raw)
+        
+        recipe['segments'] = self._encode_segments(segments or [('data', raw)], stats)
+        atomic_write(recipe_path, gzip.compress(json.dumps(recipe).encode('utf-8'), mtime=0))
+        return stats
+
+    def get(self, name, output_path):
+        """Reconstruit un package à l'identique et vérifie son empreinte"""
+        with self._locked():
+            recipe = self._read_recipe(self._recipe_path(name))
+            content = self._decode_segments(recipe['segments'])
+        
+        if 'gzip' in recipe:
+            content = b''.join([
+                bytes.fromhex(recipe['gzip']['header']),
+                self._deflate(content, recipe['gzip']['level'], recipe['gzip'].get('flushes', ())),
+                struct.pack('<2L', zlib.crc32(content), len(content) & 0xFFFFFFFF),
+            ])
+        
+        if hashlib.sha256(content).hexdigest() != recipe['sha256']:
+            raise ValueError(f"Reconstruction de {name} corrompue (SHA-256 différent)")
+        
+        atomic_write(output_path, content)
+        return recipe['size']
+
+    def recipes(self):
+        for recipe_path in sorted(self.recipes_dir.glob('*.json.gz')):
+            yield self._read_recipe(recipe_path)
+
+    def remove(self, name):
+        with self._locked(exclusive=True):
+            self._recipe_path(name).unlink()
+
+    def gc(self):
+        """Supprime les blocs qui ne sont plus référencés par aucune recette"""
+        with self._locked(exclusive=True):
+            referenced = set()
+            for recipe in self.recipes():
+                for segment in recipe['segments']:
+                    if segment[0] != 'i':
+                        referenced.update(segment[-1])
+            
+            removed = 0
+            freed = 0
+            for chunk_path in self.chunks_dir.glob('*/*'):
+                if chunk_path.name not in referenced and not chunk_path.name.endswith('.tmp'):
+                    freed += chunk_path.stat().st_size
+                    chunk_path.unlink()
+                    removed += 1
+        return removed, freed
+
+    def stats(self):
+        """Retourne (octets logiques de tous les packages, octets réellement stockés)"""
+        logical = sum(recipe['size'] for recipe in self.recipes())
+        stored = sum(path.stat().st_size for path in self.chunks_dir.glob('*/*'))
+        stored += sum(path.stat().st_size for path in self.recipes_dir.glob('*.json.gz'))
+        return logical, stored
+
+
+class VolumeSplitter:
+    """Flux d'écriture qui découpe une archive en volumes de taille fixe.
+
+    Les octets sont écrits directement dans des volumes `<archive>.001`,
+    `.002`… (et dans `inner` si fourni) : l'archive complète n'existe pas
+    sur disque, VolumeReader la relit depuis les volumes. `on_volume` est
+    appelé dès qu'un volume est complet, ce qui permet de le publier pendant
+    que la compression du suivant continue. Un index JSON décrit les volumes.
+    """
+
+    def __init__(self, archive_path, volume_size, inner=None, on_volume=None):
+        self.archive_path = Path(archive_path)
+        self.volume_size = volume_size
+        self.inner = inner
+        self.on_volume = on_volume
+        self.volumes = []
+        self.total_digest = hashlib.sha256()
+        self.total_size = 0
+        self._current = None
+
+    def _open_volume(self):
+        path = self.archive_path.with_name(f'{self.archive_path.name}.{len(self.volumes) + 1:03d}')
+        self._current = {'path': path, 'file': open(path, 'wb'), 'size': 0, 'digest': hashlib.sha256()}
+
+    def _close_volume(self):
+        current = self._current
+        current['file'].close()
+        volume = {'name': current['path'].name, 'size': current['size'], 'sha256': current['digest'].hexdigest()}
+        self.volumes.append(volume)
+        self._current = None
+        if self.on_volume:
+            self.on_volume(current['path'])
+
+    def write(self, data):
+        if self.inner is not None:
+            self.inner.write(data)
+        self.total_digest.update(data)
+        self.total_size += len(data)
+        
+        view = memoryview(data)
+        while view:
+            if self._current is None:
+                self._open_volume()
+            room = self.volume_size - self._current['size']
+            part = view[:room]
+            self._current['file'].write(part)
+            self._current['digest'].update(part)
+            self._current['size'] += len(part)
+            view = view[len(part):]
+            if self._current['size'] == self.volume_size:
+                self._close_volume()
+        return len(data)
+
+    def close(self):
+        if self._current is not None:
+            self._close_volume()
+        if self.inner is not None:
+            self.inner.close()
+        
+        index = {
+            'archive': self.archive_path.name,
+            'size': self.total_size,
+            'sha256': self.total_digest.hexdigest(),
+            'volume_size': self.volume_size,
+            'volumes': self.volumes,
+            'reassemble': f'cat {self.archive_path.name}.[0-9]* > {self.archive_path.name}',
+        }
+        index_path = self.archive_path.with_name(f'{self.archive_path.name}.volumes.json')
+        index_path.write_text(json.dumps(index, indent=2), encoding='utf-8')
+        return index_path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class VolumeReader(io.RawIOBase):
+    """Lecture seule, avec accès direct, d'une archive découpée par VolumeSplitter.
+
+    Les volumes listés dans l'index sont lus à la suite comme un seul fichier
+    (utilisable par zipfile, gzip et tarfile) ; leur taille est contrôlée à
+    l'ouverture.
+    """
+
+    def __init__(self, index_path):
+        index_path = Path(index_path)
+        index = json.loads(index_path.read_text(encoding='utf-8'))
+        self.name = index['archive']
+        self.size = index['size']
+        self.sha256 = index['sha256']
+        self._paths = [index_path.with_name(volume['name']) for volume in index['volumes']]
+        self._starts = []
+        offset = 0
+        for path, volume in zip(self._paths, index['volumes']):
+            if path.stat().st_size != volume['size']:
+                raise ValueError(f"Volume tronqué ou modifié: {path.name}")
+            self._starts.append(offset)
+            offset += volume['size']
+        if offset != self.size:
+            raise ValueError(f"Volumes incomplets pour {self.name}")
+        self._files = {}
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._pos >= self.size:
+            return 0
+        number = bisect.bisect_right(self._starts, self._pos) - 1
+        if number not in self._files:
+            self._files[number] = open(self._paths[number], 'rb')
+        f = self._files[number]
+        f.seek(self._pos - self._starts[number])
+        n = f.readinto(memoryview(buffer)[:max(0, min(len(buffer), self.size - self._pos))])
+        self._pos += n
+        return n
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            offset += self._pos
+        elif whence == os.SEEK_END:
+            offset += self.size
+        self._pos = max(0, offset)
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+    def close(self):
+        if not self.closed:
+            for f in self._files.values():
+                f.close()
+            self._files = {}
+        super().close()
+
+
+class ResourceGovernor:
+    """Limite les ressources d'un build lancé sur un serveur en production.
+
+    Débits de lecture/écriture plafonnés (seau à jetons), nombre de workers et
+    taille des tampons bornés, priorité CPU abaissée. Quand la charge système
+    par CPU dépasse `load_threshold`, les débits sont divisés par deux
+    (jusqu'à 1/16) puis rétablis progressivement quand elle redescend. Sans
+    débit plafonné, ce facteur s'applique au temps de travail de chaque thread.
+    """
+
+    def __init__(self, read_rate=None, write_rate=None, max_workers=2, nice=10,
+                 buffer_size=1024 * 1024, load_threshold=1.0, load_interval=1.0):
+        self.rates = {'read': read_rate, 'write': write_rate}
+        self.max_workers = max(1, max_workers)
+        self.nice = nice
+        self.buffer_size = buffer_size
+        self.load_threshold = load_threshold
+        self.load_interval = load_interval
+        self.factor = 1.0
+        self.min_factor = 1.0
+        self.backoffs = 0
+        self.bytes = {'read': 0, 'write': 0}
+        self.throttled_seconds = {'read': 0.0, 'write': 0.0}
+        self.max_load = 0.0
+        self._next = {'read': 0.0, 'write': 0.0}
+        self._last_load_check = 0.0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def start(self):
+        if self.nice and hasattr(os, 'nice'):
+            os.nice(self.nice)
+
+    def _check_load(self, now):
+        if now - self._last_load_check < self.load_interval or not hasattr(os, 'getloadavg'):
+            return
+        self._last_load_check = now
+        load = os.getloadavg()[0] / (os.cpu_count() or 1)
+        self.max_load = max(self.max_load, load)
+        if load > self.load_threshold and self.factor > 1 / 16:
+            self.factor /= 2
+            self.backoffs += 1
+            self.min_factor = min(self.min_factor, self.factor)
+        elif load < self.load_threshold * 0.8 and self.factor < 1.0:
+            self.factor = min(1.0, self.factor * 2)
+
+    def throttle(self, kind, nbytes):
+        """Comptabilise un transfert et attend le temps nécessaire au respect du débit.
+
+        Sans débit plafonné, un thread qui a travaillé `t` secondes depuis son dernier
+        passage attend t × (1/facteur − 1), au plus une seconde : sa part de temps actif
+        suit le facteur de charge.
+        """
+        local = self._local
+        with self._lock:
+            now = time.monotonic()
+            self._check_load(now)
+            self.bytes[kind] += nbytes
+            rate = self.rates[kind]
+            if rate:
+                # Une rafale d'un tampon est tolérée avant de temporiser
+                start = max(now - self.buffer_size / rate, self._next[kind])
+                self._next[kind] = start + nbytes / (rate * self.factor)
+                delay = self._next[kind] - now
+            else:
+                busy = now - getattr(local, 'last', now)
+                delay = min(busy * (1 / self.factor - 1), 1.0)
+            if delay > 0:
+                self.throttled_seconds[kind] += delay
+        if delay > 0:
+            time.sleep(delay)
+        local.last = time.monotonic()
+
+    def read_file(self, path):
+        """Lit un fichier par tampons, au débit autorisé"""
+        chunks = []
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(self.buffer_size), b''):
+                self.throttle('read', len(chunk))
+                chunks.append(chunk)
+        return b''.join(chunks)
+
+    def copy_file(self, src, dst):
+        """Fonction de copie pour shutil.copytree (mémoire bornée à un tampon)"""
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            for chunk in iter(lambda: fsrc.read(self.buffer_size), b''):
+                self.throttle('read', len(chunk))
+                self.throttle('write', len(chunk))
+                fdst.write(chunk)
+        shutil.copystat(src, dst)
+        return dst
+
+    def deflate_file(self, path, level, on_read=None, store=False):
+        """Compression en flux au débit de lecture autorisé (voir deflate_file)"""
+        def throttled(nbytes):
+            self.throttle('read', nbytes)
+            if on_read:
+                on_read(nbytes)
+        return deflate_file(path, level, self.buffer_size, throttled, store)
+
+    def stats(self):
+        return {
+            'caps': {
+                'read_bytes_per_second': self.rates['read'],
+                'write_bytes_per_second': self.rates['write'],
+                'max_workers': self.max_workers,
+                'nice': self.nice,
+                'buffer_bytes': self.buffer_size,
+                'load_threshold': self.load_threshold,
+            },
+            'bytes': dict(self.bytes),
+            'throttled_seconds': {k: round(v, 3) for k, v in self.throttled_seconds.items()},
+            'load_backoffs': self.backoffs,
+            'min_rate_factor': self.min_factor,
+            'max_load_per_cpu': round(self.max_load, 2),
+        }
+
+
+class ThrottledReader:
+    """Enveloppe un flux de lecture pour le soumettre au ResourceGovernor"""
+
+    def __init__(self, inner, governor):
+        self.inner = inner
+        self.governor = governor
+
+    def read(self, size=-1):
+        data = self.inner.read(size)
+        self.governor.throttle('read', len(data))
+        return data
+
+
+class ThrottledWriter:
+    """Enveloppe un flux d'écriture pour le soumettre au ResourceGovernor"""
+
+    def __init__(self, inner, governor):
+        self.inner = inner
+        self.governor = governor
+
+    def write(self, data):
+        view = memoryview(data)
+        step = self.governor.buffer_size
+        for offset in range(0, len(view), step):
+            part = view[offset:offset + step]
+            self.governor.throttle('write', len(part))
+            self.inner.write(part)
+        return len(data)
+
+    def flush(self):
+        if hasattr(self.inner, 'flush'):
+            self.inner.flush()
+
+    def close(self):
+        return self.inner.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def sigv4_authorization(method, path, query, headers, payload_hash, access_key, secret_key, region):
+    """En-tête Authorization AWS SigV4 (service s3) ; tous les en-têtes fournis sont signés.
+
+    `headers` doit contenir x-amz-date ; `path` est le chemin non encodé.
+    """
+    amz_date = headers['x-amz-date']
+    date = amz_date[:8]
+    signed = sorted(k.lower() for k in headers)
+    values = {k.lower(): str(v).strip() for k, v in headers.items()}
+    canonical_headers = ''.join(f"{k}:{values[k]}\n" for k in signed)
+    canonical_query = '&'.join(
+        f"{urllib.parse.quote(k, safe='-_.~')}={urllib.parse.quote(str(v), safe='-_.~')}"
+        for k, v in sorted(query.items())
+    )
+    canonical_request = '\n'.join([
+        method, urllib.parse.quote(path, safe='/-_.~'), canonical_query,
+        canonical_headers, ';'.join(signed), payload_hash,
+    ])
+    scope = f'{date}/{region}/s3/aws4_request'
+    string_to_sign = '\n'.join([
+        'AWS4-HMAC-SHA256', amz_date, scope, hashlib.sha256(canonical_request.encode()).hexdigest(),
+    ])
+    key = f'AWS4{secret_key}'.encode()
+    for part in (date, region, 's3', 'aws4_request'):
+        key = hmac.new(key, part.encode(), hashlib.sha256).digest()
+    signature = hmac.new(key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+    return (
+        f"AWS4-HMAC-SHA256 Credential={access_key}/{scope}, "
+        f"SignedHeaders={';'.join(signed)}, Signature={signature}"
+    )
+
+
+class S3Publisher:
+    """Publie des fichiers sur un endpoint compatible S3 (multipart parallèle, reprise).
+
+    Les fichiers plus grands que `part_size` sont envoyés en multipart ; les
+    parts sont envoyées en parallèle. L'état (UploadId) est conservé dans
+    `state_path` : une publication interrompue reprend avec ListParts et ne
+    renvoie que les parts manquantes. Un objet déjà présent avec le même
+    SHA-256 (métadonnée x-amz-meta-sha256) n'est pas renvoyé.
+    """
+
+    def __init__(self, endpoint, bucket, prefix='', part_size=8 * 1024 ** 2, concurrency=4, state_path=None):
+        parsed = urllib.parse.urlsplit(endpoint)
+        self.scheme = parsed.scheme or 'http'
+        self.netloc = parsed.netloc
+        self.bucket = bucket
+        self.prefix = prefix
+        self.part_size = part_size
+        self.state_path = Path(state_path) if state_path else None
+        self.access_key = os.environ.get('AWS_ACCESS_KEY_ID')
+        self.secret_key = os.environ.get('AWS_SECRET_ACCESS_KEY')
+        self.region = os.environ.get('AWS_REGION', 'us-east-1')
+        self._state_lock = threading.Lock()
+        self._state = {}
+        if self.state_path and self.state_path.exists():
+            self._state = json.loads(self.state_path.read_text(encoding='utf-8'))
+        self._file_pool = ThreadPoolExecutor(max_workers=2)
+        self._part_pool = ThreadPoolExecutor(max_workers=concurrency)
+        self._futures = []
+        self.uploaded_bytes = 0
+        self.skipped = 0
+        self.trace = None
+
+    # --- HTTP et signature AWS SigV4 -------------------------------------
+
+    def _sign(self, method, path, query, headers, payload_hash):
+        amz_date = time.strftime('%Y%m%dT%H%M%SZ', time.gmtime())
+        headers['x-amz-date'] = amz_date
+        headers['x-amz-content-sha256'] = payload_hash
+        if not self.access_key:
+            return
+        headers['Authorization'] = sigv4_authorization(method, path, query, headers, payload_hash,
+                                                       self.access_key, self.secret_key, self.region)
+
+    def _request(self, method, key, query=None, body=b'', headers=None, retries=3):
+        query = query or {}
+        path = f'/{self.bucket}/{key}'
+        headers = dict(headers or {}, host=self.netloc)
+        self._sign(method, path, query, headers, hashlib.sha256(body).hexdigest())
+        url = urllib.parse.quote(path, safe='/-_.~')
+        if query:
+            url += '?' + urllib.parse.urlencode(query)
+        
+        connection_class = http.client.HTTPSConnection if self.scheme == 'https' else http.client.HTTPConnection
+        for attempt in range(retries):
+            connection = connection_class(self.netloc, timeout=60)
+            try:
+                connection.request(method, url, body=body, headers=headers)
+                response = connection.getresponse()
+                data = response.read()
+                if response.status >= 500 and attempt < retries - 1:
+                    time.sleep(0.5 * (attempt + 1))
+                    continue
+                return response.status, dict(response.getheaders()), data
+            except (OSError, http.client.HTTPException):
+                if attempt == retries - 1:
+                    raise
+                time.sleep(0.5 * (attempt + 1))
+            finally:
+                connection.close()
+
+    def _check(self, status, data, action):
+        if status >= 300:
+            raise RuntimeError(f"S3 {action} a échoué ({status}): {data[:200]!r}")
+
+    # --- Publication ------------------------------------------------------
+
+    def _save_state(self):
+        if self.state_path:
+            with self._state_lock:
+                atomic_write(self.state_path, json.dumps(self._state, indent=2).encode('utf-8'))
+
+    def _remote_sha256(self, key):
+        status, headers, _ = self._request('HEAD', key)
+        if status != 200:
+            return None
+        headers = {k.lower(): v for k, v in headers.items()}
+        return headers.get('x-amz-meta-sha256')
+
+    def _upload_part(self, key, upload_id, number, path, offset, size):
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            body = f.read(size)
+        with self.trace.span(f'part {number}', 'upload', key=key, bytes=size) if self.trace else contextlib.nullcontext():
+            status, headers, data = self._request('PUT', key, {'partNumber': number, 'uploadId': upload_id}, body)
+        self._check(status, data, f'UploadPart {key}#{number}')
+        with self._state_lock:
+            self.uploaded_bytes += size
+        return number, {k.lower(): v for k, v in headers.items()}['etag']
+
+    def _existing_parts(self, key, upload_id):
+        status, _, data = self._request('GET', key, {'uploadId': upload_id})
+        if status != 200:
+            return None
+        parts = {}
+        # iter() ignore le joker d'espace de noms : chemin ElementPath (avec ou sans xmlns S3)
+        for part in ElementTree.fromstring(data).iterfind('.//{*}Part'):
+            parts[int(part.findtext('{*}PartNumber'))] = part.findtext('{*}ETag')
+        return parts
+
+    def upload_file(self, path):
+        path = Path(path)
+        key = self.prefix + path.name
+        sha256 = file_sha256(path)
+        size = path.stat().st_size
+        
+        if self._remote_sha256(key) == sha256:
+            with self._state_lock:
+                self.skipped += 1
+            return key
+        
+        meta = {'x-amz-meta-sha256': sha256}
+        if size <= self.part_size:
+            status, _, data = self._request('PUT', key, body=path.read_bytes(), headers=meta)
+            self._check(status, data, f'PutObject {key}')
+            with self._state_lock:
+                self.uploaded_bytes += size
+            return key
+        
+        # Reprise d'un multipart interrompu si l'état local correspond au même contenu
+        existing = {}
+        state = self._state.get(key)
+        upload_id = None
+        if state and state['sha256'] == sha256:
+            existing = self._existing_parts(key, state['upload_id'])
+            if existing is not None:
+                upload_id = state['upload_id']
+        if upload_id is None:
+            status, _, data = self._request('POST', key, {'uploads': ''}, headers=meta)
+            self._check(status, data, f'CreateMultipartUpload {key}')
+            upload_id = ElementTree.fromstring(data).findtext('{*}UploadId')
+            existing = {}
+            with self._state_lock:
+                self._state[key] = {'upload_id': upload_id, 'sha256': sha256}
+            self._save_state()
+        
+        etags = {}
+        futures = []
+        with open(path, 'rb') as f:
+            for number, offset in enumerate(range(0, size, self.part_size), start=1):
+                part_size = min(self.part_size, size - offset)
+                if number in existing:
+                    f.seek(offset)
+                    if f'"{hashlib.md5(f.read(part_size)).hexdigest()}"' == existing[number]:
+                        etags[number] = existing[number]
+                        continue
+                futures.append(self._part_pool.submit(self._upload_part, key, upload_id, number, path, offset, part_size))
+        for future in futures:
+            number, etag = future.result()
+            etags[number] = etag
+        
+        body = '<CompleteMultipartUpload>' + ''.join(
+            f'<Part><PartNumber>{n}</PartNumber><ETag>{etags[n]}</ETag></Part>' for n in sorted(etags)
+        ) + '</CompleteMultipartUpload>'
+        status, _, data = self._request('POST', key, {'uploadId': upload_id}, body.encode('utf-8'))
+        self._check(status, data, f'CompleteMultipartUpload {key}')
+        
+        with self._state_lock:
+            self._state.pop(key, None)
+        self._save_state()
+        return key
+
+    def submit(self, path):
+        """Planifie l'envoi d'un fichier (appelé dès qu'un volume est complet)"""
+        self._futures.append(self._file_pool.submit(self.upload_file, path))
+
+    def wait(self):
+        """Attend la fin des envois en cours ; lève la première erreur rencontrée"""
+        try:
+            return [future.result() for future in self._futures]
+        finally:
+            self._futures = []
+
+    def close(self):
+        self._file_pool.shutdown()
+        self._part_pool.shutdown()
+
+
+class LocalS3StandIn(ThreadingHTTPServer):
+    """Serveur local minimal compatible S3 (PUT/GET/HEAD, multipart) pour les essais.
+
+    Les objets sont stockés dans `root/<bucket>/<clé>`. Avec `credentials`
+    (clé, secret), la signature SigV4 de chaque requête est vérifiée (403
+    sinon). `fail_parts` fait échouer les N premiers UploadPart pour tester
+    la reprise.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, root, fail_parts=0, credentials=None):
+        self.root = Path(root)
+        self.fail_parts = fail_parts
+        self.credentials = credentials
+        self.lock = threading.Lock()
+        super().__init__(address, _S3StandInHandler)
+
+
+class _S3StandInHandler(BaseHTTPRequestHandler):
+    # Réponses dans l'espace de noms de S3, comme le service réel
+    xmlns = 'http://s3.amazonaws.com/doc/2006-03-01/'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _target(self):
+        parsed = urllib.parse.urlsplit(self.path)
+        query = dict(urllib.parse.parse_qsl(parsed.query, keep_blank_values=True))
+        bucket, _, key = urllib.parse.unquote(parsed.path).lstrip('/').partition('/')
+        return self.server.root / bucket, key, query
+
+    def _reply(self, status, body=b'', headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _body(self):
+        return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+    def _meta(self):
+        return {k.lower(): v for k, v in self.headers.items() if k.lower().startswith('x-amz-meta-')}
+
+    def _authorized(self, body):
+        """Vérifie la signature SigV4 (et l'empreinte du corps) si le serveur a des identifiants"""
+        if not self.server.credentials:
+            return True
+        access_key, secret_key = self.server.credentials
+        authorization = self.headers.get('Authorization', '')
+        match = re.fullmatch(r'AWS4-HMAC-SHA256 Credential=([^/]+)/\d{8}/([^/]+)/s3/aws4_request, '
+                             r'SignedHeaders=([^,]+), Signature=[0-9a-f]{64}', authorization)
+        payload_hash = self.headers.get('x-amz-content-sha256', '')
+        if not match or match.group(1) != access_key or payload_hash != hashlib.sha256(body).hexdigest():
+            return False
+        headers = {name: self.headers.get(name, '') for name in match.group(3).split(';')}
+        if 'x-amz-date' not in headers:
+            return False
+        parsed = urllib.parse.urlsplit(self.path)
+        query = dict(urllib.parse.parse_qsl(parsed.query, keep_blank_values=True))
+        expected = sigv4_authorization(self.command, urllib.parse.unquote(parsed.path), query, headers,
+                                       payload_hash, access_key, secret_key, match.group(2))
+        return hmac.compare_digest(expected, authorization)
+
+    def _reject(self):
+        self._reply(403, b'<Error><Code>SignatureDoesNotMatch</Code></Error>')
+
+    def _store(self, path, data, meta):
+        atomic_write(path, data)
+        meta['etag'] = f'"{hashlib.md5(data).hexdigest()}"'
+        atomic_write(path.with_name(path.name + '.meta'), json.dumps(meta).encode('utf-8'))
+        return meta['etag']
+
+    def do_PUT(self):
+        bucket_dir, key, query = self._target()
+        data = self._body()
+        if not self._authorized(data):
+            return self._reject()
+        if 'uploadId' in query:
+            with self.server.lock:
+                if self.server.fail_parts > 0:
+                    self.server.fail_parts -= 1
+                    return self._reply(500, b'<Error><Code>InternalError</Code></Error>')
+            upload_dir = bucket_dir / '.uploads' / query['uploadId']
+            if not upload_dir.exists():
+                return self._reply(404, b'<Error><Code>NoSuchUpload</Code></Error>')
+            etag = self._store(upload_dir / f"{int(query['partNumber']):05d}", data, {})
+            return self._reply(200, headers={'ETag': etag})
+        etag = self._store(bucket_dir / key, data, self._meta())
+        self._reply(200, headers={'ETag': etag})
+
+    def do_POST(self):
+        bucket_dir, key, query = self._target()
+        body = self._body()
+        if not self._authorized(body):
+            return self._reject()
+        if 'uploads' in query:
+            upload_id = uuid.uuid4().hex
+            upload_dir = bucket_dir / '.uploads' / upload_id
+            upload_dir.mkdir(parents=True)
+            (upload_dir / 'meta.json').write_text(json.dumps(self._meta()), encoding='utf-8')
+            xml = (f'<InitiateMultipartUploadResult xmlns="{self.xmlns}"><Key>{key}</Key>'
+                   f'<UploadId>{upload_id}</UploadId></InitiateMultipartUploadResult>')
+            return self._reply(200, xml.encode('utf-8'))
+        
+        upload_dir = bucket_dir / '.uploads' / query.get('uploadId', '')
+        if not upload_dir.is_dir():
+            return self._reply(404, b'<Error><Code>NoSuchUpload</Code></Error>')
+        numbers = [int(n.text) for n in ElementTree.fromstring(body).iterfind('.//{*}PartNumber')]
+        data = b''.join((upload_dir / f'{n:05d}').read_bytes() for n in sorted(numbers))
+        meta = json.loads((upload_dir / 'meta.json').read_text(encoding='utf-8'))
+        etag = self._store(bucket_dir / key, data, meta)
+        shutil.rmtree(upload_dir)
+        self._reply(200, f'<CompleteMultipartUploadResult xmlns="{self.xmlns}"><ETag>{etag}</ETag>'
+                         f'</CompleteMultipartUploadResult>'.encode('utf-8'))
+
+    def do_GET(self):
+        bucket_dir, key, query = self._target()
+        if not self._authorized(b''):
+            return self._reject()
+        if 'uploadId' in query:
+            upload_dir = bucket_dir / '.uploads' / query['uploadId']
+            if not upload_dir.is_dir():
+                return self._reply(404, b'<Error><Code>NoSuchUpload</Code></Error>')
+            parts = ''
+            for meta_path in sorted(upload_dir.glob('*.meta')):
+                etag = json.loads(meta_path.read_text(encoding='utf-8'))['etag']
+                parts += f'<Part><PartNumber>{int(meta_path.name[:5])}</PartNumber><ETag>{etag}</ETag></Part>'
+            return self._reply(200, f'<ListPartsResult xmlns="{self.xmlns}">{parts}</ListPartsResult>'.encode('utf-8'))
+        self._send_object(bucket_dir, key)
+
+    def do_HEAD(self):
+        bucket_dir, key, _ = self._target()
+        if not self._authorized(b''):
+            return self._reject()
+        self._send_object(bucket_dir, key)
+
+    def _send_object(self, bucket_dir, key):
+        path = bucket_dir / key
+        if not key or not path.is_file():
+            return self._reply(404)
+        meta = json.loads(path.with_name(path.name + '.meta').read_text(encoding='utf-8'))
+        headers = {'ETag': meta.pop('etag')}
+        headers.update(meta)
+        self._reply(200, path.read_bytes() if self.command == 'GET' else b'', headers)
+
+
+class NpmRegistryStandIn(ThreadingHTTPServer):
+    """Registre npm local servant les tarballs d'un miroir (`<scope>/<nom>/-/<fichier>.tgz`)"""
+
+    daemon_threads = True
+
+    def __init__(self, address, directory, quiet=False):
+        self.directory = Path(directory)
+        handler = functools.partial(_QuietFileHandler if quiet else SimpleHTTPRequestHandler, directory=str(directory))
+        super().__init__(address, handler)
+
+
+class _QuietFileHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def _split_top_level(text, separator=','):
+    """Découpe du code TS sur un séparateur hors parenthèses, accolades et crochets"""
+    parts = []
+    depth = 0
+    current = ''
+    quote = None
+    for char in text:
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in '"\'`':
+            quote = char
+        elif char in '([{<':
+            depth += 1
+        elif char in ')]}>':
+            depth -= 1
+        elif char == separator and depth == 0:
+            parts.append(current)
+            current = ''
+            continue
+        current += char
+    if current.strip():
+        parts.append(current)
+    return parts
+
+
+def _js_literal_to_sql(value):
+    """Convertit une valeur par défaut drizzle (littéral JS) en expression SQLite"""
+    value = value.strip()
+    if value.startswith('sql`'):
+        expression = value[4:-1]
+        if 'gen_random_uuid' in expression:
+            return "(lower(hex(randomblob(16))))"
+        if expression.lower() in ('now()', 'current_timestamp'):
+            return 'CURRENT_TIMESTAMP'
+        return f'({expression})'
+    if value in ('true', 'false'):
+        return '1' if value == 'true' else '0'
+    if value[:1] in '"\'':
+        return "'" + value[1:-1].replace("'", "''") + "'"
+    if value[:1] in '{[':
+        # Objet JS -> JSON : guillemets autour des clés nues
+        as_json = re.sub(r'([{,]\s*)([A-Za-z_$][\w$]*)\s*:', r'\1"\2":', value)
+        return "'" + json.dumps(json.loads(as_json.replace("'", '"'))).replace("'", "''") + "'"
+    return value
+
+
+def drizzle_schema_to_sqlite(source):
+    """Traduit les tables drizzle (`pgTable`/`sqliteTable`) d'un schema.ts en DDL SQLite.
+
+    Couvre les constructions utilisées par shared/schema.ts : types de
+    colonnes simples, primaryKey, notNull, unique, default, defaultNow,
+    references et array (stocké en JSON texte). Toute autre construction
+    lève ValueError : le snapshot ne diverge jamais en silence du schéma.
+    """
+    type_map = {
+        'text': 'TEXT', 'varchar': 'TEXT', 'char': 'TEXT', 'uuid': 'TEXT',
+        'json': 'TEXT', 'jsonb': 'TEXT', 'timestamp': 'TEXT', 'date': 'TEXT',
+        'boolean': 'INTEGER', 'integer': 'INTEGER', 'serial': 'INTEGER', 'bigint': 'INTEGER',
+        'smallint': 'INTEGER', 'real': 'REAL', 'doublePrecision': 'REAL', 'numeric': 'NUMERIC',
+    }
+    modifiers = {'primaryKey', 'notNull', 'unique', 'default', 'defaultNow', 'references', 'array', '$type'}
+    source = re.sub(r'//[^\n]*', '', source)
+    statements = []
+    columns_by_table = {}
+    
+    for match in re.finditer(r'export const (\w+)\s*=\s*(?:pg|sqlite|mysql)Table\(\s*"(\w+)"\s*,\s*\{', source):
+        variable, table = match.groups()
+        depth = 1
+        pos = match.end()
+        while depth:
+            depth += {'{': 1, '}': -1}.get(source[pos], 0)
+            pos += 1
+        # `=>` fausserait le comptage des chevrons de _split_top_level
+        body = source[match.end():pos - 1].replace('=>', '~')
+        
+        columns = []
+        constraints = []
+        columns_by_table[variable] = {}
+        for definition in _split_top_level(body):
+            key, _, expression = definition.strip().partition(':')
+            call = re.match(r'\s*(\w+)\(\s*"(\w+)"', expression)
+            if not call:
+                raise ValueError(f"Colonne non traduisible dans {table}: {definition.strip()}")
+            column_type, column = call.groups()
+            if column_type not in type_map:
+                raise ValueError(f"Type drizzle non pris en charge: {column_type} ({table}.{column})")
+            unknown = set(re.findall(r'\.(\$?\w+)\s*[(<]', expression[call.end():])) - modifiers
+            if unknown:
+                raise ValueError(f"Modificateur drizzle non pris en charge: {', '.join(sorted(unknown))} ({table}.{column})")
+            columns_by_table[variable][key.strip()] = column
+            
+            sql_type = 'TEXT' if '.array()' in expression else type_map.get(column_type, 'TEXT')
+            parts = [f'"{column}"', sql_type]
+            if '.primaryKey()' in expression:
+                parts.append('PRIMARY KEY')
+            if '.notNull()' in expression:
+                parts.append('NOT NULL')
+            if '.unique()' in expression:
+                parts.append('UNIQUE')
+            if '.defaultNow()' in expression:
+                parts.append('DEFAULT CURRENT_TIMESTAMP')
+            default = re.search(r'\.default\((.*)\)', expression)
+            if default:
+                value = _split_top_level(default.group(1), ')')[0]
+                parts.append(f'DEFAULT {_js_literal_to_sql(value)}')
+            reference = re.search(r'\.references\(\(\)\s*~\s*(\w+)\.(\w+)', expression)
+            if reference:
+                ref_table, ref_key = reference.groups()
+                ref_column = columns_by_table.get(ref_table, {}).get(ref_key, ref_key)
+                constraints.append(f'FOREIGN KEY ("{column}") REFERENCES "{ref_table}"("{ref_column}")')
+            columns.append(' '.join(parts))
+        
+        statements.append(f'CREATE TABLE "{table}" (\n  ' + ',\n  '.join(columns + constraints) + '\n)')
+    
+    # Les références utilisent le nom de variable TS : on le remplace par le nom de table
+    tables = {m.group(1): m.group(2) for m in re.finditer(r'export const (\w+)\s*=\s*\w+Table\(\s*"(\w+)"', source)}
+    return [re.sub(r'REFERENCES "(\w+)"', lambda m: f'REFERENCES "{tables.get(m.group(1), m.group(1))}"', ddl)
+            for ddl in statements]
+
+
+# Installation du snapshot SQLite (--db-snapshot) : en ligne de commande ou incluse par les installateurs
+DATABASE_SNAPSHOT_INSTALLER = r"""<?php
+/**
+ * PageForge - installation de la base SQLite pré-migrée
+ *
+ * Vérifie database.snapshot.sqlite contre le SHA-256 de database.snapshot.json puis
+ * le copie vers le chemin de DATABASE_URL (.env, sinon database.sqlite). Une base
+ * existante n'est jamais écrasée.
+ */
+
+function pageforge_database_path($dir) {
+    $path = $dir . '/database.sqlite';
+    $env = $dir . '/.env';
+    if (is_file($env) && preg_match('/^DATABASE_URL=sqlite:(.+)$/m', file_get_contents($env), $match)) {
+        $target = trim($match[1]);
+        $path = $target[0] === '/' ? $target : $dir . '/' . preg_replace('#^\./#', '', $target);
+    }
+    return $path;
+}
+
+function pageforge_install_database_snapshot($dir) {
+    $infoPath = $dir . '/database.snapshot.json';
+    if (!is_file($infoPath)) {
+        return 'absent';
+    }
+    $info = json_decode(file_get_contents($infoPath), true);
+    $target = pageforge_database_path($dir);
+    if (file_exists($target)) {
+        return 'existing';
+    }
+    $snapshot = $dir . '/' . $info['file'];
+    if (!is_file($snapshot) || hash_file('sha256', $snapshot) !== $info['sha256']) {
+        throw new RuntimeException('database.snapshot.sqlite absent ou corrompu (SHA-256 différent)');
+    }
+    $tmp = $target . '.tmp-' . getmypid();
+    if (!copy($snapshot, $tmp) || !rename($tmp, $target)) {
+        @unlink($tmp);
+        throw new RuntimeException("Copie impossible vers $target");
+    }
+    return 'installed';
+}
+
+if (PHP_SAPI === 'cli' && realpath($_SERVER['SCRIPT_FILENAME']) === __FILE__) {
+    try {
+        $status = pageforge_install_database_snapshot(__DIR__);
+    } catch (RuntimeException $e) {
+        fwrite(STDERR, '❌ ' . $e->getMessage() . "
+");
+        exit(1);
+    }
+    $messages = [
+        'installed' => '✅ Base SQLite pré-migrée installée',
+        'existing' => 'ℹ️  Base existante conservée',
+        'absent' => 'ℹ️  Aucun snapshot de base dans ce package',
+    ];
+    echo $messages[$status] . "
+";
+}
+"""
+
+# Préfixe des installateurs PHP : la base pré-migrée est posée avant toute initialisation du schéma
+DATABASE_SNAPSHOT_HOOK = """<?php
+if (is_file(__DIR__ . '/install-database.php')) {
+    require_once __DIR__ . '/install-database.php';
+    try {
+        pageforge_install_database_snapshot(__DIR__);
+    } catch (RuntimeException $e) {
+        // Snapshot inutilisable : l'installateur initialise le schéma comme sans --db-snapshot
+    }
+}
+?>
+"""
+
+
+DEFAULT_OPTIONS = {
+    'cache_dir': os.environ.get('PAGEFORGE_CACHE_DIR'),
+    'cache_max_size': 2 * 1024 ** 3,
+    'compression_level': 6,
+    'store_dir': None,
+    'verify': False,
+    'volume_size': None,
+    'publish_endpoint': None,
+    'publish_bucket': 'pageforge-releases',
+    'publish_prefix': '',
+    'upload_concurrency': 4,
+    'copy_workers': None,
+    'trace': None,
+    'build_nodes': None,
+    'node_connections': 2,
+    'precompress': True,
+    'db_snapshot': False,
+    'optimize_images': False,
+    'hash_assets': False,
+    'preload_hints': False,
+    'inline_css_max': 0,
+    'governed': False,
+    'max_read_rate': 20 * 1024 ** 2,
+    'max_write_rate': 20 * 1024 ** 2,
+    'max_workers': 2,
+    'nice': 10,
+    'buffer_size': 1024 * 1024,
+    'load_threshold': 1.0,
+    'layout': 'install-order',
+    'stream_threshold': 8 * 1024 ** 2,
+    'progress_threshold': 64 * 1024 ** 2,
+    'tar_hardlinks': True,
+    'zip_duplicates': 'report',
+    'segments': None,
+    'segment_size': 4 * 1024 ** 2,
+    'gzip_checkpoint_interval': 0,
+    'analyze': False,
+    'budgets': Path(__file__).resolve().parent / 'package-budgets.json',
+    'history_db': None,
+    'history_window': 5,
+    'size_regression': 0.25,
+    'time_regression': 0.5,
+    'fail_on_regression': False,
+    'prebuild': False,
+    'build_command': 'npm run build',
+    'prebuild_sources': False,
+    'npm_offline': False,
+    'npm_cache_dir': str(Path.home() / '.npm' / '_cacache'),
+    'npm_mirror_dir': None,
+    'npm_registry': None,
+}
+
+# Options sans effet sur le contenu des archives (exclues de la clé de cache)
+CACHE_NEUTRAL_OPTIONS = {
+    'cache_dir', 'cache_max_size', 'store_dir', 'verify', 'volume_size',
+    'publish_endpoint', 'publish_bucket', 'publish_prefix', 'upload_concurrency', 'copy_workers', 'trace',
+    'build_nodes', 'node_connections', 'npm_cache_dir', 'npm_mirror_dir', 'npm_registry',
+    'progress_threshold', 'analyze', 'budgets', 'history_db', 'history_window', 'size_regression', 'time_regression', 'fail_on_regression',
+    'governed', 'max_read_rate', 'max_write_rate', 'max_workers', 'nice', 'buffer_size', 'load_threshold',
+}
+
+
+class PageForgePackageGenerator:
+    def __init__(self, options=None):
         self.version = '2.0.0'
         self.base_dir = Path(__file__).parent.parent
         self.packages_dir = self.base_dir / 'packages'
         self.build_scripts_dir = self.base_dir / 'build-scripts'
+        self.options = dict(DEFAULT_OPTIONS, **(options or {}))
         
         # Créer le dossier packages
         self.packages_dir.mkdir(exist_ok=True)
         
+        # Cibles générées : type de copie, format d'archive, installateur
+        self.targets = {
+            'cpanel': {'package_type': 'production', 'archive': 'zip', 'installer': 'install-cpanel.php',
+                       'required': ['install-cpanel.php', 'INSTALLATION-GUIDE.txt'], 'volumes': True},
+            'windows': {'package_type': 'local', 'archive': 'zip', 'installer': 'install-local.php',
+                        'required': ['install.php', 'start-installer.bat', 'WINDOWS-INSTALL.txt']},
+            'linux': {'package_type': 'local', 'archive': 'tar.gz', 'installer': 'install-local.php',
+                      'required': ['install.php', 'start-installer.sh', 'LINUX-INSTALL.txt'], 'segmentable': True},
+            'vscode': {'package_type': 'development', 'archive': 'zip', 'installer': None,
+                       'required': ['setup.php', 'DEVELOPMENT.txt'], 'shared_payloads': True, 'segmentable': True},
+        }
+        
+        # Formats déjà compressés : stockés sans tentative de deflate
+        self.stored_extensions = {
+            '.png', '.jpg', '.jpeg', '.gif', '.webp', '.avif', '.mp4', '.webm', '.mp3', '.ogg',
+            '.woff', '.woff2', '.zip', '.gz', '.br', '.tgz', '.pdf',
+        }
+        
+        # Assets statiques servis directement par Apache (précompressés pour cPanel)
+        self.static_asset_roots = ['client/index.html', 'client/public', 'dist/public']
+        
+        # Assets renommés avec une empreinte de contenu (--hash-assets) ; les URL fixes
+        # (service worker, icônes demandées par les navigateurs) gardent leur nom
+        self.hashable_extensions = {
+            '.css', '.js', '.mjs', '.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp', '.avif',
+            '.woff', '.woff2', '.ttf', '.otf', '.eot', '.mp4', '.webm', '.mp3', '.ogg', '.wasm',
+        }
+        self.fixed_asset_names = {
+            'sw.js', 'service-worker.js', 'apple-touch-icon.png', 'apple-touch-icon-precomposed.png',
+        }
+        self.reference_extensions = {
+            '.html', '.css', '.js', '.mjs', '.svg', '.json', '.webmanifest', '.ts', '.tsx', '.jsx',
+        }
+        self.precompress_extensions = {
+            '.html': 'text/html',
+            '.css': 'text/css',
+            '.js': 'text/javascript',
+            '.mjs': 'text/javascript',
+            '.json': 'application/json',
+            '.svg': 'image/svg+xml',
+            '.xml': 'application/xml',
+            '.txt': 'text/plain',
+            '.map': 'application/json',
+            '.wasm': 'application/wasm',
+        }
+        
+        # Fichiers obligatoires dans tous les packages (vérifiés par la phase verify)
+        self.required_files = ['PACKAGE-INFO.md', 'README.md', '.env.example', 'package.json']
+        
+        # Ordre des membres d'archive : de quoi démarrer l'installation d'abord, docs en dernier
+        self.layout_tiers = [
+            ('install', ['install.php', 'install-cpanel.php', 'install-database.php', 'setup.php', 'start-installer.*', '*-INSTALL.txt',
+                         'INSTALLATION-GUIDE.txt', 'DEVELOPMENT.txt', 'package.json', 'package-lock.json',
+                         'prebuild.json', '.env.example', '.htaccess', 'database.snapshot.*', '*.config.ts',
+                         '*.config.js', 'tsconfig.json', 'components.json', 'config/']),
+            ('entry', ['dist/index.js', 'server/index.ts']),
+            ('dependencies', ['npm-offline/']),
+            ('server', ['server/', 'shared/', 'dist/']),
+            ('client', ['client/src/']),
+            ('assets', ['client/', 'dist/public/', 'attached_assets/']),
+            ('docs', ['docs/', '*.md', '*.txt', '.vscode-template/']),
+        ]
+        
+        # Fichiers de configuration copiés dans tous les packages
+        self.config_files = [
+            'package.json',
+            'tsconfig.json',
+            'vite.config.ts',
+            'tailwind.config.ts',
+            'postcss.config.js',
+            'drizzle.config.ts',
+            'components.json'
+        ]
+        
+        # Cache d'artefacts partagé (désactivé si aucun chemin n'est configuré)
+        self.cache = None
+        if self.options['cache_dir']:
+            self.cache = ArtifactCache(self.options['cache_dir'], self.options['cache_max_size'])
+        
+        # Mode gouverné : build sur un serveur qui sert du trafic en production
+        self.governor = None
+        if self.options['governed']:
+            self.governor = ResourceGovernor(
+                read_rate=self.options['max_read_rate'],
+                write_rate=self.options['max_write_rate'],
+                max_workers=self.options['max_workers'],
+                nice=self.options['nice'],
+                buffer_size=self.options['buffer_size'],
+                load_threshold=self.options['load_threshold'],
+            )
+        
+        # Mode --plan : arborescences parcourues et archives simulées (voir plan_packages) ;
+        # chaque dossier source n'est parcouru qu'une fois pour toutes les cibles
+        self.planning = None
+        self.plan_walks = {}
+        
+        # Compression répartie sur des nœuds de build (--build-nodes)
+        self.distributed = None
+        if self.options['build_nodes']:
+            self.distributed = DistributedCompressor(self.options['build_nodes'], self.options['node_connections'])
+        
+        # Timeline du build (--trace), à ouvrir dans Perfetto
+        self.trace = TraceRecorder() if self.options['trace'] else None
+        self._copy_bytes = 0
+        
+        # Publication S3 des volumes, en parallèle de la génération
+        self.publisher = None
+        if self.options['publish_endpoint']:
+            self.publisher = S3Publisher(
+                self.options['publish_endpoint'],
+                self.options['publish_bucket'],
+                self.options['publish_prefix'],
+                concurrency=self.worker_count(self.options['upload_concurrency']),
+                state_path=self.packages_dir / '.publish-state.json',
+            )
+            self.publisher.trace = self.trace
+        
+        # Cache des étapes de build (snapshot SQLite…), persistant même sans --cache-dir
+        self._stage_cache = self.cache
+        self._db_snapshot = None
+        self._npm_bundle = None
+        self._prebuild = None
+        
+        # Sortie en flux (StreamSink) d'une cible unique, sinon archives écrites dans packages/
+        self.stream = None
+        
+        # Rapport de build (écrit dans packages/BUILD-REPORT.json)
+        self.report = {}
+        self._digest_memo = {}
+        self._excluded_memo = {}
+        self._ignore_func = self.create_ignore_function()
+        
         # Fichiers à exclure
         self.exclude_patterns = [
             'node_modules',
@@ -55,27 +3301,1380 @@ class PageForgePackageGenerator:
         print()
         
         try:
+            build_start = time.perf_counter()
+            if self.governor:
+                self.governor.start()
+            
             # Nettoyer d'abord les anciens packages
             self.cleanup_old_packages()
             
-            # Générer tous les packages
-            self.generate_cpanel_package()
-            self.generate_windows_package()
-            self.generate_linux_package()
-            self.generate_vscode_package()
+            # Générer tous les packages (restaurés depuis le cache si possible)
+            self.report['targets'] = {}
+            for target in self.targets:
+                target_start = time.perf_counter()
+                with self.span(target, 'target') as span:
+                    cache_key = self.compute_target_key(target) if self.cache else None
+                    cached = bool(cache_key) and self.restore_from_cache(target, cache_key)
+                    if not cached:
+                        getattr(self, f'generate_{target}_package')()
+                        if cache_key:
+                            self.store_in_cache(target, cache_key)
+                    span['cached'] = cached
+                    span['bytes'] = self.archive_size(self.archive_name(target))
+                self.report['targets'][target] = {
+                    'seconds': round(time.perf_counter() - target_start, 3),
+                    'cached': cached,
+                }
+            
+            if self.cache:
+                self.cache.enforce_size_limit()
+                self.report['cache'] = {
+                    'dir': str(self.cache.root),
+                    'hits': self.cache.hits,
+                    'misses': self.cache.misses,
+                    'stores': self.cache.stores,
+                    'evictions': self.cache.evictions,
+                }
+            
+            self.report['build_seconds'] = round(time.perf_counter() - build_start, 3)
+            if self.governor:
+                self.record_governor_stats()
+            if self.distributed:
+                self.record_distributed_stats()
+            
+            # Vérifier les archives avant toute publication
+            if self.options['verify'] and not self.verify_packages():
+                raise RuntimeError("La vérification des packages a échoué")
+            
+            # Analyse des tailles et budgets par cible
+            budgets = self.load_size_budgets()
+            if self.options['analyze'] or budgets:
+                with self.span('analyze', 'phase') as span:
+                    analyses = self.analyze_packages(print_treemap=self.options['analyze'])
+                    span['bytes'] = sum(analysis['archive_bytes'] for analysis in analyses.values())
+                violations = self.check_size_budgets(analyses, budgets)
+                if violations:
+                    self.write_build_report()
+                    raise RuntimeError(f"{len(violations)} budget(s) de taille dépassé(s)")
+            
+            # L'index des volumes n'est publié qu'après vérification
+            if self.publisher:
+                with self.span('publish', 'phase') as span:
+                    self.finish_publication()
+                    span['bytes'] = self.publisher.uploaded_bytes
+            
+            # Archiver les packages dans le store dédupliqué
+            if self.options['store_dir']:
+                with self.span('store', 'phase'):
+                    self.archive_to_store(self.options['store_dir'])
             
             # Créer le guide de distribution
             self.create_distribution_guide()
+            with self.span('history', 'phase'):
+                regressions = self.record_build_history()
+            self.write_build_report()
+            
+            if regressions and self.options['fail_on_regression']:
+                raise RuntimeError(f"{len(regressions)} régression(s) détectée(s) (voir BUILD-REPORT.json)")
             
             print("\n✅ TOUS LES PACKAGES GÉNÉRÉS AVEC SUCCÈS !")
             print(f"📁 Dossier: {self.packages_dir.resolve()}")
             print()
             
-            self.show_package_summary()
+            self.show_package_summary()
+            
+        except Exception as e:
+            print(f"❌ Erreur: {e}")
+            exit(1)
+        
+        finally:
+            if self.distributed:
+                self.distributed.close()
+            # Écrite même en cas d'échec : c'est là qu'elle sert le plus
+            if self.trace:
+                count = self.trace.write(self.options['trace'])
+                print(f"🧭 Trace: {self.options['trace']} ({count} spans)")
+    
+    def span(self, name, cat, **args):
+        """Span de trace (sans effet sans --trace) ; le dict renvoyé reçoit les compteurs d'octets"""
+        return self.trace.span(name, cat, **args) if self.trace else contextlib.nullcontext(args)
+    
+    def worker_count(self, default):
+        """Nombre de workers d'un pool, plafonné en mode gouverné"""
+        if self.governor:
+            return min(default, self.governor.max_workers)
+        return default
+    
+    def read_file(self, path):
+        return self.governor.read_file(path) if self.governor else path.read_bytes()
+    
+    def record_governor_stats(self):
+        stats = self.governor.stats()
+        throttled = sum(stats['throttled_seconds'].values())
+        # Lectures et écritures se chevauchent : borne haute du temps ajouté par le bridage
+        stats['build_seconds'] = self.report['build_seconds']
+        stats['throttle_share'] = round(min(1.0, throttled / max(self.report['build_seconds'], 1e-9)), 3)
+        self.report['governor'] = stats
+        print(f"🐢 Mode gouverné: {throttled:.2f}s de temporisation sur {self.report['build_seconds']:.2f}s, "
+              f"{stats['load_backoffs']} ralentissement(s) dû(s) à la charge, "
+              f"{self.format_size(stats['bytes']['read'])} lus / {self.format_size(stats['bytes']['write'])} écrits")
+    
+    def record_distributed_stats(self):
+        stats = self.distributed.stats()
+        remote = sum(stats['items'].values())
+        stats['share'] = {node: round(count / max(remote, 1), 3) for node, count in stats['items'].items()}
+        self.report['distributed'] = stats
+        print(f"🌐 Compression répartie: {remote} bloc(s) sur {len(stats['nodes'])} nœud(s), "
+              f"{stats['local_items']} en local, {stats['retried']} renvoi(s), "
+              f"{stats['memo_hits']} contenu(s) déjà compressé(s)")
+    
+    def prefetch_payloads(self, batch, level, threshold):
+        """Lit un lot de petits fichiers et envoie aux nœuds ceux absents du cache.
+
+        Retourne {chemin: (données, SHA-256, entrée du cache, Future ou None)}.
+        """
+        prefetched = {}
+        for path in batch:
+            if path.stat().st_size > threshold:
+                continue
+            data = self.read_file(path)
+            sha256 = hashlib.sha256(data).hexdigest()
+            cached = self.cache.get_bytes('payloads', f'{sha256}-{level}') if self.cache else None
+            pending = None if cached else self.distributed.deflate(data, level, f'{sha256}-{level}')
+            prefetched[path] = (data, sha256, cached, pending)
+        return prefetched
+    
+    def plan_packages(self, write=True):
+        """Prévoit taille, nombre de fichiers et durée de chaque archive sans rien construire.
+
+        Chaque dossier source est parcouru une seule fois avec le filtre d'exclusion ;
+        les générateurs ne produisent que leurs petits fichiers texte (guides,
+        installateurs) et n'écrivent ni copie ni archive. Taux de compression et
+        débits sont mesurés sur un échantillon borné de chaque type de fichier
+        (12 fichiers et 64 Ko par fichier au plus, IC à 95 %).
+        """
+        start = time.perf_counter()
+        level = self.options['compression_level']
+        skipped = [name for name in ('prebuild', 'optimize_images', 'hash_assets', 'db_snapshot', 'npm_offline')
+                   if self.options[name]]
+        
+        # 1. Inventaire de chaque cible (étapes coûteuses désactivées, prebuild non exécuté)
+        options, packages_dir, report = self.options, self.packages_dir, self.report
+        self.options = dict(options, optimize_images=False, hash_assets=False, preload_hints=False,
+                            db_snapshot=False, npm_offline=False)
+        self.planning = {}
+        self.plan_walks = {}
+        generate_seconds = {}
+        # Fichiers générés gardés jusqu'à la fin de l'échantillonnage
+        plan_dir = tempfile.TemporaryDirectory(prefix='pageforge-plan-')
+        try:
+            self.packages_dir = Path(plan_dir.name)
+            self.report = {}
+            for target in self.targets:
+                target_start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    getattr(self, f'generate_{target}_package')()
+                generate_seconds[target] = time.perf_counter() - target_start
+        finally:
+            self.options, self.packages_dir, self.report = options, packages_dir, report
+            planned, self.planning, self.plan_walks = self.planning, None, {}
+        
+        # 2. Échantillon systématique proportionnel à la taille dans chaque type : taux
+        #    deflate (et gzip -9 / brotli des variantes) et débits. Chaque fichier a une chance
+        #    d'être tiré proportionnelle à ses octets, les gros fichiers qui font l'essentiel
+        #    de l'archive sont donc toujours mesurés. Un fichier lu en entier est connu exactement.
+        by_type = {}
+        for target in self.targets:
+            for path, size, _ in planned[self.archive_name(target)]['files']:
+                by_type.setdefault(path.suffix.lower(), {})[path] = size
+        per_file_cap = 64 * 1024
+        picks_per_type = 12
+        stream_threshold = self.options['stream_threshold']
+        exact = {}
+        samples = {}
+        rates = {}
+        copy_points = []
+        hash_bytes = hash_seconds = 0.0
+        
+        def measure(path, ext):
+            nonlocal hash_bytes, hash_seconds
+            with open(path, 'rb') as f:
+                data = f.read(per_file_cap)
+            tick = time.perf_counter()
+            hashlib.sha256(data).digest()
+            zlib.crc32(data)
+            hash_seconds += time.perf_counter() - tick
+            hash_bytes += len(data)
+            tick = time.perf_counter()
+            deflated = len(compress_block(data, level))
+            # Zip : fichiers que deflate n'améliore pas stockés tels quels, comme les formats
+            # déjà compressés au-delà de stream_threshold (les plus petits sont tentés en deflate)
+            stored = deflated >= len(data) or (ext in self.stored_extensions and by_type[ext][path] > stream_threshold)
+            point = {'bytes': len(data), 'deflate': deflated, 'zip': len(data) if stored else deflated,
+                     'seconds': time.perf_counter() - tick}
+            if ext in self.precompress_extensions:
+                tick = time.perf_counter()
+                point['gz'] = len(gzip.compress(data, 9, mtime=0))
+                if brotli is not None:
+                    point['br'] = len(brotli.compress(data, quality=11))
+                point['variant_seconds'] = time.perf_counter() - tick
+            if len(data) == by_type[ext][path]:
+                exact[path] = point
+            return point
+        
+        with tempfile.TemporaryDirectory(prefix='pageforge-plan-copy-') as tmp:
+            for ext, files in sorted(by_type.items()):
+                ordered = sorted((path for path in files if files[path]), key=lambda p: (files[p], str(p)))
+                total = sum(files[path] for path in ordered)
+                # Peu de fichiers : tous mesurés ; sinon un tirage tous les total/12 octets cumulés
+                # (un fichier plus gros que le pas peut être tiré plusieurs fois)
+                if len(ordered) <= picks_per_type:
+                    picks = ordered
+                else:
+                    step = total / picks_per_type
+                    picks, cumulated, index = [], 0, 0
+                    for pick in range(picks_per_type):
+                        position = (pick + 0.5) * step
+                        while cumulated + files[ordered[index]] < position:
+                            cumulated += files[ordered[index]]
+                            index += 1
+                        picks.append(ordered[index])
+                measured = {path: measure(path, ext) for path in dict.fromkeys(picks)}
+                points = list(measured.values())
+                samples[ext] = {'points': [measured[path] for path in picks], 'weighted': len(ordered) > picks_per_type}
+                # Copie réelle (32 fichiers de 4 Mo au plus) pour le coût par fichier et par octet
+                for path in list(measured)[:4]:
+                    if len(copy_points) < 32 and files[path] <= 4 * 1024 ** 2:
+                        tick = time.perf_counter()
+                        copy_file_fast(path, Path(tmp) / f'{len(copy_points)}{ext}')
+                        copy_points.append((files[path], time.perf_counter() - tick))
+                deflate_seconds = sum(p['seconds'] for p in points)
+                variant_seconds = sum(p.get('variant_seconds', 0) for p in points)
+                sampled = sum(p['bytes'] for p in points)
+                rates[ext] = {
+                    'files': len(files), 'bytes': sum(files.values()), 'sampled': len(points),
+                    'ratio': sum(p['deflate'] for p in points) / sampled if sampled else 1.0,
+                    'deflate': sampled / deflate_seconds if deflate_seconds > 0 else float('inf'),
+                    'variant': sampled / variant_seconds if variant_seconds > 0 else float('inf'),
+                }
+            
+            # tar.gz : un seul flux deflate, les fichiers voisins se compressent mutuellement.
+            # Facteur mesuré sur 3 suites de fichiers consécutifs (entêtes tar compris).
+            stream_factor = {}
+            for target in self.targets:
+                archive = planned[self.archive_name(target)]
+                if archive['kind'] != 'tar':
+                    continue
+                ordered = sorted(archive['files'], key=lambda f: f[2])
+                separate = joined = 0
+                for start_index in range(0, len(ordered), max(1, len(ordered) // 3 + 1)):
+                    run = bytearray()
+                    for path, size, arcname in ordered[start_index:start_index + 32]:
+                        if len(run) > 64 * 1024:
+                            break
+                        with open(path, 'rb') as f:
+                            data = f.read(16 * 1024)
+                        separate += len(compress_block(data, level))
+                        run += arcname.encode('utf-8').ljust(512, b'\0') + data + b'\0' * (-len(data) % 512)
+                    joined += len(compress_block(bytes(run), level))
+                stream_factor[target] = joined / separate if separate else 1.0
+        
+        estimates = {}
+        
+        def estimate(path, key):
+            """(octets compressés par octet source, erreur type) d'un fichier"""
+            if path in exact:
+                point = exact[path]
+                return point.get(key, point['bytes']) / point['bytes'], 0.0
+            ext = path.suffix.lower()
+            if (ext, key) not in estimates:
+                sample = samples.get(ext, {'points': [], 'weighted': False})
+                points = [p for p in sample['points'] if key in p]
+                values = [p[key] / p['bytes'] for p in points]
+                if not values:
+                    estimates[ext, key] = (1.0, 0.25)
+                elif sample['weighted']:
+                    # Tirage proportionnel à la taille : moyenne simple des taux, erreur type de la moyenne
+                    value = sum(values) / len(values)
+                    spread = math.sqrt(sum((v - value) ** 2 for v in values) / (len(values) - 1)) if len(values) > 1 else value
+                    estimates[ext, key] = (value, spread / math.sqrt(len(values)))
+                else:
+                    # Tous les fichiers mesurés (préfixe des plus gros) : taux pondéré par les octets lus
+                    value = sum(p[key] for p in points) / sum(p['bytes'] for p in points)
+                    estimates[ext, key] = (value, value * 0.1)
+            return estimates[ext, key]
+        
+        # Copie : t = a + b·taille (moindres carrés), bornés à zéro
+        n = len(copy_points)
+        if n >= 2:
+            sx = sum(x for x, _ in copy_points)
+            sy = sum(y for _, y in copy_points)
+            sxx = sum(x * x for x, _ in copy_points)
+            sxy = sum(x * y for x, y in copy_points)
+            slope = max(0.0, (n * sxy - sx * sy) / (n * sxx - sx * sx)) if n * sxx != sx * sx else 0.0
+            per_file = max(0.0, (sy - slope * sx) / n)
+        else:
+            per_file, slope = 1e-4, 1e-9
+        hash_rate = hash_bytes / hash_seconds if hash_seconds > 0 else float('inf')
+        
+        # Coût fixe d'un membre d'archive (stat, lecture, entête) : petits fichiers mesurés, compression déduite
+        smallest = sorted(exact, key=lambda path: exact[path]['bytes'])[:16]
+        deflate_time = sum(exact[path]['seconds'] for path in smallest)
+        writer = ZipPayloadWriter(io.BytesIO())
+        tick = time.perf_counter()
+        for path in smallest:
+            stat = path.stat()
+            data = path.read_bytes()
+            hashlib.sha256(data).hexdigest()
+            payload, method = deflate_payload(data, level)
+            writer.add_member(path.name, payload, zlib.crc32(data), len(data), stat.st_mtime, 0o100644, method)
+        member_seconds = {'zip': max(0.0, time.perf_counter() - tick - deflate_time) / max(len(smallest), 1)}
+        with tarfile.open(fileobj=io.BytesIO(), mode='w:gz', compresslevel=level) as tar:
+            tick = time.perf_counter()
+            for path in smallest:
+                data = path.read_bytes()
+                hashlib.sha256(data).hexdigest()
+                tar.addfile(tar.gettarinfo(str(path), path.name), io.BytesIO(data))
+            member_seconds['deflate'] = max(0.0, time.perf_counter() - tick - deflate_time) / max(len(smallest), 1)
+        
+        # 3. Prévision par cible
+        plans = {}
+        for target in self.targets:
+            name = self.archive_name(target)
+            archive = planned[name]
+            kind = 'zip' if archive['kind'] == 'zip' else 'deflate'
+            files = archive['files']
+            
+            # Doublons remplacés par des hardlinks : seuls les fichiers de même taille sont hachés
+            linked = set()
+            if kind == 'deflate' and self.options['tar_hardlinks']:
+                by_size = {}
+                for path, size, _ in files:
+                    if size:
+                        by_size.setdefault(size, []).append(path)
+                seen = set()
+                for paths in by_size.values():
+                    for path in paths if len(paths) > 1 else ():
+                        digest = self.file_digest(path)
+                        if digest in seen:
+                            linked.add(path)
+                        seen.add(digest)
+            
+            errors = {}
+            size = 0.0
+            phases = {'generate': generate_seconds[target], 'copy': 0.0, 'archive': 0.0, 'precompress': 0.0}
+            for path, file_size, arcname in files:
+                phases['archive'] += member_seconds[kind] + file_size / hash_rate
+                if path in linked:
+                    continue
+                value, error = estimate(path, kind)
+                size += file_size * value
+                # Erreur commune aux fichiers d'un même type : cumulée avant d'être élevée au carré
+                if error:
+                    errors[path.suffix.lower()] = errors.get(path.suffix.lower(), 0.0) + file_size * error
+                if kind == 'deflate' or path.suffix.lower() not in self.stored_extensions or file_size <= stream_threshold:
+                    phases['archive'] += file_size / rates[path.suffix.lower()]['deflate']
+            # Arborescences copiées (les fichiers générés sont déjà dans generate_seconds)
+            phases['copy'] = sum(per_file + file_size * slope for _, file_size, _ in archive['sources'])
+            
+            # Variantes précompressées (.gz, .br) : écrites puis stockées telles quelles dans l'archive
+            variants = 0
+            for path, file_size, arcname in archive['variants']:
+                for encoding in ('gz', 'br'):
+                    if encoding == 'br' and brotli is None:
+                        continue
+                    value, error = estimate(path, encoding)
+                    if value <= 1 - archive['min_saving']:
+                        size += file_size * value
+                        variants += 1
+                phases['precompress'] += file_size / rates[path.suffix.lower()]['variant']
+            
+            # Entêtes : locale + centrale (zip) ; pour tar.gz, compris dans le facteur de flux
+            count = len(files) + variants + (1 if self.options['layout'] == 'install-order' else 0)
+            if kind == 'zip':
+                size += sum(76 + 2 * len(f'{archive["package"]}/{arcname}') for _, _, arcname in files) + 22
+                size += 12 * count * 0.5
+            else:
+                size *= stream_factor[target]
+            
+            seconds = sum(phases.values())
+            sigma = math.sqrt(sum(error ** 2 for error in errors.values()))
+            size_margin = 1.96 * sigma + 0.03 * size
+            # Relatif pour les grosses cibles ; plancher absolu pour la gigue de l'ordonnanceur et
+            # des E/S, qui domine les cibles de quelques dizaines de millisecondes
+            time_margin = 0.35 * seconds + 0.05
+            plans[target] = {
+                'archive': name,
+                'files': count,
+                'source_bytes': sum(f[1] for f in files),
+                'predicted_bytes': round(size),
+                'bytes_low': round(max(0, size - size_margin)),
+                'bytes_high': round(size + size_margin),
+                'predicted_seconds': round(seconds, 3),
+                'seconds_low': round(seconds - time_margin, 3),
+                'seconds_high': round(seconds + time_margin, 3),
+                'phases': {phase: round(value, 3) for phase, value in phases.items()},
+            }
+        plan_dir.cleanup()
+        
+        # Étalonnage sur les builds précédents de cet hôte : durée réelle / durée du modèle,
+        # le modèle étant ramené au volume de chaque build passé
+        if self.history_path.exists():
+            history = BuildHistory(self.history_path)
+            try:
+                for target, entry in plans.items():
+                    ratios = [seconds / (entry['predicted_seconds'] * volume / entry['source_bytes'])
+                              for seconds, volume in history.recent_timings(target, self.options['history_window'])
+                              if volume and entry['source_bytes'] and entry['predicted_seconds']]
+                    if not ratios:
+                        continue
+                    factor = min(5.0, max(0.2, BuildHistory._median(ratios)))
+                    spread = max(abs(ratio / factor - 1) for ratio in ratios) if len(ratios) >= 3 else 0.3
+                    seconds = entry['predicted_seconds'] * factor
+                    margin = max(0.15, spread) * seconds + 0.05
+                    entry.update({
+                        'predicted_seconds': round(seconds, 3),
+                        'seconds_low': round(seconds - margin, 3),
+                        'seconds_high': round(seconds + margin, 3),
+                        'phases': {phase: round(value * factor, 3) for phase, value in entry['phases'].items()},
+                        'calibration': {'runs': len(ratios), 'factor': round(factor, 3)},
+                    })
+            finally:
+                history.close()
+        
+        plan = {
+            'version': self.version,
+            'plan_seconds': round(time.perf_counter() - start, 3),
+            'compression_level': level,
+            'host': {'cpus': os.cpu_count(), 'copy_per_file_ms': round(per_file * 1000, 3),
+                     'member_ms': {'zip': round(member_seconds['zip'] * 1000, 3),
+                                   'tar': round(member_seconds['deflate'] * 1000, 3)},
+                     'copy_mb_s': round(1 / slope / 1024 ** 2, 1) if slope else None,
+                     'hash_mb_s': round(hash_rate / 1024 ** 2, 1) if hash_rate != float('inf') else None},
+            'types': {ext or '(sans extension)': {
+                'files': entry['files'], 'bytes': entry['bytes'], 'sampled': entry['sampled'],
+                'ratio': round(entry['ratio'], 4),
+                'deflate_mb_s': round(entry['deflate'] / 1024 ** 2, 1) if entry['deflate'] != float('inf') else None,
+            } for ext, entry in sorted(rates.items())},
+            'tar_stream_factor': {target: round(factor, 3) for target, factor in stream_factor.items()},
+            'not_simulated': skipped,
+            'targets': plans,
+        }
+        
+        fmt = self.format_size
+        print(f"🔮 Plan du build ({plan['plan_seconds']:.2f}s, niveau {level}, IC 95 %)")
+        for target, entry in plans.items():
+            print(f"  {entry['archive']:<36} {entry['files']:>6} fichiers  "
+                  f"{fmt(entry['predicted_bytes']):>10} [{fmt(entry['bytes_low'])} – {fmt(entry['bytes_high'])}]  "
+                  f"{entry['predicted_seconds']:.2f}s [{entry['seconds_low']:.2f} – {entry['seconds_high']:.2f}]")
+        if skipped:
+            print(f"  ⚠️  Étapes non simulées (tailles non comprises): {', '.join(skipped)}")
+        
+        if write:
+            self.packages_dir.mkdir(parents=True, exist_ok=True)
+            atomic_write(self.packages_dir / 'BUILD-PLAN.json', json.dumps(plan, indent=2).encode('utf-8'))
+        return plan
+    
+    def record_planned_archive(self, source_dir, archive_name):
+        """--plan : fichiers qu'aurait contenus l'archive (copiés, générés et variantes précompressées)"""
+        entry = self.planning.pop(source_dir.name, {'sources': [], 'precompress': None})
+        files = list(entry['sources'])
+        files.extend((path, path.stat().st_size, path.relative_to(source_dir).as_posix())
+                     for path in sorted(source_dir.rglob('*')) if path.is_file())
+        variants = []
+        min_saving = 0.0
+        if entry['precompress']:
+            min_saving, min_size, max_size = entry['precompress']
+            roots = tuple(root if '.' in Path(root).name else root + '/' for root in self.static_asset_roots)
+            variants = [(path, size, arcname) for path, size, arcname in files
+                        if arcname.startswith(roots) and path.suffix.lower() in self.precompress_extensions
+                        and min_size <= size <= max_size]
+        self.planning[archive_name] = {
+            'kind': 'zip' if archive_name.endswith('.zip') else 'tar',
+            'package': source_dir.name,
+            'files': files,
+            'sources': entry['sources'],
+            'variants': variants,
+            'min_saving': min_saving,
+        }
+    
+    def check_plan(self, max_size_error=0.1):
+        """Compare le plan à un build réel : erreur par cible et couverture des intervalles.
+
+        Une cible échoue si sa taille s'écarte de plus de max_size_error, si son nombre
+        de fichiers diffère ou si taille ou durée réelles sortent de l'intervalle prévu.
+        """
+        plan = self.plan_packages()
+        self.generate_all_packages()
+        failures = 0
+        print(f"\n🎯 Plan contre build réel (plan: {plan['plan_seconds']:.2f}s, "
+              f"build: {self.report['build_seconds']:.2f}s, "
+              f"{plan['plan_seconds'] / max(self.report['build_seconds'], 1e-9):.1%})")
+        results = {}
+        for target, entry in plan['targets'].items():
+            actual_bytes = self.archive_size(entry['archive'])
+            manifest = self.packages_dir / f"{entry['archive']}.manifest.json"
+            actual_files = len(json.loads(manifest.read_text(encoding='utf-8'))['members']) if manifest.exists() else None
+            actual_seconds = self.report['targets'][target]['seconds']
+            size_error = (entry['predicted_bytes'] - actual_bytes) / max(actual_bytes, 1)
+            time_error = (entry['predicted_seconds'] - actual_seconds) / max(actual_seconds, 1e-9)
+            inside = entry['bytes_low'] <= actual_bytes <= entry['bytes_high']
+            # Durée d'une cible restaurée du cache sans rapport avec le modèle
+            cached = self.report['targets'][target]['cached']
+            time_inside = cached or entry['seconds_low'] <= actual_seconds <= entry['seconds_high']
+            ok = abs(size_error) <= max_size_error and inside and time_inside and entry['files'] == actual_files
+            failures += not ok
+            results[target] = {'size_error': round(size_error, 4), 'time_error': round(time_error, 4),
+                               'size_within_bounds': inside, 'time_within_bounds': time_inside,
+                               'files': [entry['files'], actual_files]}
+            print(f"  {'✅' if ok else '❌'} {target:<8} taille {size_error:+.1%} "
+                  f"({'dans' if inside else 'hors de'} l'intervalle)  "
+                  f"fichiers {entry['files']}/{actual_files}  durée {time_error:+.0%} "
+                  f"({'dans' if time_inside else 'hors de'} l'intervalle)"
+                  + (" (cible en cache)" if cached else ""))
+        return failures == 0, results
+    
+    def archive_name(self, target):
+        return f"pageforge-{target}-v{self.version}.{self.targets[target]['archive']}"
+    
+    def open_archive_output(self, archive_name):
+        """Ouvre le flux de sortie d'une archive (découpée en volumes si demandé, sans copie complète)"""
+        archive_path = self.packages_dir / archive_name
+        target = next((t for t in self.targets if self.archive_name(t) == archive_name), None)
+        if self.stream:
+            output = self.stream
+        elif target and self.targets[target].get('volumes') and self.options['volume_size']:
+            on_volume = self.publisher.submit if self.publisher else None
+            output = VolumeSplitter(archive_path, self.options['volume_size'], None, on_volume)
+        else:
+            output = open(archive_path, 'wb')
+        return ThrottledWriter(output, self.governor) if self.governor else output
+    
+    def volume_index_path(self, archive_name):
+        return self.packages_dir / f'{archive_name}.volumes.json'
+    
+    def archive_exists(self, archive_name):
+        """Archive présente, en un seul fichier ou en volumes"""
+        return (self.packages_dir / archive_name).is_file() or self.volume_index_path(archive_name).is_file()
+    
+    def open_archive(self, archive_name):
+        """Ouvre une archive générée en lecture (fichier projeté en mémoire ou suite de volumes)"""
+        archive_path = self.packages_dir / archive_name
+        if archive_path.is_file():
+            return MappedFile(archive_path)
+        if self.volume_index_path(archive_name).is_file():
+            return VolumeReader(self.volume_index_path(archive_name))
+        raise FileNotFoundError(f"{archive_name} introuvable dans {self.packages_dir}")
+    
+    def archive_size(self, archive_name):
+        if self.stream:
+            return self.stream.bytes
+        archive_path = self.packages_dir / archive_name
+        if archive_path.is_file():
+            return archive_path.stat().st_size
+        return json.loads(self.volume_index_path(archive_name).read_text(encoding='utf-8'))['size']
+    
+    def stream_package(self, target, spec, staging_dir=None):
+        """Génère une cible et envoie son archive vers un flux au fil de sa production.
+
+        Aucune archive n'est écrite sur disque : le package est assemblé dans un
+        dossier temporaire de /dev/shm (tmpfs) supprimé à la fin. Sans tmpfs,
+        `staging_dir` doit être donné explicitement : le flux ne se replie pas
+        en silence sur le disque.
+        """
+        if staging_dir is None:
+            if not os.path.isdir(STREAM_STAGING_DIR):
+                raise ValueError(f"{STREAM_STAGING_DIR} indisponible : indiquer un dossier d'assemblage avec --staging-dir "
+                                 "(le package y sera écrit temporairement)")
+            staging_dir = STREAM_STAGING_DIR
+        self.stage_cache  # le cache des étapes reste dans packages/
+        if self.governor:
+            self.governor.start()
+        
+        packages_dir = self.packages_dir
+        staging = Path(tempfile.mkdtemp(prefix='pageforge-stream-', dir=staging_dir))
+        start = time.perf_counter()
+        try:
+            self.packages_dir = staging
+            with StreamSink(spec) as sink:
+                self.stream = sink
+                getattr(self, f'generate_{target}_package')()
+        finally:
+            self.stream = None
+            self.packages_dir = packages_dir
+            shutil.rmtree(staging, ignore_errors=True)
+        
+        seconds = time.perf_counter() - start
+        result = {
+            'archive': self.archive_name(target),
+            'bytes': sink.bytes,
+            'sha256': sink.digest.hexdigest(),
+            'seconds': round(seconds, 3),
+        }
+        print(f"📡 {result['archive']} envoyé vers {spec}: {self.format_size(sink.bytes)} en {seconds:.2f}s "
+              f"({self.format_size(sink.bytes / max(seconds, 1e-9))}/s), sha256 {result['sha256']}")
+        return result
+    
+    def finish_publication(self):
+        """Attend les volumes en cours d'envoi puis publie les index"""
+        print("☁️  Publication des volumes...")
+        start = time.perf_counter()
+        self.publisher.wait()
+        for index_path in sorted(self.packages_dir.glob('pageforge-*.volumes.json')):
+            self.publisher.submit(index_path)
+        self.publisher.wait()
+        self.publisher.close()
+        
+        tail = time.perf_counter() - start
+        self.report['publish'] = {
+            'endpoint': self.options['publish_endpoint'],
+            'bucket': self.options['publish_bucket'],
+            'uploaded_bytes': self.publisher.uploaded_bytes,
+            'skipped_files': self.publisher.skipped,
+            'tail_seconds': round(tail, 3),
+        }
+        print(f"✅ {self.format_size(self.publisher.uploaded_bytes)} publiés "
+              f"({self.publisher.skipped} fichier(s) déjà présents, {tail:.2f}s après la génération)")
+    
+    def file_digest(self, path):
+        """SHA-256 d'un fichier source, mémorisé par (taille, mtime) pour la durée du build"""
+        stat = path.stat()
+        memo_key = (str(path), stat.st_size, stat.st_mtime_ns)
+        if memo_key not in self._digest_memo:
+            self._digest_memo[memo_key] = file_sha256(path)
+        return self._digest_memo[memo_key]
+    
+    def iter_filtered_files(self, src):
+        """Parcourt un dossier avec les mêmes exclusions que copy_directory_filtered"""
+        ignore_func = self.create_ignore_function()
+        for directory, dirnames, filenames in os.walk(src):
+            ignored = set(ignore_func(directory, dirnames + filenames))
+            dirnames[:] = sorted(d for d in dirnames if d not in ignored)
+            for name in sorted(filenames):
+                if name not in ignored:
+                    yield Path(directory) / name
+    
+    def collect_target_inputs(self, target):
+        """Liste les fichiers sources dont dépend le contenu d'une cible"""
+        package_type = self.targets[target]['package_type']
+        inputs = [Path(__file__).resolve()]
+        
+        sources = [self.base_dir / name for name in self.config_files]
+        folders = ['client', 'server', 'shared']
+        if package_type in ('local', 'development'):
+            sources.append(self.base_dir / 'README.md')
+        if package_type == 'development':
+            sources.append(self.base_dir / '.gitignore')
+            folders.append('docs')
+        if self.targets[target]['installer']:
+            sources.append(self.build_scripts_dir / self.targets[target]['installer'])
+        if package_type == 'production':
+            # Règles ajoutées au .htaccess cPanel (create_cpanel_htaccess)
+            sources.append(self.base_dir / '.htaccess')
+        if package_type in ('production', 'local'):
+            if self.options['npm_offline'] or self.options['prebuild']:
+                sources.append(self.base_dir / 'package-lock.json')
+            if self.options['prebuild'] and (self.base_dir / 'attached_assets').exists():
+                inputs.extend(sorted(p for p in (self.base_dir / 'attached_assets').rglob('*') if p.is_file()))
+        
+        inputs.extend(path for path in sources if path.exists())
+        for folder in folders:
+            if (self.base_dir / folder).exists():
+                inputs.extend(self.iter_filtered_files(self.base_dir / folder))
+        
+        return inputs
+    
+    def compute_target_key(self, target):
+        """Clé de cache : empreinte des entrées, de la version du générateur et des options"""
+        options = {k: v for k, v in self.options.items() if k not in CACHE_NEUTRAL_OPTIONS}
+        digest = hashlib.sha256(json.dumps({
+            'generator': self.version,
+            'target': target,
+            'options': options,
+            'brotli': brotli is not None,
+        }, sort_keys=True, default=str).encode('utf-8'))
+        
+        for path in self.collect_target_inputs(target):
+            try:
+                rel = path.relative_to(self.base_dir).as_posix()
+            except ValueError:
+                rel = path.name
+            digest.update(f"{rel}\0{self.file_digest(path)}\n".encode('utf-8'))
+        
+        return digest.hexdigest()
+    
+    def restore_from_cache(self, target, cache_key):
+        archive_name = self.archive_name(target)
+        cached = self.cache.get('archives', cache_key)
+        if cached is None:
+            return False
+        
+        with open(cached, 'rb') as src, self.open_archive_output(archive_name) as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        manifest = self.cache.get('manifests', cache_key)
+        if manifest is not None:
+            shutil.copyfile(manifest, self.packages_dir / f'{archive_name}.manifest.json')
+        
+        print(f"♻️  Package {target} restauré depuis le cache ({archive_name})")
+        return True
+    
+    def store_in_cache(self, target, cache_key):
+        archive_name = self.archive_name(target)
+        meta = {'target': target, 'archive': archive_name, 'version': self.version}
+        with self.open_archive(archive_name) as archive:
+            self.cache.put_file('archives', cache_key, archive, meta)
+        manifest_path = self.packages_dir / f'{archive_name}.manifest.json'
+        if manifest_path.exists():
+            self.cache.put_file('manifests', cache_key, manifest_path, meta)
+    
+    def write_manifest(self, archive_name, members):
+        """Écrit la liste des membres (chemin, taille, SHA-256) à côté de l'archive"""
+        manifest = {
+            'archive': archive_name,
+            'version': self.version,
+            'members': members,
+        }
+        manifest_path = self.packages_dir / f'{archive_name}.manifest.json'
+        manifest_path.write_text(json.dumps(manifest, indent=2), encoding='utf-8')
+        return manifest_path
+    
+    def is_excluded_member(self, rel_path):
+        """Indique si un membre (relatif à la racine du package) aurait dû être exclu à la copie"""
+        parts = rel_path.split('/')
+        if parts[0] not in ('client', 'server', 'shared', 'docs'):
+            return False
+        
+        # Mémorisé par chemin : les dossiers sont partagés par de nombreux membres
+        for depth in range(1, len(parts) + 1):
+            prefix = '/'.join(parts[:depth])
+            if prefix not in self._excluded_memo:
+                directory = self.base_dir.joinpath(*parts[:depth - 1])
+                self._excluded_memo[prefix] = bool(self._ignore_func(str(directory), [parts[depth - 1]]))
+            if self._excluded_memo[prefix]:
+                return True
+        return False
+    
+    @staticmethod
+    def extract_member(source, dest_dir, name):
+        """Extrait un membre en flux ; retourne (taille, SHA-256)"""
+        dest_path = dest_dir / name
+        if Path(name).is_absolute() or '..' in Path(name).parts:
+            raise ValueError(f"Chemin de membre dangereux: {name}")
+        
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        with open(dest_path, 'wb') as out:
+            for chunk in iter(lambda: source.read(1024 * 1024), b''):
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+        return size, digest.hexdigest()
+    
+    def verify_archive(self, target):
+        """Vérifie une archive : CRC et tailles, manifeste, exclusions, fichiers requis, arbre extrait"""
+        archive_name = self.archive_name(target)
+        archive_path = self.packages_dir / archive_name
+        manifest_path = self.packages_dir / f'{archive_name}.manifest.json'
+        start = time.perf_counter()
+        errors = []
+        
+        if not self.archive_exists(archive_name):
+            return {'ok': False, 'errors': [f"{archive_name} introuvable"], 'members': 0, 'seconds': 0.0}
+        
+        try:
+            expected = {m['path']: m for m in json.loads(manifest_path.read_text(encoding='utf-8'))['members']}
+        except (OSError, ValueError, KeyError):
+            expected = None
+            errors.append(f"Manifeste absent ou illisible: {manifest_path.name}")
+        
+        try:
+            mapped = self.open_archive(archive_name)
+        except (OSError, ValueError, KeyError) as e:
+            return {'ok': False, 'errors': [f"{archive_name} illisible: {e}"], 'members': 0, 'seconds': 0.0}
+        with tempfile.TemporaryDirectory(prefix=f'pageforge-verify-{target}-') as tmp, mapped:
+            tmp_dir = Path(tmp)
+            
+            # Extraction en un seul passage : CRC contrôlés par zipfile/gzip,
+            # SHA-256 et taille calculés pendant l'écriture dans le dossier temporaire
+            extracted = {}
+            try:
+                if archive_name.endswith('.zip'):
+                    with zipfile.ZipFile(mapped) as zipf:
+                        for info in zipf.infolist():
+                            if not info.is_dir():
+                                with zipf.open(info) as source:
+                                    extracted[info.filename] = self.extract_member(source, tmp_dir, info.filename)
+                else:
+                    # gzip lu par GzipFile : tarfile en flux (r|gz) s'arrête au premier membre d'une archive segmentée
+                    with gzip.GzipFile(fileobj=io.BufferedReader(mapped)) as stream, \
+                            tarfile.open(fileobj=stream, mode='r|') as tar:
+                        for member in tar:
+                            if member.isfile():
+                                source = tar.extractfile(member)
+                                extracted[member.name] = self.extract_member(source, tmp_dir, member.name)
+                            elif member.islnk():
+                                # Hardlink vers un membre identique déjà extrait
+                                if member.linkname not in extracted:
+                                    raise ValueError(f"Hardlink vers un membre inconnu: {member.name}")
+                                with open(tmp_dir / member.linkname, 'rb') as source:
+                                    extracted[member.name] = self.extract_member(source, tmp_dir, member.name)
+            except (zipfile.BadZipFile, tarfile.TarError, zlib.error, EOFError, OSError, ValueError) as e:
+                errors.append(f"Archive corrompue: {e}")
+            
+            # Doublons livrés une seule fois : recopiés comme le ferait l'installateur
+            root = f'pageforge-{target}-v{self.version}'
+            duplicates_path = tmp_dir / root / '.pageforge-duplicates.json'
+            if duplicates_path.is_file():
+                for dup, src in json.loads(duplicates_path.read_text(encoding='utf-8'))['files'].items():
+                    if f'{root}/{src}' not in extracted:
+                        errors.append(f"Source de doublon absente: {src}")
+                        continue
+                    with open(tmp_dir / root / src, 'rb') as source:
+                        extracted[f'{root}/{dup}'] = self.extract_member(source, tmp_dir, f'{root}/{dup}')
+            
+            # Comparaison de l'arbre extrait avec le manifeste
+            if expected is not None:
+                for path in sorted(set(expected) - set(extracted)):
+                    errors.append(f"Fichier manquant: {path}")
+                for path in sorted(set(extracted) - set(expected)):
+                    errors.append(f"Fichier inattendu: {path}")
+                for path in sorted(set(expected) & set(extracted)):
+                    size, sha256 = extracted[path]
+                    if size != expected[path]['size']:
+                        errors.append(f"Taille incorrecte: {path}")
+                    elif sha256 != expected[path]['sha256']:
+                        errors.append(f"Contenu différent du manifeste: {path}")
+        
+        # Volumes éventuels : leur concaténation doit redonner l'archive (son empreinte
+        # enregistrée à l'écriture, ou le fichier complet s'il existe)
+        index_path = self.volume_index_path(archive_name)
+        if index_path.exists():
+            index = json.loads(index_path.read_text(encoding='utf-8'))
+            digest = hashlib.sha256()
+            for volume in index['volumes']:
+                volume_path = self.packages_dir / volume['name']
+                if not volume_path.exists() or file_sha256(volume_path) != volume['sha256']:
+                    errors.append(f"Volume invalide: {volume['name']}")
+                    break
+                with open(volume_path, 'rb') as f:
+                    for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                        digest.update(chunk)
+            else:
+                expected_sha256 = file_sha256(archive_path) if archive_path.is_file() else index['sha256']
+                if digest.hexdigest() != expected_sha256:
+                    errors.append("Les volumes ne reconstituent pas l'archive")
+        
+        # Règles propres à la cible
+        members = {path.split('/', 1)[1] for path in extracted if '/' in path and path.startswith(root + '/')}
+        for required in self.required_files + self.targets[target]['required']:
+            if required not in members:
+                errors.append(f"Fichier requis absent: {required}")
+        for member in sorted(members):
+            if self.is_excluded_member(member):
+                errors.append(f"Fichier exclu présent: {member}")
+        
+        return {
+            'ok': not errors,
+            'errors': errors,
+            'members': len(extracted),
+            'seconds': round(time.perf_counter() - start, 3),
+        }
+    
+    def verify_packages(self):
+        """Phase verify : contrôle toutes les archives en parallèle"""
+        print("🔍 Vérification des packages...")
+        start = time.perf_counter()
+        
+        def verify(target):
+            with self.span(target, 'verify') as span:
+                archive_name = self.archive_name(target)
+                span['bytes'] = self.archive_size(archive_name) if self.archive_exists(archive_name) else 0
+                return self.verify_archive(target)
+        
+        targets = list(self.targets)
+        with self.span('verify', 'phase'), ThreadPoolExecutor(max_workers=self.worker_count(len(targets))) as executor:
+            results = dict(zip(targets, executor.map(verify, targets)))
+        
+        for target, result in results.items():
+            status = '✅' if result['ok'] else '❌'
+            print(f"  {status} {self.archive_name(target):<35} {result['members']:>4} fichiers ({result['seconds']:.2f}s)")
+            for error in result['errors'][:20]:
+                print(f"     - {error}")
+        
+        elapsed = time.perf_counter() - start
+        self.report['verify'] = {'seconds': round(elapsed, 3), 'archives': results}
+        print(f"🔍 Vérification terminée en {elapsed:.2f}s")
+        return all(result['ok'] for result in results.values())
+    
+    def iter_sync_sources(self, archive_name, archive, root, names, dest, written):
+        """Parcourt les membres à réécrire : (chemin relatif, flux, mode, mtime).
+
+        Un .zip est lu en accès direct ; un .tar.gz en un seul passage, les hardlinks
+        étant recopiés depuis leur cible (déjà écrite ou vérifiée identique).
+        """
+        if archive_name.endswith('.zip'):
+            with zipfile.ZipFile(archive) as zipf:
+                available = set(zipf.namelist())
+                duplicates = {}
+                if root + '.pageforge-duplicates.json' in available:
+                    duplicates = json.loads(zipf.read(root + '.pageforge-duplicates.json'))['files']
+                for rel in sorted(names):
+                    # Doublon livré une seule fois : lu depuis sa source
+                    info = zipf.getinfo(root + (rel if root + rel in available else duplicates[rel]))
+                    mtime = time.mktime(info.date_time + (0, 0, -1))
+                    with zipf.open(info) as source:
+                        yield rel, source, (info.external_attr >> 16) & 0o7777 or 0o644, mtime
+            return
+        
+        remaining = set(names)
+        with gzip.GzipFile(fileobj=io.BufferedReader(archive)) as stream, tarfile.open(fileobj=stream, mode='r|') as tar:
+            for member in tar:
+                if not remaining:
+                    break
+                rel = member.name[len(root):]
+                if rel not in remaining:
+                    continue
+                remaining.discard(rel)
+                if member.islnk():
+                    link = member.linkname[len(root):]
+                    with open(written.get(link, dest / link), 'rb') as source:
+                        yield rel, source, member.mode, member.mtime
+                elif member.isfile():
+                    yield rel, tar.extractfile(member), member.mode, member.mtime
+    
+    def sync_installation(self, target, dest, dry_run=False, previous_manifest=None):
+        """Applique le package d'une cible sur une installation existante en n'écrivant que les différences.
+
+        Les fichiers modifiés sont d'abord tous écrits et vérifiés en temporaires à côté
+        de leur cible, puis mis en place un par un par renommage atomique ; l'état de
+        synchronisation, écrit en dernier, valide le passage. Le reste de l'installation
+        (fichiers inchangés, données créées par l'application) n'est jamais touché.
+        Les fichiers à supprimer sont ceux du paquet
+        précédent, connus par l'état de synchronisation ou par `previous_manifest`
+        (manifeste de la version installée) dès la première synchronisation ;
+        l'état (taille, mtime, SHA-256) évite de relire les fichiers inchangés.
+        """
+        archive_name = self.archive_name(target)
+        manifest_path = self.packages_dir / f'{archive_name}.manifest.json'
+        if not self.archive_exists(archive_name) or not manifest_path.exists():
+            raise FileNotFoundError(f"{archive_name} ou son manifeste introuvable dans {self.packages_dir}")
+        
+        start = time.perf_counter()
+        dest = Path(dest).absolute()
+        root = f'pageforge-{target}-v{self.version}/'
+        # Métadonnées d'archive et installateurs (supprimés après installation) ne sont pas synchronisés
+        skipped = {'.pageforge-layout.json', '.pageforge-duplicates.json', SEGMENT_INDEX_NAME,
+                   'install.php', 'install-cpanel.php', 'install-database.php', 'setup.php'}
+        wanted = {
+            m['path'][len(root):]: m
+            for m in json.loads(manifest_path.read_text(encoding='utf-8'))['members']
+            if m['path'].startswith(root) and m['path'][len(root):] not in skipped
+        }
+        
+        state_path = dest / '.pageforge-sync.json'
+        state = json.loads(state_path.read_text(encoding='utf-8'))['files'] if state_path.exists() else {}
+        
+        # Comparaison : stat d'abord, empreinte seulement si le stat diffère de l'état connu
+        changed = []
+        hashed = 0
+        files = {}
+        for rel, member in sorted(wanted.items()):
+            path = dest / rel
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                changed.append(rel)
+                continue
+            if stat.st_size != member['size']:
+                changed.append(rel)
+                continue
+            known = state.get(rel)
+            if known and known['size'] == stat.st_size and known['mtime_ns'] == stat.st_mtime_ns:
+                sha256 = known['sha256']
+            else:
+                sha256 = file_sha256(path)
+                hashed += 1
+            if sha256 != member['sha256']:
+                changed.append(rel)
+            else:
+                files[rel] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': sha256}
+        
+        # Seuls les fichiers du paquet précédent peuvent être supprimés (jamais les données de l'hôte)
+        previous = set(state)
+        if previous_manifest:
+            for member in json.loads(Path(previous_manifest).read_text(encoding='utf-8'))['members']:
+                _, _, rel = member['path'].partition('/')
+                if rel and rel not in skipped:
+                    previous.add(rel)
+        removed = sorted(rel for rel in previous if rel not in wanted and (dest / rel).is_file())
+        added = sum(1 for rel in changed if not (dest / rel).exists())
+        
+        result = {
+            'target': target,
+            'changed': len(changed) - added,
+            'added': added,
+            'removed': len(removed),
+            'unchanged': len(files),
+            'hashed': hashed,
+            'written_bytes': sum(wanted[rel]['size'] for rel in changed),
+        }
+        if dry_run:
+            for rel in changed:
+                print(f"  {'+' if not (dest / rel).exists() else '~'} {rel}")
+            for rel in removed:
+                print(f"  - {rel}")
+            result['seconds'] = round(time.perf_counter() - start, 3)
+            return result
+        
+        state_data = {
+            'target': target,
+            'version': self.version,
+            'archive': archive_name,
+            'synced_at': datetime.now().isoformat(timespec='seconds'),
+            'files': files,
+        }
+        if not changed and not removed:
+            atomic_write(state_path, json.dumps(state_data, indent=1).encode('utf-8'))
+            result['seconds'] = round(time.perf_counter() - start, 3)
+            return result
+        
+        # Écriture des temporaires à côté de leur cible : une erreur ici laisse l'installation intacte
+        pending = {}
+        created_dirs = []
+        archive = self.open_archive(archive_name)
+        try:
+            for rel, source, mode, mtime in self.iter_sync_sources(archive_name, archive, root, set(changed), dest, pending):
+                path = dest / rel
+                if Path(rel).is_absolute() or '..' in Path(rel).parts:
+                    raise ValueError(f"Chemin de membre dangereux: {rel}")
+                missing_dirs = [parent for parent in path.parents if not parent.exists()]
+                path.parent.mkdir(parents=True, exist_ok=True)
+                created_dirs.extend(reversed(missing_dirs))
+                tmp_path = path.with_name(f'.{path.name}.pageforge-sync')
+                pending[rel] = tmp_path
+                digest = hashlib.sha256()
+                with open(tmp_path, 'wb') as out:
+                    for chunk in iter(lambda: source.read(1024 * 1024), b''):
+                        digest.update(chunk)
+                        out.write(chunk)
+                if digest.hexdigest() != wanted[rel]['sha256']:
+                    raise ValueError(f"Contenu différent du manifeste: {rel}")
+                os.chmod(tmp_path, mode)
+                os.utime(tmp_path, (mtime, mtime))
+            missing = set(changed) - set(pending)
+            if missing:
+                raise ValueError(f"{len(missing)} membre(s) absent(s) de l'archive, ex. {sorted(missing)[0]}")
+        except BaseException:
+            for tmp_path in pending.values():
+                tmp_path.unlink(missing_ok=True)
+            for directory in reversed(created_dirs):
+                try:
+                    directory.rmdir()
+                except OSError:
+                    pass
+            raise
+        finally:
+            archive.close()
+        
+        # Mise en place : un renommage atomique par fichier, jamais de fichier à moitié écrit
+        for rel, tmp_path in sorted(pending.items()):
+            path = dest / rel
+            os.replace(tmp_path, path)
+            stat = path.stat()
+            files[rel] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': wanted[rel]['sha256']}
+        for rel in removed:
+            (dest / rel).unlink(missing_ok=True)
+            parent = (dest / rel).parent
+            while parent != dest and not any(parent.iterdir()):
+                parent.rmdir()
+                parent = parent.parent
+        
+        # L'état, écrit en dernier, valide la synchronisation (interrompue, elle est reprise au passage suivant)
+        atomic_write(state_path, json.dumps(state_data, indent=1).encode('utf-8'))
+        result['seconds'] = round(time.perf_counter() - start, 3)
+        return result
+    
+    def archive_to_store(self, store_dir):
+        print("🗄️  Archivage dans le store dédupliqué...")
+        store = ChunkStore(store_dir)
+        new_bytes = 0
+        for target in self.targets:
+            archive_name = self.archive_name(target)
+            if self.archive_exists(archive_name):
+                with self.open_archive(archive_name) as archive:
+                    new_bytes += store.put(archive_name, replace=True, data=archive.read())['new_bytes']
+        
+        logical, stored = store.stats()
+        self.report['store'] = {
+            'dir': str(store.root),
+            'new_bytes': new_bytes,
+            'logical_bytes': logical,
+            'stored_bytes': stored,
+            'dedup_ratio': round(logical / stored, 2) if stored else None,
+        }
+        print(f"✅ Store: +{self.format_size(new_bytes)}, ratio de déduplication "
+              f"{self.report['store']['dedup_ratio']}x")
+    
+    @property
+    def history_path(self):
+        return Path(self.options['history_db'] or self.packages_dir / '.build-history.sqlite')
+    
+    def record_build_history(self):
+        """Ajoute les métriques du build à l'historique et les compare à la référence glissante"""
+        targets = {}
+        contributors = {}
+        for target in self.targets:
+            archive_name = self.archive_name(target)
+            manifest_path = self.packages_dir / f'{archive_name}.manifest.json'
+            if not self.archive_exists(archive_name) or not manifest_path.is_file():
+                continue
+            members = json.loads(manifest_path.read_text(encoding='utf-8'))['members']
+            targets[target] = dict(
+                self.report.get('targets', {}).get(target, {}),
+                archive_bytes=self.archive_size(archive_name),
+                uncompressed_bytes=sum(m['size'] for m in members),
+                files=len(members),
+            )
+            largest = sorted(members, key=lambda m: m['size'], reverse=True)[:10]
+            contributors[target] = [(m['path'], m['size']) for m in largest]
+        
+        phases = {f'target:{name}': t['seconds'] for name, t in targets.items() if 'seconds' in t}
+        for section, value in self.report.items():
+            if isinstance(value, dict):
+                seconds = value.get('seconds', value.get('tail_seconds'))
+                if isinstance(seconds, (int, float)):
+                    phases[section] = seconds
+        
+        history = BuildHistory(self.history_path)
+        try:
+            window = self.options['history_window']
+            regressions = []
+            for name, metrics in targets.items():
+                checks = [('archive_bytes', self.options['size_regression'])]
+                if not metrics.get('cached'):
+                    checks.append(('seconds', self.options['time_regression']))
+                for column, threshold in checks:
+                    baseline = history.baseline(name, column, window)
+                    value = metrics.get(column)
+                    # Les durées de moins d'une seconde sont trop bruitées pour être comparées
+                    if not baseline or value is None or (column == 'seconds' and value < 1.0):
+                        continue
+                    if value > baseline * (1 + threshold):
+                        regressions.append({
+                            'target': name,
+                            'metric': column,
+                            'value': value,
+                            'baseline': baseline,
+                            'ratio': round(value / baseline, 3),
+                            'threshold': threshold,
+                        })
+            
+            build_baseline = history.build_baseline(window)
+            build_seconds = self.report.get('build_seconds', 0)
+            if build_baseline and build_seconds >= 1.0 and build_seconds > build_baseline * (1 + self.options['time_regression']):
+                regressions.append({
+                    'target': None,
+                    'metric': 'build_seconds',
+                    'value': build_seconds,
+                    'baseline': build_baseline,
+                    'ratio': round(build_seconds / build_baseline, 3),
+                    'threshold': self.options['time_regression'],
+                })
+            
+            try:
+                git_commit = subprocess.run(
+                    ['git', 'rev-parse', 'HEAD'], cwd=self.base_dir, capture_output=True, text=True, timeout=10
+                ).stdout.strip() or None
+            except (OSError, subprocess.SubprocessError):
+                git_commit = None
+            
+            run_id = history.record(self.version, git_commit, build_seconds, targets, phases, contributors, len(regressions))
+        finally:
+            history.close()
+        
+        self.report['history'] = {'db': str(self.history_path), 'run_id': run_id, 'window': window}
+        self.report['regressions'] = regressions
+        for regression in regressions:
+            what = f"{regression['target']} {regression['metric']}" if regression['target'] else regression['metric']
+            print(f"⚠️  Régression {what}: x{regression['ratio']} par rapport à la référence "
+                  f"(seuil +{regression['threshold']:.0%})")
+        return regressions
+    
+    def print_history(self, target=None):
+        """Affiche l'évolution des tailles et durées d'une version à l'autre"""
+        if not self.history_path.exists():
+            print(f"❌ Aucun historique ({self.history_path})")
+            return
+        
+        history = BuildHistory(self.history_path)
+        try:
+            rows = history.trends(target)
+            print(f"📈 Historique des builds ({self.history_path})")
+            print(f"{'Version':<10} {'Cible':<8} {'Runs':>4} {'Archive':>10} {'Δ':>7} {'Fichiers':>8} {'Durée':>8} {'Build':>8}")
+            previous = {}
+            for version, name, runs, size, files, seconds, build_seconds, _ in rows:
+                delta = f"{(size / previous[name] - 1):+.0%}" if previous.get(name) else ''
+                previous[name] = size
+                duration = f"{seconds:.2f}s" if seconds is not None else '-'
+                print(f"{version:<10} {name:<8} {runs:>4} {self.format_size(size):>10} {delta:>7} "
+                      f"{files:>8.0f} {duration:>8} {build_seconds:>7.2f}s")
+            
+            for name in ([target] if target else self.targets):
+                top = history.top_contributors(name, 5)
+                if top:
+                    print(f"\n📦 {name} : plus gros fichiers (dernier build)")
+                    for path, size in top:
+                        print(f"   {self.format_size(size):>10}  {path}")
+        finally:
+            history.close()
+    
+    def analyze_packages(self, print_treemap=True):
+        """Décompose chaque archive par dossier, extension et fichier (SIZE-ANALYSIS.json/.txt)"""
+        analyses = {}
+        for target in self.targets:
+            archive_name = self.archive_name(target)
+            if self.archive_exists(archive_name):
+                with self.open_archive(archive_name) as archive:
+                    analyses[target] = analyze_archive(self.packages_dir / archive_name, archive)
+        
+        text = []
+        for target, analysis in analyses.items():
+            directories = {}
+            extensions = {}
+            for entry in analysis['files']:
+                parts = entry['path'].split('/')
+                for depth in range(1, len(parts)):
+                    bucket = directories.setdefault('/'.join(parts[:depth]) + '/', [0, 0, 0])
+                    bucket[0] += entry['compressed']
+                    bucket[1] += entry['uncompressed']
+                    bucket[2] += 1
+                extension = Path(entry['path']).suffix.lower() or '(aucune)'
+                bucket = extensions.setdefault(extension, [0, 0, 0])
+                bucket[0] += entry['compressed']
+                bucket[1] += entry['uncompressed']
+                bucket[2] += 1
+            
+            def as_rows(buckets):
+                return [{'path': k, 'compressed': v[0], 'uncompressed': v[1], 'files': v[2]}
+                        for k, v in sorted(buckets.items(), key=lambda item: item[1][0], reverse=True)]
+            
+            analysis['directories'] = as_rows(directories)
+            analysis['extensions'] = as_rows(extensions)
+            text.extend(self.render_size_treemap(analysis))
+            text.append('')
+        
+        (self.packages_dir / 'SIZE-ANALYSIS.json').write_text(json.dumps(analyses, indent=1), encoding='utf-8')
+        (self.packages_dir / 'SIZE-ANALYSIS.txt').write_text('\n'.join(text), encoding='utf-8')
+        if print_treemap:
+            print('\n'.join(text))
+        return analyses
+    
+    def render_size_treemap(self, analysis, max_depth=3, min_share=0.01, width=24):
+        """Arborescence texte des tailles compressées, avec barres proportionnelles"""
+        total = analysis['archive_bytes']
+        lines = [f"📦 {analysis['archive']}  {self.format_size(total)} compressés / "
+                 f"{self.format_size(analysis['uncompressed_bytes'])} décompressés"]
+        
+        tree = {}
+        for entry in analysis['files']:
+            node = tree
+            parts = entry['path'].split('/')
+            for depth, part in enumerate(parts):
+                name = part + ('/' if depth < len(parts) - 1 else '')
+                child = node.setdefault(name, {'compressed': 0, 'uncompressed': 0, 'children': {}})
+                child['compressed'] += entry['compressed']
+                child['uncompressed'] += entry['uncompressed']
+                node = child['children']
+        
+        def render(children, depth):
+            hidden = [0, 0]
+            for name, child in sorted(children.items(), key=lambda item: item[1]['compressed'], reverse=True):
+                share = child['compressed'] / total if total else 0
+                if share < min_share:
+                    hidden[0] += 1
+                    hidden[1] += child['compressed']
+                    continue
+                bar = '█' * round(share * width)
+                label = '  ' * depth + name
+                lines.append(f"  {label:<48} {self.format_size(child['compressed']):>10} {share:>6.1%} "
+                             f"{bar:<{width}} ({self.format_size(child['uncompressed'])})")
+                if depth + 1 < max_depth:
+                    render(child['children'], depth + 1)
+            if hidden[0]:
+                label = '  ' * depth + f"… {hidden[0]} autre(s)"
+                lines.append(f"  {label:<48} {self.format_size(hidden[1]):>10}")
+        
+        render(tree, 0)
+        if analysis['overhead_bytes'] > 0:
+            lines.append(f"  {'(en-têtes et index)':<48} {self.format_size(analysis['overhead_bytes']):>10}")
+        
+        lines.append("  Par extension :")
+        for row in analysis['extensions'][:8]:
+            lines.append(f"    {row['path']:<12} {self.format_size(row['compressed']):>10} "
+                         f"({self.format_size(row['uncompressed'])}, {row['files']} fichiers)")
+        return lines
+    
+    def load_size_budgets(self):
+        """Budgets par cible (build-scripts/package-budgets.json ou --budgets)"""
+        path = self.options['budgets']
+        if not path or not Path(path).is_file():
+            return {}
+        return json.loads(Path(path).read_text(encoding='utf-8'))
+    
+    def check_size_budgets(self, analyses, budgets):
+        """Compare chaque archive à ses budgets et nomme les chemins fautifs"""
+        violations = []
+        
+        def matches(path, pattern):
+            if pattern.startswith('*.'):
+                return path.lower().endswith(pattern[1:].lower())
+            return path == pattern or path.startswith(pattern.rstrip('/') + '/')
+        
+        for target, analysis in analyses.items():
+            budget = budgets.get(target)
+            if not budget:
+                continue
+            ignored = budget.get('ignore', [])
+            files = [e for e in analysis['files'] if not any(matches(e['path'], p) for p in ignored)]
+            
+            checks = []
+            if 'archive' in budget:
+                checks.append(('archive', 'compressed', parse_size(budget['archive']), files))
+            for kind in ('compressed', 'uncompressed'):
+                for pattern, limit in budget.get(kind, {}).items():
+                    checks.append((pattern, kind, parse_size(limit), [e for e in files if matches(e['path'], pattern)]))
             
-        except Exception as e:
-            print(f"❌ Erreur: {e}")
-            exit(1)
+            for pattern, kind, limit, selected in checks:
+                used = sum(e[kind] for e in selected)
+                if pattern == 'archive':
+                    used += analysis['overhead_bytes']
+                if used <= limit:
+                    continue
+                offenders = sorted(selected, key=lambda e: e[kind], reverse=True)[:5]
+                violations.append({
+                    'target': target,
+                    'budget': pattern,
+                    'kind': kind,
+                    'limit': limit,
+                    'used': used,
+                    'offenders': [{'path': e['path'], 'bytes': e[kind]} for e in offenders],
+                })
+        
+        for violation in violations:
+            print(f"❌ Budget {violation['target']} « {violation['budget']} » ({violation['kind']}) dépassé : "
+                  f"{self.format_size(violation['used'])} > {self.format_size(violation['limit'])}")
+            for offender in violation['offenders']:
+                print(f"     - {offender['path']} ({self.format_size(offender['bytes'])})")
+        
+        self.report['size_budgets'] = {'file': str(self.options['budgets']), 'violations': violations}
+        return violations
+    
+    def write_build_report(self):
+        if self.report:
+            (self.packages_dir / 'BUILD-REPORT.json').write_text(
+                json.dumps(self.report, indent=2), encoding='utf-8'
+            )
     
     def cleanup_old_packages(self):
         print("🧹 Nettoyage des anciens packages...")
@@ -84,7 +4683,7 @@ class PageForgePackageGenerator:
             for item in self.packages_dir.iterdir():
                 if item.is_dir() and 'pageforge-' in item.name:
                     shutil.rmtree(item)
-                elif item.is_file() and item.suffix in ['.zip', '.tar.gz']:
+                elif item.is_file() and item.name.startswith('pageforge-'):
                     item.unlink()
         
         print("✅ Nettoyage terminé")
@@ -99,7 +4698,7 @@ class PageForgePackageGenerator:
         self.copy_project_files(package_dir, 'production')
         
         # Installateur cPanel spécifique
-        shutil.copy2(self.build_scripts_dir / 'install-cpanel.php', package_dir / 'install-cpanel.php')
+        self.copy_installer('install-cpanel.php', package_dir / 'install-cpanel.php')
         
         # Documentation
         self.create_cpanel_readme(package_dir)
@@ -122,6 +4721,13 @@ class PageForgePackageGenerator:
         # Instructions rapides
         self.create_cpanel_instructions(package_dir)
         
+        # Variantes précompressées des assets statiques + règles Apache
+        if self.options['precompress']:
+            precompressed = self.precompress_static_assets(package_dir)
+        else:
+            precompressed = {}
+        self.create_cpanel_htaccess(package_dir, precompressed)
+        
         # Créer l'archive ZIP
         self.create_zip_archive(package_dir, f'pageforge-cpanel-v{self.version}.zip')
         
@@ -137,7 +4743,7 @@ class PageForgePackageGenerator:
         self.copy_project_files(package_dir, 'local')
         
         # Installateur local
-        shutil.copy2(self.build_scripts_dir / 'install-local.php', package_dir / 'install.php')
+        self.copy_installer('install-local.php', package_dir / 'install.php')
         
         # Documentation Windows
         self.create_windows_readme(package_dir)
@@ -178,7 +4784,7 @@ class PageForgePackageGenerator:
         self.copy_project_files(package_dir, 'local')
         
         # Installateur local
-        shutil.copy2(self.build_scripts_dir / 'install-local.php', package_dir / 'install.php')
+        self.copy_installer('install-local.php', package_dir / 'install.php')
         
         # Documentation
         self.create_linux_readme(package_dir)
@@ -256,12 +4862,710 @@ class PageForgePackageGenerator:
         self.create_project_structure(target_dir)
         
         # Copier les fichiers selon le type
-        if package_type == 'production':
-            self.copy_production_files(target_dir)
-        elif package_type == 'local':
-            self.copy_local_files(target_dir)
-        elif package_type == 'development':
-            self.copy_development_files(target_dir)
+        with self.span('copy', 'phase', package_type=package_type) as span:
+            copied = self._copy_bytes
+            if package_type == 'production':
+                self.copy_production_files(target_dir)
+            elif package_type == 'local':
+                self.copy_local_files(target_dir)
+            elif package_type == 'development':
+                self.copy_development_files(target_dir)
+            span['bytes'] = self._copy_bytes - copied
+        
+        # dist/ compilé une fois pour toutes au lieu d'un build sur chaque hébergement
+        if self.options['prebuild'] and package_type in ('production', 'local') and self.planning is None:
+            self.embed_prebuild(target_dir)
+        
+        # Images PNG optimisées sans perte
+        if self.options['optimize_images'] and package_type in ('production', 'local'):
+            self.optimize_package_images(target_dir)
+        
+        # Noms à empreinte de contenu (après les images : l'empreinte porte sur le fichier livré)
+        if self.options['hash_assets'] and package_type in ('production', 'local'):
+            self.fingerprint_static_assets(target_dir)
+        
+        # Indications preload dans les pages d'entrée (après l'empreinte : URL définitives)
+        if self.options['preload_hints'] and package_type in ('production', 'local'):
+            self.inject_preload_hints(target_dir)
+        
+        # Base SQLite pré-migrée pour les packages d'installation
+        if self.options['db_snapshot'] and package_type in ('production', 'local'):
+            self.embed_database_snapshot(target_dir)
+        
+        # Dépendances npm vendorisées pour une installation hors ligne
+        if self.options['npm_offline'] and package_type in ('production', 'local'):
+            self.embed_npm_offline_bundle(target_dir)
+    
+    @property
+    def stage_cache(self):
+        if self._stage_cache is None:
+            self._stage_cache = ArtifactCache(self.packages_dir / '.build-cache', self.options['cache_max_size'])
+        return self._stage_cache
+    
+    def build_database_snapshot(self):
+        """Produit (ou reprend du cache) une base SQLite vierge avec le schéma initialisé.
+
+        La clé ne dépend que de shared/schema.ts : le snapshot n'est reconstruit
+        que lorsque le schéma change.
+        """
+        if self._db_snapshot is not None:
+            return self._db_snapshot
+        
+        start = time.perf_counter()
+        schema = (self.base_dir / 'shared' / 'schema.ts').read_bytes()
+        schema_sha256 = hashlib.sha256(schema).hexdigest()
+        key = hashlib.sha256(b'sqlite-snapshot-v1\0' + schema).hexdigest()
+        
+        cached = self.stage_cache.get_bytes('stages', key)
+        if cached:
+            data, meta = cached
+        else:
+            statements = drizzle_schema_to_sqlite(schema.decode('utf-8'))
+            with tempfile.TemporaryDirectory(prefix='pageforge-db-') as tmp:
+                db_path = Path(tmp) / 'snapshot.sqlite'
+                connection = sqlite3.connect(db_path)
+                try:
+                    connection.execute('PRAGMA journal_mode=DELETE')
+                    for statement in statements:
+                        connection.execute(statement)
+                    connection.execute('CREATE TABLE "__pageforge_snapshot" ("schema_sha256" TEXT NOT NULL, "generator" TEXT NOT NULL)')
+                    connection.execute('INSERT INTO "__pageforge_snapshot" VALUES (?, ?)', (schema_sha256, self.version))
+                    connection.commit()
+                    connection.execute('VACUUM')
+                finally:
+                    connection.close()
+                data = db_path.read_bytes()
+            tables = [re.match(r'CREATE TABLE "(\w+)"', statement).group(1) for statement in statements]
+            meta = {'schema_sha256': schema_sha256, 'tables': tables}
+            self.stage_cache.put_bytes('stages', key, data, meta)
+        
+        self._db_snapshot = (data, meta)
+        self.report['db_snapshot'] = {
+            'schema_sha256': schema_sha256,
+            'size': len(data),
+            'tables': meta['tables'],
+            'cached': bool(cached),
+            'seconds': round(time.perf_counter() - start, 3),
+        }
+        print(f"  🗃️  Snapshot SQLite {'réutilisé' if cached else 'construit'} "
+              f"({len(meta['tables'])} tables, {self.format_size(len(data))})")
+        return self._db_snapshot
+    
+    def run_prebuild(self):
+        """Exécute la commande de build une seule fois et met dist/ en cache.
+
+        La clé couvre la commande, les configurations, le lockfile et les sources
+        (client, server, shared, attached_assets) : tant qu'ils ne changent pas,
+        dist/ est repris du cache sans relancer Node. Le build tourne dans une
+        copie temporaire de ces fichiers (node_modules lié) : le dist/ du dépôt
+        n'est jamais supprimé ni réécrit.
+        """
+        if self._prebuild is not None:
+            return self._prebuild
+        
+        start = time.perf_counter()
+        command = self.options['build_command']
+        digest = hashlib.sha256(f'prebuild-v1\0{command}\n'.encode('utf-8'))
+        sources = [self.base_dir / name for name in self.config_files + ['package-lock.json']]
+        sources = [path for path in sources if path.exists()]
+        for folder in ('client', 'server', 'shared'):
+            if (self.base_dir / folder).exists():
+                sources.extend(self.iter_filtered_files(self.base_dir / folder))
+        if (self.base_dir / 'attached_assets').exists():
+            sources.extend(sorted(p for p in (self.base_dir / 'attached_assets').rglob('*') if p.is_file()))
+        for path in sources:
+            digest.update(f"{path.relative_to(self.base_dir).as_posix()}\0{self.file_digest(path)}\n".encode('utf-8'))
+        key = digest.hexdigest()
+        
+        cached = self.stage_cache.get_bytes('stages', key)
+        if cached:
+            data, meta = cached
+            print(f"  ♻️  dist/ repris du cache ({meta['files']} fichiers)")
+        else:
+            with tempfile.TemporaryDirectory(prefix='pageforge-prebuild-') as staging:
+                staging = Path(staging)
+                for path in sources:
+                    dest = staging / path.relative_to(self.base_dir)
+                    dest.parent.mkdir(parents=True, exist_ok=True)
+                    shutil.copy2(path, dest)
+                if (self.base_dir / 'node_modules').is_dir():
+                    (staging / 'node_modules').symlink_to(self.base_dir / 'node_modules', target_is_directory=True)
+                
+                dist_dir = staging / 'dist'
+                print(f"  🔨 Build: {command}")
+                env = dict(os.environ, NODE_ENV='production')
+                result = subprocess.run(command, shell=True, cwd=staging, env=env)
+                if result.returncode != 0:
+                    raise RuntimeError(f"Commande de build en échec (code {result.returncode}) : {command}")
+                if not (dist_dir / 'index.js').exists():
+                    raise RuntimeError("Le build n'a pas produit dist/index.js")
+                
+                files = sorted(p for p in dist_dir.rglob('*') if p.is_file())
+                buffer = io.BytesIO()
+                with tarfile.open(fileobj=buffer, mode='w:gz', compresslevel=self.options['compression_level']) as tar:
+                    for path in files:
+                        info = tar.gettarinfo(path, path.relative_to(staging).as_posix())
+                        info.uid = info.gid = 0
+                        info.uname = info.gname = ''
+                        with open(path, 'rb') as f:
+                            tar.addfile(info, f)
+                data = buffer.getvalue()
+                meta = {'command': command, 'files': len(files), 'bytes': sum(p.stat().st_size for p in files)}
+            self.stage_cache.put_bytes('stages', key, data, meta)
+            print(f"  ✅ dist/ compilé ({meta['files']} fichiers, {self.format_size(meta['bytes'])})")
+        
+        self._prebuild = (key, data, meta)
+        self.report['prebuild'] = {
+            'key': key,
+            'command': command,
+            'cached': bool(cached),
+            'files': meta['files'],
+            'bytes': meta['bytes'],
+            'seconds': round(time.perf_counter() - start, 3),
+        }
+        return self._prebuild
+    
+    def embed_prebuild(self, target_dir):
+        with self.span('prebuild', 'phase') as span:
+            key, data, meta = self.run_prebuild()
+            span['bytes'] = len(data)
+        with tarfile.open(fileobj=io.BytesIO(data), mode='r:gz') as tar:
+            for member in tar.getmembers():
+                if not member.isfile() or member.name.startswith('/') or '..' in Path(member.name).parts:
+                    continue
+                dest = target_dir / member.name
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                with tar.extractfile(member) as src, open(dest, 'wb') as dst:
+                    shutil.copyfileobj(src, dst)
+                os.utime(dest, (member.mtime, member.mtime))
+        
+        info = {
+            'key': key,
+            'command': meta['command'],
+            'files': meta['files'],
+            'sources_included': self.options['prebuild_sources'],
+            'start': 'NODE_ENV=production node dist/index.js',
+            'install': "dist/ est déjà compilé : npm ci --omit=dev puis démarrer dist/index.js (pas de npm run build)",
+        }
+        (target_dir / 'prebuild.json').write_text(json.dumps(info, indent=2), encoding='utf-8')
+    
+    def optimize_package_images(self, target_dir):
+        """Optimise les PNG des assets livrés (client/public, dist/public) ; résultats mis en cache par empreinte"""
+        start = time.perf_counter()
+        images = []
+        for root in self.static_asset_roots:
+            path = target_dir / root
+            if path.is_dir():
+                images.extend(p for p in sorted(path.rglob('*')) if p.is_file() and p.suffix.lower() == '.png')
+        if not images:
+            return
+        self.stage_cache  # instancié avant les threads
+        
+        def optimize(path):
+            data = path.read_bytes()
+            key = 'png-v1-' + hashlib.sha256(data).hexdigest()
+            cached = self.stage_cache.get_bytes('stages', key)
+            if cached:
+                optimized, meta = cached
+                hit = True
+            else:
+                optimized = optimize_png(data) or b''
+                self.stage_cache.put_bytes('stages', key, optimized, {'source_bytes': len(data)})
+                hit = False
+            # Entrée vide : le fichier ne diminue pas, il est gardé tel quel
+            if optimized:
+                stat = path.stat()
+                path.write_bytes(optimized)
+                os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+            return len(data), len(optimized) or len(data), hit
+        
+        with self.span('optimize-images', 'phase') as span, \
+                ThreadPoolExecutor(max_workers=self.worker_count(os.cpu_count() or 1)) as executor:
+            results = list(executor.map(optimize, images))
+            span['bytes'] = sum(r[0] for r in results)
+            span['saved_bytes'] = span['bytes'] - sum(r[1] for r in results)
+        
+        before = sum(r[0] for r in results)
+        after = sum(r[1] for r in results)
+        stats = self.report.setdefault('images', {'files': 0, 'optimized': 0, 'cached': 0,
+                                                  'bytes_before': 0, 'bytes_after': 0, 'seconds': 0.0})
+        stats['files'] += len(results)
+        stats['optimized'] += sum(1 for r in results if r[1] < r[0])
+        stats['cached'] += sum(1 for r in results if r[2])
+        stats['bytes_before'] += before
+        stats['bytes_after'] += after
+        stats['saved_bytes'] = stats['bytes_before'] - stats['bytes_after']
+        stats['seconds'] = round(stats['seconds'] + time.perf_counter() - start, 3)
+        print(f"  🖼️  {len(results)} PNG: {self.format_size(before - after)} économisés "
+              f"({sum(1 for r in results if r[2])} depuis le cache, {time.perf_counter() - start:.2f}s)")
+    
+    def fingerprint_static_assets(self, target_dir):
+        """Renomme les assets statiques en `nom.<empreinte>.ext` et réécrit leurs références.
+
+        Les références sont réécrites dans client/index.html, client/src et les fichiers
+        texte des dossiers publics ; un CSS ou un JS est haché après réécriture de ses
+        propres références (l'empreinte d'une feuille de style change avec ses images).
+        Les fichiers déjà hachés par Vite (dist/public/assets) sont laissés tels quels.
+        Écrit asset-manifest.json à la racine du package (assets renommés et fichiers
+        Vite), même si rien n'est renommé.
+        """
+        start = time.perf_counter()
+        extensions = '|'.join(sorted(ext.lstrip('.') for ext in self.hashable_extensions))
+        reference = re.compile(rf'(?<=["\'(\s=,`])([^"\'()\s<>`,]+?\.(?:{extensions}))(?=[?#"\')\s>,`])', re.I)
+        hashed = re.compile(r'\.[0-9a-f]{10}\.[^.]+$')
+        vite_hashed = re.compile(r'-[A-Za-z0-9_-]{8}\.[^.]+$')
+        
+        # URL publique de chaque asset renommable, par dossier public
+        assets = {}
+        vite_files = {}
+        for root in ('client/public', 'dist/public'):
+            root_dir = target_dir / root
+            if not root_dir.is_dir():
+                continue
+            for path in sorted(root_dir.rglob('*')):
+                if not path.is_file() or path.suffix.lower() not in self.hashable_extensions:
+                    continue
+                relative = path.relative_to(root_dir)
+                if root == 'dist/public' and relative.parts[0] == 'assets' and vite_hashed.search(path.name):
+                    vite_files[path] = '/' + relative.as_posix()
+                elif path.name not in self.fixed_asset_names and not hashed.search(path.name):
+                    assets[path] = '/' + relative.as_posix()
+        
+        def public_root(path):
+            relative = path.relative_to(target_dir).as_posix()
+            return target_dir / ('dist/public' if relative.startswith('dist/') else 'client/public')
+        
+        def resolve(path, token):
+            """Asset désigné par une référence trouvée dans `path` (absolue ou relative)"""
+            url = token.split('?', 1)[0]
+            if '://' in url or url.startswith(('//', 'data:')):
+                return None
+            base = public_root(path) if url.startswith('/') else path.parent
+            return Path(os.path.normpath(base / url.lstrip('/')))
+        
+        renamed = {}
+        
+        def rewrite(path, text):
+            def replace(match):
+                token = match.group(1)
+                target = resolve(path, token)
+                if target in renamed and token.endswith(target.name):
+                    return token[:-len(target.name)] + renamed[target].name
+                return token
+            return reference.sub(replace, text)
+        
+        def references(path, text):
+            return {target for target in (resolve(path, m.group(1)) for m in reference.finditer(text))
+                    if target in assets and target != path}
+        
+        def assign(path, data):
+            digest = hashlib.sha256(data).hexdigest()
+            renamed[path] = path.with_name(f'{path.stem}.{digest[:10]}{path.suffix}')
+            return digest
+        
+        # Binaires d'abord, puis les fichiers texte dont toutes les dépendances sont nommées
+        texts = {}
+        digests = {}
+        for path in assets:
+            if path.suffix.lower() in self.reference_extensions:
+                text = path.read_text(encoding='utf-8', errors='surrogateescape')
+                texts[path] = (text, references(path, text))
+            else:
+                digests[path] = assign(path, self.read_file(path))
+        contents = {}
+        while texts:
+            ready = [path for path, (text, deps) in texts.items() if deps <= renamed.keys()]
+            # Références circulaires : nommées avec ce qui est déjà connu
+            for path in ready or list(texts):
+                text = rewrite(path, texts.pop(path)[0])
+                contents[path] = text.encode('utf-8', errors='surrogateescape')
+                digests[path] = assign(path, contents[path])
+        
+        # Références dans les autres fichiers texte (HTML, manifestes, sources client)
+        rewritten = 0
+        candidates = [target_dir / 'client' / 'index.html']
+        for root in ('client/src', 'client/public', 'dist/public'):
+            root_dir = target_dir / root
+            if root_dir.is_dir():
+                candidates.extend(p for p in sorted(root_dir.rglob('*'))
+                                  if p.is_file() and p.suffix.lower() in self.reference_extensions)
+        for path in candidates:
+            if path in assets or not path.is_file() or path.stat().st_size > 32 * 1024 ** 2:
+                continue
+            text = path.read_text(encoding='utf-8', errors='surrogateescape')
+            updated = rewrite(path, text)
+            if updated != text:
+                stat = path.stat()
+                path.write_text(updated, encoding='utf-8', errors='surrogateescape')
+                os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+                rewritten += 1
+        
+        # Renommage effectif
+        manifest = {}
+        total = 0
+        for path, new_path in renamed.items():
+            if path in contents:
+                stat = path.stat()
+                new_path.write_bytes(contents[path])
+                os.utime(new_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+                path.unlink()
+            else:
+                os.replace(path, new_path)
+            size = new_path.stat().st_size
+            total += size
+            url = assets[path]
+            manifest[f'{public_root(path).relative_to(target_dir).as_posix()}{url}'] = {
+                'file': new_path.relative_to(target_dir).as_posix(),
+                'url': url[:-len(path.name)] + new_path.name,
+                'size': size,
+                'sha256': digests[path],
+            }
+        
+        # Fichiers déjà hachés par Vite : non renommés, mais immuables eux aussi
+        vite_manifest = {}
+        for path, url in vite_files.items():
+            data = self.read_file(path)
+            vite_manifest[f'dist/public{url}'] = {
+                'file': path.relative_to(target_dir).as_posix(),
+                'url': url,
+                'size': len(data),
+                'sha256': hashlib.sha256(data).hexdigest(),
+            }
+        
+        (target_dir / 'asset-manifest.json').write_text(json.dumps({
+            'version': 1,
+            'hash': 'sha256[:10]',
+            'pattern': r'\.[0-9a-f]{10}\.',
+            'assets': manifest,
+            'vite_assets': vite_manifest,
+        }, indent=2), encoding='utf-8')
+        
+        stats = {'files': len(renamed), 'bytes': total, 'references_rewritten': rewritten,
+                 'vite_assets': len(vite_manifest), 'seconds': round(time.perf_counter() - start, 3)}
+        self.report.setdefault('fingerprinted', {})[target_dir.name] = stats
+        if renamed:
+            print(f"  🔖 {len(renamed)} asset(s) à empreinte ({self.format_size(total)}), "
+                  f"{rewritten} fichier(s) de références réécrits, {len(vite_manifest)} déjà hachés par Vite")
+        else:
+            print(f"  ⚠️  --hash-assets : aucun asset à renommer dans client/public ni dist/public "
+                  f"({len(vite_manifest)} fichier(s) déjà hachés par Vite)")
+        return manifest
+    
+    def inject_preload_hints(self, target_dir, max_fonts=4, max_modules=16):
+        """Ajoute au <head> de dist/public/index.html des indications preload / modulepreload.
+
+        Le graphe part des <link rel="stylesheet"> et <script src> locaux de la page :
+        polices des feuilles de style (woff2 de préférence) et imports statiques des
+        modules d'entrée. Les feuilles de style du <head> d'au plus `inline_css_max`
+        octets sont intégrées dans un <style> (URL relatives réécrites). Retourne le
+        détail ajouté au rapport de build (None si la page est absente ou déjà traitée).
+        """
+        inline_max = self.options['inline_css_max']
+        tag_pattern = re.compile(r'<(link|script)\b([^>]*)>', re.I)
+        attr_pattern = re.compile(r'([\w:-]+)(?:\s*=\s*("[^"]*"|\'[^\']*\'|[^\s>]+))?')
+        font_pattern = re.compile(r'url\(\s*["\']?([^"\')]+?\.(woff2|woff|ttf|otf))(?:[?#][^"\')]*)?["\']?\s*\)', re.I)
+        import_pattern = re.compile(r'\b(?:import|export)\s*(?:[\w*{}\s,$]+?\s*from\s*)?["\']([^"\']+\.m?js)["\']')
+        css_url_pattern = re.compile(r'url\(\s*(["\']?)([^"\')]+)\1\s*\)')
+        font_types = {'woff2': 'font/woff2', 'woff': 'font/woff', 'ttf': 'font/ttf', 'otf': 'font/otf'}
+        
+        def attributes(raw):
+            return {name.lower(): (value or '').strip('"\'') for name, value in attr_pattern.findall(raw)}
+        
+        # Page construite par Vite : client/index.html désigne des sources (.tsx) que le navigateur ne charge pas
+        page_name = 'dist/public/index.html'
+        page = target_dir / page_name
+        root_dir = target_dir / 'dist/public'
+        if not page.is_file():
+            print(f"  ⚠️  --preload-hints : {page_name} absent du package, aucune indication ajoutée")
+            return None
+        html = page.read_text(encoding='utf-8')
+        head_end = html.lower().find('</head>')
+        if head_end < 0 or 'data-pageforge-preload' in html:
+            return None
+        
+        def local(url, base):
+            """Fichier du package désigné par une URL locale, sinon None"""
+            url = re.split(r'[?#]', url, 1)[0]
+            if not url or '://' in url or url.startswith(('//', 'data:')):
+                return None
+            path = Path(os.path.normpath((root_dir / url.lstrip('/')) if url.startswith('/') else (base.parent / url)))
+            return path if path.is_file() and target_dir in path.parents else None
+        
+        def public_url(path):
+            return '/' + path.relative_to(root_dir).as_posix() if root_dir in path.parents else None
+        
+        hints = {}
+        inlined = []
+        edits = []
+        existing = set()
+        for match in tag_pattern.finditer(html):
+            attrs = attributes(match.group(2))
+            if match.group(1).lower() == 'link' and {'preload', 'modulepreload'} & set(attrs.get('rel', '').lower().split()):
+                existing.add(attrs.get('href'))
+        
+        for match in tag_pattern.finditer(html):
+            tag, attrs = match.group(1).lower(), attributes(match.group(2))
+            if tag == 'link' and 'stylesheet' in attrs.get('rel', '').lower().split():
+                path = local(attrs.get('href', ''), page)
+                if not path:
+                    continue
+                css = path.read_text(encoding='utf-8', errors='replace')
+                
+                # Polices de la feuille de style : woff2 seulement s'il y en a
+                fonts = [(local(url, path), ext.lower()) for url, ext in font_pattern.findall(css)]
+                fonts = [(font, ext) for font, ext in fonts if font and public_url(font)]
+                if any(ext == 'woff2' for _, ext in fonts):
+                    fonts = [(font, ext) for font, ext in fonts if ext == 'woff2']
+                for font, ext in fonts[:max_fonts]:
+                    hints.setdefault(public_url(font), {'rel': 'preload', 'as': 'font', 'type': font_types[ext]})
+                
+                size = path.stat().st_size
+                if (inline_max and size <= inline_max and match.start() < head_end
+                        and '@import' not in css and not attrs.get('media')):
+                    def rebase(url_match):
+                        target = local(url_match.group(2), path)
+                        return f'url("{public_url(target)}")' if target and public_url(target) else url_match.group(0)
+                    edits.append((match.start(), match.end(),
+                                  f'<style data-pageforge-inline="{attrs["href"]}">{css_url_pattern.sub(rebase, css).strip()}</style>'))
+                    inlined.append({'href': attrs['href'], 'bytes': size})
+                elif match.start() > head_end:
+                    # Feuille de style du <body> : découverte tardive sans indication
+                    hints.setdefault(attrs['href'], {'rel': 'preload', 'as': 'style'})
+            
+            elif tag == 'script' and attrs.get('src'):
+                path = local(attrs['src'], page)
+                if not path:
+                    continue
+                if attrs.get('type', '').lower() != 'module':
+                    if match.start() > head_end:
+                        hints.setdefault(attrs['src'], {'rel': 'preload', 'as': 'script'})
+                    continue
+                # Module d'entrée (s'il est dans le <body>) puis ses imports statiques
+                if match.start() > head_end:
+                    hints.setdefault(attrs['src'], {'rel': 'modulepreload'})
+                queue_paths = [path]
+                seen = {path}
+                modules = 0
+                while queue_paths and modules < max_modules:
+                    module = queue_paths.pop(0)
+                    for url in import_pattern.findall(module.read_text(encoding='utf-8', errors='replace')):
+                        dependency = local(url, module)
+                        if dependency and dependency not in seen and public_url(dependency):
+                            seen.add(dependency)
+                            queue_paths.append(dependency)
+                            hints.setdefault(public_url(dependency), {'rel': 'modulepreload'})
+                            modules += 1
+        
+        hints = {href: hint for href, hint in hints.items() if href not in existing}
+        report = {
+            'hints': [dict(hint, href=href) for href, hint in hints.items()],
+            'inlined': inlined,
+            'existing': sorted(href for href in existing if href),
+        }
+        self.report.setdefault('preload', {})[f'{target_dir.name}/{page_name}'] = report
+        if not hints and not inlined:
+            print(f"  ⚠️  --preload-hints : rien à ajouter à {page_name} "
+                  f"({len(existing)} indication(s) déjà présente(s))")
+            return report
+        
+        lines = []
+        for href, hint in hints.items():
+            line = f'<link rel="{hint["rel"]}" href="{href}"'
+            if 'as' in hint:
+                line += f' as="{hint["as"]}"'
+            if 'type' in hint:
+                line += f' type="{hint["type"]}" crossorigin'
+            lines.append(line + ' data-pageforge-preload>')
+        if lines:
+            # Le plus tôt possible : juste après <meta charset> (ou <head>)
+            anchor = re.search(r'<meta\s+charset[^>]*>', html[:head_end], re.I) or re.search(r'<head\b[^>]*>', html, re.I)
+            position = anchor.end() if anchor else head_end
+            indent = re.search(r'[ \t]*$', html[:anchor.start()]).group(0) if anchor else '    '
+            edits.append((position, position, ''.join(f'\n{indent}{line}' for line in lines)))
+        for start, end, text in sorted(edits, reverse=True):
+            html = html[:start] + text + html[end:]
+        
+        stat = page.stat()
+        page.write_text(html, encoding='utf-8')
+        os.utime(page, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        
+        print(f"  ⚡ {page_name}: {len(hints)} indication(s) preload, {len(inlined)} CSS intégrée(s)")
+        for hint in report['hints']:
+            print(f"     + {hint['rel']} {hint['href']}")
+        return report
+    
+    @staticmethod
+    def parse_npm_lockfile(lock):
+        """Retourne les tarballs d'un package-lock.json : {integrity: entrée}, dédupliqués"""
+        entries = {}
+        
+        def add(path, name, info):
+            if info.get('link') or info.get('inBundle') or not info.get('resolved') or not info.get('integrity'):
+                return
+            entry = entries.setdefault(info['integrity'], {
+                'name': name,
+                'version': info['version'],
+                'resolved': info['resolved'],
+                'integrity': info['integrity'],
+                'paths': [],
+            })
+            entry['paths'].append(path)
+        
+        if 'packages' in lock:
+            for path, info in lock['packages'].items():
+                if path:
+                    add(path, info.get('name') or path.rsplit('node_modules/', 1)[-1], info)
+        else:
+            # lockfileVersion 1 : arbre "dependencies" imbriqué
+            def walk(dependencies, prefix):
+                for name, info in dependencies.items():
+                    path = f'{prefix}node_modules/{name}'
+                    add(path, name, info)
+                    walk(info.get('dependencies', {}), path + '/')
+            walk(lock.get('dependencies', {}), '')
+        
+        return entries
+    
+    def fetch_npm_tarball(self, entry):
+        """Cherche un tarball : cache de build, cache npm local, miroir, puis registre"""
+        algorithm, _, b64 = entry['integrity'].split()[0].partition('-')
+        expected = base64.b64decode(b64)
+        cache_key = f'npm-{algorithm}-{expected.hex()}'
+        
+        cached = self.stage_cache.get_bytes('stages', cache_key)
+        if cached:
+            return cached[0], 'cache'
+        
+        candidates = []
+        npm_cache = Path(self.options['npm_cache_dir'])
+        digest_hex = expected.hex()
+        candidates.append(('npm-cache', npm_cache / 'content-v2' / algorithm / digest_hex[:2] / digest_hex[2:4] / digest_hex[4:]))
+        url_path = urllib.parse.urlsplit(entry['resolved']).path.lstrip('/')
+        if self.options['npm_mirror_dir']:
+            mirror = Path(self.options['npm_mirror_dir'])
+            candidates.append(('mirror', mirror / url_path))
+            candidates.append(('mirror', mirror / url_path.rsplit('/', 1)[-1]))
+        
+        data = None
+        source = None
+        for source, path in candidates:
+            if path.is_file():
+                data = path.read_bytes()
+                break
+        else:
+            if self.options['npm_registry']:
+                source = 'registry'
+                url = self.options['npm_registry'].rstrip('/') + '/' + url_path
+                with urllib.request.urlopen(url, timeout=60) as response:
+                    data = response.read()
+        
+        if data is None:
+            return None, None
+        if hashlib.new(algorithm, data).digest() != expected:
+            raise ValueError(f"Intégrité invalide pour {entry['name']}@{entry['version']} ({source})")
+        
+        self.stage_cache.put_bytes('stages', cache_key, data, {'name': entry['name'], 'version': entry['version']})
+        return data, source
+    
+    def build_npm_offline_bundle(self):
+        """Rassemble une fois par build les tarballs exacts de package-lock.json"""
+        if self._npm_bundle is not None:
+            return self._npm_bundle
+        
+        start = time.perf_counter()
+        lock = json.loads((self.base_dir / 'package-lock.json').read_text(encoding='utf-8'))
+        entries = self.parse_npm_lockfile(lock)
+        self.stage_cache  # instancié avant les threads de téléchargement
+        
+        with ThreadPoolExecutor(max_workers=self.worker_count(8)) as executor:
+            results = list(executor.map(self.fetch_npm_tarball, entries.values()))
+        
+        missing = [f"{e['name']}@{e['version']}" for e, (data, _) in zip(entries.values(), results) if data is None]
+        if missing:
+            more = '…' if len(missing) > 5 else ''
+            raise RuntimeError(f"{len(missing)} tarball(s) npm introuvable(s) : {', '.join(missing[:5])}{more}")
+        
+        tarballs = {}
+        sources = {}
+        for entry, (data, source) in zip(entries.values(), results):
+            filename = f"{entry['name'].lstrip('@').replace('/', '-')}-{entry['version']}.tgz"
+            if filename in tarballs:
+                filename = f"{filename[:-4]}-{hashlib.sha256(data).hexdigest()[:8]}.tgz"
+            entry['file'] = filename
+            tarballs[filename] = data
+            sources[source] = sources.get(source, 0) + 1
+        
+        # Lockfile réécrit : chaque dépendance pointe vers son tarball vendorisé
+        for path, info in lock.get('packages', {}).items():
+            if info.get('integrity') in entries:
+                info['resolved'] = f"file:npm-offline/{entries[info['integrity']]['file']}"
+        
+        bundle_size = sum(len(data) for data in tarballs.values())
+        # Estimation du temps gagné à l'installation : une requête par tarball + transfert
+        rtt, bandwidth = 0.05, 5 * 1024 ** 2
+        saved_seconds = len(tarballs) * rtt + bundle_size / bandwidth
+        
+        self._npm_bundle = {
+            'lock': lock,
+            'tarballs': tarballs,
+            'index': {
+                f"{e['name']}@{e['version']}": {'file': e['file'], 'integrity': e['integrity'], 'resolved': e['resolved']}
+                for e in entries.values()
+            },
+        }
+        self.report['npm_offline'] = {
+            'tarballs': len(tarballs),
+            'lock_entries': sum(len(e['paths']) for e in entries.values()),
+            'bundle_bytes': bundle_size,
+            'sources': sources,
+            'estimated_install_seconds_saved': round(saved_seconds, 1),
+            'estimate_assumptions': {'rtt_seconds': rtt, 'bandwidth_bytes_per_second': bandwidth},
+            'seconds': round(time.perf_counter() - start, 3),
+        }
+        print(f"  📦 Bundle npm hors ligne: {len(tarballs)} tarballs, {self.format_size(bundle_size)} "
+              f"(~{saved_seconds:.0f}s de téléchargement évités par installation)")
+        return self._npm_bundle
+    
+    def embed_npm_offline_bundle(self, target_dir):
+        with self.span('npm-offline', 'phase') as span:
+            bundle = self.build_npm_offline_bundle()
+            span['bytes'] = sum(len(data) for data in bundle['tarballs'].values())
+        offline_dir = target_dir / 'npm-offline'
+        offline_dir.mkdir(exist_ok=True)
+        for filename, data in bundle['tarballs'].items():
+            (offline_dir / filename).write_bytes(data)
+        (offline_dir / 'index.json').write_text(json.dumps(bundle['index'], indent=1), encoding='utf-8')
+        (target_dir / 'package-lock.json').write_text(json.dumps(bundle['lock'], indent=2), encoding='utf-8')
+    
+    def embed_database_snapshot(self, target_dir):
+        with self.span('db-snapshot', 'phase') as span:
+            data, meta = self.build_database_snapshot()
+            span['bytes'] = len(data)
+        (target_dir / 'database.snapshot.sqlite').write_bytes(data)
+        info = {
+            'file': 'database.snapshot.sqlite',
+            'sha256': hashlib.sha256(data).hexdigest(),
+            'size': len(data),
+            'schema_sha256': meta['schema_sha256'],
+            'tables': meta['tables'],
+            'install': "php install-database.php (appelé par les installateurs) : copie vérifiée vers DATABASE_URL",
+        }
+        (target_dir / 'database.snapshot.json').write_text(json.dumps(info, indent=2), encoding='utf-8')
+        (target_dir / 'install-database.php').write_text(DATABASE_SNAPSHOT_INSTALLER, encoding='utf-8')
+        
+        env_path = target_dir / '.env.example'
+        if env_path.exists():
+            with open(env_path, 'a', encoding='utf-8') as f:
+                f.write("\n# Base SQLite pré-migrée incluse : l'installateur copie database.snapshot.sqlite vers\n"
+                        "# DATABASE_URL (SHA-256 vérifié, base existante conservée) via install-database.php\n")
+    
+    def copy_installer(self, name, dest):
+        """Copie un installateur PHP ; avec --db-snapshot, il installe d'abord la base pré-migrée"""
+        content = (self.build_scripts_dir / name).read_text(encoding='utf-8')
+        if self.options['db_snapshot']:
+            content = DATABASE_SNAPSHOT_HOOK + content
+        dest.write_text(content, encoding='utf-8')
+        shutil.copystat(self.build_scripts_dir / name, dest)
     
     def create_project_structure(self, target_dir):
         dirs = [
@@ -282,26 +5586,17 @@ class PageForgePackageGenerator:
     
     def copy_production_files(self, target_dir):
         # Fichiers de configuration essentiels
-        config_files = [
-            'package.json',
-            'tsconfig.json',
-            'vite.config.ts',
-            'tailwind.config.ts',
-            'postcss.config.js',
-            'drizzle.config.ts',
-            'components.json'
-        ]
-        
-        for file in config_files:
+        for file in self.config_files:
             src = self.base_dir / file
             if src.exists():
                 shutil.copy2(src, target_dir / file)
         
-        # Copier les dossiers sources (en excluant les patterns)
-        for folder in ['client', 'server', 'shared']:
-            src_folder = self.base_dir / folder
-            if src_folder.exists():
-                self.copy_directory_filtered(src_folder, target_dir / folder)
+        # Copier les dossiers sources (en excluant les patterns) ; facultatifs si dist/ est livré
+        if not self.options['prebuild'] or self.options['prebuild_sources']:
+            for folder in ['client', 'server', 'shared']:
+                src_folder = self.base_dir / folder
+                if src_folder.exists():
+                    self.copy_directory_filtered(src_folder, target_dir / folder)
         
         # Créer un .env.example
         self.create_env_example(target_dir)
@@ -337,10 +5632,97 @@ class PageForgePackageGenerator:
         if not src.exists():
             return
         
+        if self.planning is not None:
+            # --plan : même filtre, fichiers seulement recensés
+            package_root = self.packages_dir / dst.relative_to(self.packages_dir).parts[0]
+            sources = self.planning.setdefault(package_root.name, {'sources': [], 'precompress': None})['sources']
+            if src not in self.plan_walks:
+                self.plan_walks[src] = [(path, size, path.relative_to(src).as_posix())
+                                        for path, size in self.walk_filtered(src, self.create_ignore_function())]
+            prefix = dst.relative_to(package_root).as_posix()
+            sources.extend((path, size, f'{prefix}/{rel}') for path, size, rel in self.plan_walks[src])
+            return
+        
         if dst.exists():
             shutil.rmtree(dst)
         
-        shutil.copytree(src, dst, ignore=self.create_ignore_function())
+        copy_function = copy_file_fast
+        if self.governor:
+            def copy_function(source, target, stat):
+                return self.governor.copy_file(source, target)
+        self.copy_tree_parallel(src, dst, self.create_ignore_function(), copy_function)
+    
+    @staticmethod
+    def walk_filtered(src, ignore_func):
+        """(chemin, taille) des fichiers que copy_tree_parallel copierait"""
+        pending = [Path(src)]
+        while pending:
+            source = pending.pop()
+            with os.scandir(source) as it:
+                entries = sorted(it, key=lambda e: e.name)
+            ignored = set(ignore_func(str(source), [entry.name for entry in entries]))
+            for entry in entries:
+                if entry.name in ignored:
+                    continue
+                if entry.is_dir():
+                    pending.append(Path(entry.path))
+                else:
+                    yield Path(entry.path), entry.stat().st_size
+    
+    def copy_tree_parallel(self, src, dst, ignore_func, copy_function=copy_file_fast):
+        """Copie une arborescence : parcours scandir, fichiers copiés par un pool de threads.
+
+        Même résultat que shutil.copytree (liens suivis, dates et droits des dossiers) ;
+        le stat de chaque fichier vient du parcours et n'est pas refait.
+        """
+        # Un seul CPU : les threads se disputent le GIL et le verrou du dossier, copie en ligne
+        cpus = os.cpu_count() or 1
+        workers = self.worker_count(self.options['copy_workers'] or (min(32, 4 * cpus) if cpus > 1 else 1))
+        
+        def copy_batch(target, batch):
+            # Lot de fichiers d'un même dossier : un seul span (et une seule tâche) par lot
+            with self.span(target.name, 'copy', files=len(batch)) as span:
+                total = 0
+                for entry in batch:
+                    stat = entry.stat()
+                    copy_function(entry.path, target / entry.name, stat)
+                    total += stat.st_size
+                span['bytes'] = total
+                return total
+        
+        directories = []
+        copied = 0
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = []
+            pending = [(Path(src), Path(dst))]
+            while pending:
+                source, target = pending.pop()
+                target.mkdir(parents=True)
+                directories.append((source, target))
+                with os.scandir(source) as it:
+                    entries = sorted(it, key=lambda e: e.name)
+                ignored = set(ignore_func(str(source), [entry.name for entry in entries]))
+                files = []
+                for entry in entries:
+                    if entry.name in ignored:
+                        continue
+                    if entry.is_dir():
+                        pending.append((Path(entry.path), target / entry.name))
+                    else:
+                        files.append(entry)
+                for i in range(0, len(files), 64):
+                    if workers == 1:
+                        copied += copy_batch(target, files[i:i + 64])
+                    else:
+                        futures.append(executor.submit(copy_batch, target, files[i:i + 64]))
+            for future in futures:
+                copied += future.result()
+        
+        # Dossiers en dernier : leur mtime change à chaque fichier ajouté
+        for source, target in reversed(directories):
+            shutil.copystat(source, target)
+        self._copy_bytes += copied
+        return copied
     
     def create_ignore_function(self):
         """Crée une fonction d'ignore pour shutil.copytree"""
@@ -499,6 +5881,129 @@ Installation testée sur les principaux hébergeurs cPanel.
 """
         (package_dir / 'INSTALLATION-GUIDE.txt').write_text(instructions, encoding='utf-8')
     
+    def precompress_static_assets(self, package_dir, min_saving=0.1, min_size=256, max_size=32 * 1024 ** 2):
+        """Génère les variantes .gz (et .br si disponible) des assets compressibles.
+
+        Les fichiers dont la compression fait gagner moins de `min_saving` (ou
+        qui font moins de `min_size` octets, ou plus de `max_size`) sont ignorés.
+        Retourne les octets économisés par type d'asset.
+        """
+        if self.planning is not None:
+            self.planning.setdefault(package_dir.name, {'sources': [], 'precompress': None})['precompress'] = \
+                (min_saving, min_size, max_size)
+            return {}
+        
+        assets = []
+        for root in self.static_asset_roots:
+            path = package_dir / root
+            if path.is_file():
+                assets.append(path)
+            elif path.is_dir():
+                assets.extend(p for p in sorted(path.rglob('*')) if p.is_file())
+        assets = [p for p in assets if p.suffix.lower() in self.precompress_extensions
+                  and min_size <= p.stat().st_size <= max_size]
+        
+        def compress(path):
+            with self.span(path.name, 'precompress') as span:
+                return compress_variants(path, span)
+        
+        def compress_variants(path, span):
+            data = self.read_file(path)
+            span['bytes'] = len(data)
+            variants = {'gz': gzip.compress(data, 9, mtime=0)}
+            if brotli is not None:
+                variants['br'] = brotli.compress(data, quality=11)
+            
+            written = {}
+            for encoding, compressed in variants.items():
+                if len(compressed) <= len(data) * (1 - min_saving):
+                    variant_path = path.with_name(f'{path.name}.{encoding}')
+                    variant_path.write_bytes(compressed)
+                    shutil.copystat(path, variant_path)
+                    written[encoding] = len(compressed)
+            return path, len(data), written
+        
+        stats = {}
+        with self.span('precompress', 'phase', files=len(assets)) as span, \
+                ThreadPoolExecutor(max_workers=self.worker_count(min(32, (os.cpu_count() or 1) + 4))) as executor:
+            span['bytes'] = sum(p.stat().st_size for p in assets)
+            for path, size, written in executor.map(compress, assets):
+                if not written:
+                    continue
+                entry = stats.setdefault(path.suffix.lower().lstrip('.'), {'files': 0, 'bytes': 0, 'saved': {}})
+                entry['files'] += 1
+                entry['bytes'] += size
+                for encoding, compressed_size in written.items():
+                    entry['saved'][encoding] = entry['saved'].get(encoding, 0) + size - compressed_size
+        
+        self.report['precompressed'] = stats
+        for asset_type, entry in sorted(stats.items()):
+            savings = ', '.join(f"{enc}: -{self.format_size(saved)}" for enc, saved in sorted(entry['saved'].items()))
+            print(f"  🗜️  {asset_type:<5} {entry['files']:>4} fichier(s), {self.format_size(entry['bytes'])} ({savings})")
+        return stats
+    
+    def create_cpanel_htaccess(self, package_dir, precompressed):
+        """Crée le .htaccess du package cPanel (variantes précompressées, compression, cache)"""
+        rules = ""
+        extensions = sorted(f'.{ext}' for ext in precompressed if f'.{ext}' in self.precompress_extensions)
+        if extensions:
+            pattern = '|'.join(ext.lstrip('.') for ext in extensions)
+            rules += "# Variantes précompressées générées au packaging (aucune compression à la volée)\n"
+            rules += "<IfModule mod_rewrite.c>\n    RewriteEngine On\n"
+            encodings = ['br', 'gz'] if any('br' in entry['saved'] for entry in precompressed.values()) else ['gz']
+            for encoding in encodings:
+                accept = 'br' if encoding == 'br' else 'gzip'
+                rules += f'    RewriteCond "%{{HTTP:Accept-Encoding}}" "{accept}"\n'
+                rules += f'    RewriteCond "%{{REQUEST_FILENAME}}.{encoding}" -s\n'
+                rules += f'    RewriteRule "^(.+)\\.({pattern})$" "$1.$2.{encoding}" [L]\n'
+            for ext in extensions:
+                for encoding in encodings:
+                    rules += (f'    RewriteRule "\\{ext}\\.{encoding}$" "-" '
+                              f'[T={self.precompress_extensions[ext]},E=no-gzip:1,E=no-brotli:1]\n')
+            rules += "</IfModule>\n\n<IfModule mod_headers.c>\n"
+            for encoding in encodings:
+                content_encoding = 'br' if encoding == 'br' else 'gzip'
+                rules += f'    <FilesMatch "\\.({pattern})\\.{encoding}$">\n'
+                rules += f'        Header set Content-Encoding {content_encoding}\n'
+                rules += '        Header append Vary Accept-Encoding\n'
+                rules += '    </FilesMatch>\n'
+            rules += "</IfModule>\n\n"
+        
+        # Assets à empreinte : le nom change avec le contenu, ils ne sont jamais revalidés
+        manifest_path = package_dir / 'asset-manifest.json'
+        manifest = json.loads(manifest_path.read_text(encoding='utf-8')) if manifest_path.exists() else {}
+        if manifest.get('assets') or manifest.get('vite_assets'):
+            def extensions(entries):
+                return '|'.join(sorted({Path(entry['file']).suffix.lstrip('.').lower() for entry in entries.values()}))
+            
+            rules += "# Assets à empreinte de contenu (asset-manifest.json) : cache d'un an, immuables\n"
+            if manifest.get('assets'):
+                pattern = extensions(manifest['assets'])
+                rules += "<IfModule mod_expires.c>\n"
+                rules += f'    <FilesMatch "\\.[0-9a-f]{{10}}\\.({pattern})(\\.(gz|br))?$">\n'
+                rules += "        ExpiresActive Off\n    </FilesMatch>\n</IfModule>\n\n"
+            rules += "<IfModule mod_headers.c>\n"
+            if manifest.get('assets'):
+                rules += f'    <FilesMatch "\\.[0-9a-f]{{10}}\\.({pattern})(\\.(gz|br))?$">\n'
+                rules += '        Header set Cache-Control "public, max-age=31536000, immutable"\n'
+                rules += "    </FilesMatch>\n"
+            if manifest.get('vite_assets'):
+                vite_pattern = extensions(manifest['vite_assets'])
+                rules += f'    <If "%{{REQUEST_URI}} =~ m#/assets/[^/]+-[A-Za-z0-9_-]{{8}}\\.({vite_pattern})(\\.(gz|br))?$#">\n'
+                rules += '        Header set Cache-Control "public, max-age=31536000, immutable"\n'
+                rules += "    </If>\n"
+            rules += "    # Le HTML est revalidé : il désigne les nouvelles empreintes dès la mise à jour\n"
+            rules += '    <FilesMatch "\\.html(\\.(gz|br))?$">\n'
+            rules += '        Header set Cache-Control "no-cache"\n'
+            rules += "    </FilesMatch>\n</IfModule>\n\n"
+        
+        root_htaccess = self.base_dir / '.htaccess'
+        if root_htaccess.exists():
+            rules += root_htaccess.read_text(encoding='utf-8')
+        
+        if rules:
+            (package_dir / '.htaccess').write_text(rules, encoding='utf-8')
+    
     def create_windows_scripts(self, package_dir):
         # Script de démarrage rapide
         start_script = """@echo off
@@ -526,7 +6031,7 @@ if errorlevel 1 (
 echo ✅ PHP détecté
 echo.
 
-REM Démarrer l'installateur web
+{database_step}REM Démarrer l'installateur web
 echo 🌐 Démarrage de l'installateur web...
 echo.
 echo Ouvrez votre navigateur sur : http://localhost:8000/install.php
@@ -537,15 +6042,20 @@ echo.
 php -S localhost:8000
 pause
 """
+        database_step = ''
+        if self.options['db_snapshot']:
+            database_step = ("REM Base SQLite pré-migrée (SHA-256 vérifié, base existante conservée)\n"
+                             "php install-database.php\nif errorlevel 1 (\n    pause\n    exit /b 1\n)\n\n")
+        start_script = start_script.replace('{database_step}', database_step)
         (package_dir / 'start-installer.bat').write_text(start_script, encoding='utf-8')
         
         # Script d'installation CLI
         cli_script = """@echo off
 title PageForge - Installation CLI Windows
 echo Installation CLI de PageForge...
-php install.php
+{database_step}php install.php
 pause
-"""
+""".replace('{database_step}', database_step)
         (package_dir / 'install-cli.bat').write_text(cli_script, encoding='utf-8')
     
     def create_linux_scripts(self, package_dir):
@@ -574,7 +6084,7 @@ fi
 echo "✅ PHP détecté"
 echo
 
-# Démarrer l'installateur web
+{database_step}# Démarrer l'installateur web
 echo "🌐 Démarrage de l'installateur web..."
 echo
 echo "Ouvrez votre navigateur sur : http://localhost:8000/install.php"
@@ -584,15 +6094,19 @@ echo
 
 php -S localhost:8000
 """
+        database_step = ''
+        if self.options['db_snapshot']:
+            database_step = ("# Base SQLite pré-migrée (SHA-256 vérifié, base existante conservée)\n"
+                             "php install-database.php || exit 1\n\n")
         script_file = package_dir / 'start-installer.sh'
-        script_file.write_text(start_script, encoding='utf-8')
+        script_file.write_text(start_script.replace('{database_step}', database_step), encoding='utf-8')
         script_file.chmod(0o755)
         
         # Script d'installation CLI
         cli_script = """#!/bin/bash
 echo "Installation CLI de PageForge..."
-php install.php
-"""
+{database_step}php install.php
+""".replace('{database_step}', database_step)
         cli_file = package_dir / 'install-cli.sh'
         cli_file.write_text(cli_script, encoding='utf-8')
         cli_file.chmod(0o755)
@@ -613,6 +6127,7 @@ class PageForgeVSCodeSetup {
         echo "=====================================\\n\\n";
         
         $this->checkRequirements();
+        $this->restoreDuplicates();
         $this->setupVSCodeConfig();
         $this->installDependencies();
         $this->setupDatabase();
@@ -646,6 +6161,21 @@ class PageForgeVSCodeSetup {
         echo "\\n";
     }
     
+    private function restoreDuplicates() {
+        // Fichiers identiques livrés une seule fois dans l'archive
+        if(!is_file('.pageforge-duplicates.json')) {
+            return;
+        }
+        $duplicates = json_decode(file_get_contents('.pageforge-duplicates.json'), true);
+        foreach($duplicates['files'] as $path => $source) {
+            if(!is_dir(dirname($path))) {
+                mkdir(dirname($path), 0755, true);
+            }
+            copy($source, $path);
+        }
+        echo "✅ " . count($duplicates['files']) . " fichier(s) dupliqué(s) restauré(s)\\n\\n";
+    }
+    
     private function setupVSCodeConfig() {
         echo "⚙️ Configuration VS Code...\\n";
         
@@ -782,24 +6312,466 @@ $setup->run();
         }
         (vscode_dir / 'launch.json').write_text(json.dumps(launch, indent=2), encoding='utf-8')
     
+    def progress_meter(self, label, files):
+        """Compteur de progression pour les archives volumineuses (None en dessous du seuil)"""
+        total = sum(path.stat().st_size for path in files)
+        if total < self.options['progress_threshold']:
+            return None
+        return ProgressMeter(label, total)
+    
+    def layout_tier(self, rel_path):
+        """Rang d'un fichier (relatif à la racine du package) dans l'ordre d'installation.
+
+        Un nom de fichier l'emporte sur un dossier ; entre dossiers, le plus précis gagne.
+        """
+        best = (0, len(self.layout_tiers))
+        for rank, (_, patterns) in enumerate(self.layout_tiers):
+            for pattern in patterns:
+                if pattern.endswith('/'):
+                    if rel_path.startswith(pattern) and len(pattern) > best[0]:
+                        best = (len(pattern), rank)
+                elif '/' in pattern:
+                    if rel_path == pattern:
+                        return rank
+                elif '/' not in rel_path and Path(rel_path).match(pattern):
+                    return rank
+        return best[1]
+    
+    def plan_archive_layout(self, source_dir):
+        """Ordonne les fichiers d'un package et produit l'index placé en tête d'archive.
+
+        Retourne (fichiers ordonnés, octets de l'index ou None si l'ordre n'est pas demandé).
+        """
+        files = sorted(p for p in source_dir.rglob('*') if p.is_file())
+        if self.options['layout'] != 'install-order':
+            return files, None
+        
+        ranked = sorted((self.layout_tier(p.relative_to(source_dir).as_posix()), p.relative_to(source_dir).as_posix(), p)
+                        for p in files)
+        tier_names = [name for name, _ in self.layout_tiers] + ['other']
+        tiers = []
+        for rank, rel, path in ranked:
+            if not tiers or tiers[-1]['name'] != tier_names[rank]:
+                tiers.append({'name': tier_names[rank], 'files': 0, 'bytes': 0, 'first': rel, 'last': rel})
+            tier = tiers[-1]
+            tier['files'] += 1
+            tier['bytes'] += path.stat().st_size
+            tier['last'] = rel
+        
+        index = {
+            'layout': 'install-order',
+            'version': self.version,
+            'files': len(ranked),
+            'bytes': sum(t['bytes'] for t in tiers),
+            # Liste complète de la première tranche : de quoi valider les prérequis et lancer npm
+            'install_files': [rel for rank, rel, _ in ranked if rank == 0],
+            'tiers': tiers,
+        }
+        return [path for _, _, path in ranked], json.dumps(index, indent=1).encode('utf-8')
+    
+    @staticmethod
+    def archive_batches(files, max_files=64, max_bytes=16 * 1024 ** 2):
+        """Découpe la liste ordonnée des fichiers en lots (un span de trace par lot) : (lot, octets)"""
+        batch = []
+        size = 0
+        for path in files:
+            batch.append(path)
+            size += path.stat().st_size
+            if len(batch) >= max_files or size >= max_bytes:
+                yield batch, size
+                batch = []
+                size = 0
+        if batch:
+            yield batch, size
+    
     def create_zip_archive(self, source_dir, zip_name):
-        zip_path = self.packages_dir / zip_name
+        if self.planning is not None:
+            return self.record_planned_archive(source_dir, zip_name)
+        started = time.perf_counter_ns()
+        target = next(t for t in self.targets if self.archive_name(t) == zip_name)
+        track = self.options['zip_duplicates'] != 'off'
+        shared = self.options['zip_duplicates'] == 'shared' and self.targets[target].get('shared_payloads')
+        
+        level = self.options['compression_level']
+        members = []
+        seen = {}
+        sizes = set()
+        duplicates = {}
+        saved = 0
+        
+        files, layout_index = self.plan_archive_layout(source_dir)
+        meter = self.progress_meter(zip_name, files)
+        stream_threshold = self.governor.buffer_size if self.governor else self.options['stream_threshold']
+        segmented = self.segmented_layout(target)
+        
+        with self.open_archive_output(zip_name) as f:
+            writer = ZipPayloadWriter(f)
+            
+            # Index des segments en tête : membre stocké, réécrit en place une fois l'archive fermée
+            if segmented:
+                planner, reserved = self.segment_index_reserve(files)
+                index_name = f'{source_dir.name}/{SEGMENT_INDEX_NAME}'
+                placeholder = b' ' * reserved
+                writer.add_member(index_name, placeholder, zlib.crc32(placeholder), reserved, time.time(), 0o100644,
+                                  zipfile.ZIP_STORED)
+                writer.segment_start = (len(writer.entries), writer.offset)
+                
+            # Index de l'ordre d'installation, premier membre de l'archive
+            if layout_index is not None:
+                arcname = f'{source_dir.name}/.pageforge-layout.json'
+                payload, method = deflate_payload(layout_index, level)
+                writer.add_member(arcname, payload, zlib.crc32(layout_index), len(layout_index), time.time(), 0o100644, method)
+                members.append({'path': arcname, 'size': len(layout_index), 'sha256': hashlib.sha256(layout_index).hexdigest()})
+                if segmented:
+                    planner.add(source_dir, len(layout_index))  # compté dans le premier segment
+            
+            # Mode réparti : chaque lot part aux nœuds de build pendant l'écriture du précédent
+            batches = list(self.archive_batches(files))
+            distributed = self.distributed if self.stream is None else None
+            prefetched = {}
+            if distributed and batches:
+                prefetched.update(self.prefetch_payloads(batches[0][0], level, stream_threshold))
+            
+            for index, (batch, batch_bytes) in enumerate(batches):
+                if distributed and index + 1 < len(batches):
+                    prefetched.update(self.prefetch_payloads(batches[index + 1][0], level, stream_threshold))
+                with self.span(batch[0].parent.relative_to(source_dir.parent).as_posix(), 'archive',
+                               files=len(batch), bytes=batch_bytes) as span:
+                    batch_offset = writer.offset
+                    for file_path in batch:
+                        arcname = file_path.relative_to(source_dir.parent).as_posix()
+                        stat = file_path.stat()
+                        if segmented:
+                            closed = planner.add(file_path.parent, stat.st_size)
+                            if closed:
+                                writer.cut(*closed)
+                
+                        # Sortie non adressable : compression directement dans le flux, crc et tailles en descripteur.
+                        # L'empreinte n'est calculée d'avance que si un doublon probable (même taille) peut être omis.
+                        streamed = self.stream is not None and stat.st_size > stream_threshold
+                        if streamed:
+                            sha256 = self.file_digest(file_path) if shared and stat.st_size in sizes else None
+                            data = None
+                        # Gros fichiers compressés en flux (mémoire bornée) ; médias déjà compressés stockés tels quels
+                        elif stat.st_size > stream_threshold:
+                            store = file_path.suffix.lower() in self.stored_extensions
+                            on_read = meter.update if meter else None
+                            if self.governor:
+                                payload, crc, sha256, method = self.governor.deflate_file(file_path, level, on_read, store)
+                            elif distributed and not store:
+                                payload, crc, sha256, method = distributed.deflate_file(file_path, level, on_read)
+                            else:
+                                payload, crc, sha256, method = deflate_file(file_path, level, on_read=on_read, store=store)
+                            data = None
+                        elif file_path in prefetched:
+                            data, sha256, cached, pending = prefetched.pop(file_path)
+                            if meter:
+                                meter.update(stat.st_size)
+                        else:
+                            data = self.read_file(file_path)
+                            sha256 = hashlib.sha256(data).hexdigest()
+                            cached = self.cache.get_bytes('payloads', f'{sha256}-{level}') if self.cache else None
+                            pending = None
+                            if meter:
+                                meter.update(stat.st_size)
+                        if sha256:
+                            members.append({'path': arcname, 'size': stat.st_size, 'sha256': sha256})
+                
+                        # Doublons repérés avec l'empreinte déjà calculée (aucune relecture)
+                        if track and stat.st_size and sha256 in seen:
+                            duplicates[arcname] = seen[sha256]
+                            if shared:
+                                saved += stat.st_size
+                                if data is None and not streamed:
+                                    payload.close()
+                                continue
+                        elif track and stat.st_size and sha256:
+                            seen[sha256] = arcname
+                            sizes.add(stat.st_size)
+                
+                        if streamed:
+                            store = file_path.suffix.lower() in self.stored_extensions
+                            with open(file_path, 'rb') as source:
+                                if self.governor:
+                                    source = ThrottledReader(source, self.governor)
+                                digest = writer.add_streamed_member(arcname, source, stat.st_size, stat.st_mtime, stat.st_mode,
+                                                                    level, meter.update if meter else None, store)
+                            if not sha256:
+                                members.append({'path': arcname, 'size': stat.st_size, 'sha256': digest})
+                                if track and stat.st_size and digest in seen:
+                                    duplicates[arcname] = seen[digest]
+                                elif track and stat.st_size:
+                                    seen[digest] = arcname
+                                    sizes.add(stat.st_size)
+                            continue
+                
+                        if data is None:
+                            with payload:
+                                writer.add_member(arcname, payload, crc, stat.st_size, stat.st_mtime, stat.st_mode, method)
+                            continue
+                
+                        # Payload compressé réutilisé depuis le cache si déjà connu
+                        payload_key = f'{sha256}-{level}'
+                        if cached:
+                            payload, meta = cached
+                            crc, method = meta['crc32'], meta['method']
+                        else:
+                            if pending:
+                                # Compressé par un nœud de build : stocké tel quel si deflate n'apporte rien
+                                payload, crc = pending.result()
+                                method = zipfile.ZIP_DEFLATED
+                                if len(payload) >= len(data):
+                                    payload, method = data, zipfile.ZIP_STORED
+                            else:
+                                crc = zlib.crc32(data)
+                                payload, method = deflate_payload(data, level)
+                            if self.cache:
+                                self.cache.put_bytes('payloads', payload_key, payload, {'crc32': crc, 'method': method})
+                
+                        writer.add_member(arcname, payload, crc, len(data), stat.st_mtime, stat.st_mode, method)
+            
+                    span['bytes_out'] = writer.offset - batch_offset
+            
+            # Installateur compatible : les doublons sont recopiés à l'installation
+            if shared and duplicates:
+                root = source_dir.name + '/'
+                index = json.dumps({
+                    'files': {dup[len(root):]: src[len(root):] for dup, src in sorted(duplicates.items())},
+                    'install': "Copier chaque source vers le chemin du doublon après extraction",
+                }, indent=1).encode('utf-8')
+                arcname = root + '.pageforge-duplicates.json'
+                payload, method = deflate_payload(index, level)
+                writer.add_member(arcname, payload, zlib.crc32(index), len(index), time.time(), 0o100644, method)
+                members.append({'path': arcname, 'size': len(index), 'sha256': hashlib.sha256(index).hexdigest()})
+            if segmented:
+                writer.cut(*planner.take())
+            cd_offset = writer.offset
+            writer.close()
         
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for file_path in source_dir.rglob('*'):
-                if file_path.is_file():
-                    arcname = str(file_path.relative_to(source_dir.parent))
-                    zipf.write(file_path, arcname)
+        if segmented:
+            # Empreinte d'un segment : SHA-256 de la liste des SHA-256 de ses membres, dans l'ordre
+            digests = {m['path']: m['sha256'] for m in members}
+            for segment in writer.segments:
+                names = [entry[0].decode('utf-8') for entry in writer.entries[segment['first']:segment['first'] + segment['count']]]
+                segment['sha256'] = hashlib.sha256('\n'.join(digests[n] for n in names).encode('ascii')).hexdigest()
+            data = self.segment_index('zip', source_dir, planner, writer.segments, reserved)
+            crc = struct.pack('<L', zlib.crc32(data))
+            with open(self.packages_dir / zip_name, 'r+b') as f:
+                f.seek(14)  # crc de l'entête local
+                f.write(crc)
+                f.seek(30 + len(index_name.encode('utf-8')))
+                f.write(data)
+                f.seek(cd_offset + 16)  # crc de la première entrée du répertoire central
+                f.write(crc)
+            members.insert(0, {'path': index_name, 'size': len(data), 'sha256': hashlib.sha256(data).hexdigest()})
+            self.record_segments(target, writer.segments)
         
-        print(f"  📦 Archive créée: {zip_name} ({self.format_size(zip_path.stat().st_size)})")
+        if meter:
+            meter.close()
+        
+        if track:
+            self.record_duplicates(target, duplicates, members, 'shared' if shared else 'report', saved)
+        self.write_manifest(zip_name, members)
+        if self.trace:
+            self.trace.add(zip_name, 'phase', started, files=len(members),
+                           bytes=sum(m['size'] for m in members), bytes_out=self.archive_size(zip_name))
+        print(f"  📦 Archive créée: {zip_name} ({self.format_size(self.archive_size(zip_name))})")
     
     def create_tar_archive(self, source_dir, tar_name):
-        tar_path = self.packages_dir / tar_name
+        if self.planning is not None:
+            return self.record_planned_archive(source_dir, tar_name)
+        started = time.perf_counter_ns()
+        target = next(t for t in self.targets if self.archive_name(t) == tar_name)
+        buffer_size = self.governor.buffer_size if self.governor else 8 * 1024 * 1024
+        
+        members = []
+        seen = {}
+        sizes = set()
+        duplicates = {}
+        saved = 0
+        output = self.open_archive_output(tar_name)
+        
+        files, layout_index = self.plan_archive_layout(source_dir)
+        
+        meter = self.progress_meter(tar_name, files)
         
-        with tarfile.open(tar_path, 'w:gz') as tar:
-            tar.add(source_dir, arcname=source_dir.name)
+        segmented = self.segmented_layout(target)
+        if segmented:
+            # Membres gzip indépendants, précédés de l'index (membre stocké, réécrit à la fin)
+            planner, reserved = self.segment_index_reserve(files)
+            gz = SegmentedGzipWriter(output, self.options['compression_level'])
+            tar_args = {'fileobj': gz, 'mode': 'w'}
+            index_info = tarfile.TarInfo(f'{source_dir.name}/{SEGMENT_INDEX_NAME}')
+            index_info.size = reserved
+            index_info.mtime = int(time.time())
+            index_info.mode = 0o644
+            index_length = gz.write_stored(tar_member_bytes(index_info, b' ' * reserved))
+        elif self.distributed:
+            # Flux gzip compressé par blocs sur les nœuds de build
+            gz = ParallelGzipWriter(output, self.distributed, self.options['compression_level'])
+            tar_args = {'fileobj': gz, 'mode': 'w'}
+        else:
+            gz = contextlib.nullcontext()
+            tar_args = {'fileobj': output, 'mode': 'w:gz', 'compresslevel': self.options['compression_level']}
         
-        print(f"  📦 Archive créée: {tar_name} ({self.format_size(tar_path.stat().st_size)})")
+        with output, gz, tarfile.open(**tar_args) as tar:
+            # Points de reprise (vidage complet) entre deux membres, pour la lecture directe (inspect)
+            checkpoint_interval = self.options['gzip_checkpoint_interval'] if isinstance(tar.fileobj, gzip.GzipFile) else 0
+            last_checkpoint = 0
+            # Dossiers d'abord (entêtes seuls), puis index et fichiers dans l'ordre d'installation
+            tar.add(source_dir, arcname=source_dir.name, recursive=False)
+            for path in sorted(source_dir.rglob('*')):
+                if not path.is_file():
+                    tar.addfile(tar.gettarinfo(path, path.relative_to(source_dir.parent).as_posix()))
+            
+            if layout_index is not None:
+                info = tarfile.TarInfo(f'{source_dir.name}/.pageforge-layout.json')
+                info.size = len(layout_index)
+                info.mtime = int(time.time())
+                info.mode = 0o644
+                tar.addfile(info, io.BytesIO(layout_index))
+                members.append({'path': info.name, 'size': info.size, 'sha256': hashlib.sha256(layout_index).hexdigest()})
+                if segmented:
+                    planner.add(source_dir, info.size)  # compté dans le premier segment
+            
+            for batch, batch_bytes in self.archive_batches(files):
+                with self.span(batch[0].parent.relative_to(source_dir.parent).as_posix(), 'archive',
+                               files=len(batch), bytes=batch_bytes):
+                    for path in batch:
+                        info = tar.gettarinfo(path, path.relative_to(source_dir.parent).as_posix())
+                        on_read = meter.update if meter else None
+                        if segmented:
+                            closed = planner.add(path.parent, info.size)
+                            if closed:
+                                gz.cut(*closed)
+                        elif checkpoint_interval and tar.offset - last_checkpoint >= checkpoint_interval:
+                            tar.fileobj.flush(zlib.Z_FULL_FLUSH)
+                            last_checkpoint = tar.offset
+                
+                        with open(path, 'rb') as f:
+                            source = ThrottledReader(f, self.governor) if self.governor else f
+                            if info.size > buffer_size and info.size not in sizes:
+                                # Gros fichier de taille inédite (doublon impossible) : copié sans tampon, empreinte au passage
+                                reader = DigestReader(source, on_read)
+                                tar.addfile(info, reader)
+                                sha256 = reader.digest.hexdigest()
+                                members.append({'path': info.name, 'size': info.size, 'sha256': sha256})
+                                seen.setdefault(sha256, info.name)
+                                seen.setdefault((sha256, info.mode), info.name)
+                                sizes.add(info.size)
+                                continue
+                            if info.size > buffer_size:
+                                # Taille déjà vue : empreinte d'abord (relecture), toujours sans tampon
+                                sha256 = self.file_digest(path)
+                                payload = DigestReader(source, on_read)
+                            else:
+                                # Petit fichier : une seule lecture, empreinte calculée sur le tampon
+                                data = source.read()
+                                if on_read:
+                                    on_read(len(data))
+                                sha256 = hashlib.sha256(data).hexdigest()
+                                payload = io.BytesIO(data)
+                            members.append({'path': info.name, 'size': info.size, 'sha256': sha256})
+                    
+                            # Contenu déjà présent : entrée hardlink si les droits sont identiques
+                            if info.size and sha256 in seen:
+                                duplicates[info.name] = seen[sha256]
+                                link = seen.get((sha256, info.mode))
+                                if self.options['tar_hardlinks'] and link:
+                                    saved += info.size
+                                    info.type = tarfile.LNKTYPE
+                                    info.linkname = link
+                                    info.size = 0
+                                    tar.addfile(info)
+                                    continue
+                            if info.size:
+                                seen.setdefault(sha256, info.name)
+                                seen.setdefault((sha256, info.mode), info.name)
+                                sizes.add(info.size)
+                    
+                            tar.addfile(info, payload)
+            
+            if segmented:
+                gz.cut(*planner.take())
+        
+        if segmented:
+            data = self.segment_index('tar.gz', source_dir, planner, gz.segments, reserved)
+            member = stored_gzip_member(tar_member_bytes(index_info, data))
+            if len(member) != index_length:
+                raise RuntimeError(f"Index des segments de {tar_name} : taille modifiée à la réécriture")
+            with open(self.packages_dir / tar_name, 'r+b') as f:
+                f.write(member)
+            members.insert(0, {'path': index_info.name, 'size': len(data), 'sha256': hashlib.sha256(data).hexdigest()})
+            self.record_segments(target, gz.segments)
+        
+        if meter:
+            meter.close()
+        self.record_duplicates(target, duplicates, members, 'hardlink' if self.options['tar_hardlinks'] else 'report', saved)
+        self.write_manifest(tar_name, members)
+        if self.trace:
+            self.trace.add(tar_name, 'phase', started, files=len(members),
+                           bytes=sum(m['size'] for m in members), bytes_out=self.archive_size(tar_name))
+        
+        print(f"  📦 Archive créée: {tar_name} ({self.format_size(self.archive_size(tar_name))})")
+    
+    def segmented_layout(self, target):
+        """Vrai si l'archive de la cible est découpée en segments indépendants (--segments).
+
+        L'index de tête est réécrit en place à la fin : une sortie en flux garde le format habituel.
+        """
+        return bool(self.options['segments'] and self.targets[target].get('segmentable') and self.stream is None)
+
+    def segment_index_reserve(self, files):
+        """Planificateur des coupures et place réservée à l'index (nombre de segments borné d'avance)"""
+        planner = SegmentPlanner(self.options['segments'], self.options['segment_size'])
+        total = sum(path.stat().st_size for path in files)
+        return planner, 1024 + 192 * (total // planner.minimum + 4)
+
+    def segment_index(self, kind, source_dir, planner, segments, reserved):
+        """Sérialise l'index des segments, complété par des espaces jusqu'à la taille réservée"""
+        index = {
+            'format': 'pageforge-segments',
+            'version': 1,
+            'archive': kind,
+            'root': source_dir.name,
+            'mode': planner.mode,
+            'segment_size': planner.segment_size,
+            # tar.gz : SHA-256 du flux tar du segment ; zip : SHA-256 de la liste des SHA-256 de ses membres
+            'digest': 'stream' if kind == 'tar.gz' else 'members',
+            'files': sum(s['files'] for s in segments),
+            'bytes': sum(s['bytes'] for s in segments),
+            'segments': segments,
+        }
+        data = json.dumps(index, separators=(',', ':')).encode('utf-8')
+        if len(data) > reserved:
+            raise RuntimeError(f"Index des segments trop grand ({len(data)} octets, {reserved} réservés)")
+        return data + b' ' * (reserved - len(data))
+
+    def record_segments(self, target, segments):
+        """Reporte le découpage en segments d'une archive"""
+        largest = max((s['length'] for s in segments), default=0)
+        self.report.setdefault('segments', {})[target] = {
+            'mode': self.options['segments'],
+            'segment_size': self.options['segment_size'],
+            'segments': len(segments),
+            'largest_bytes': largest,
+        }
+        print(f"  🧩 {len(segments)} segment(s) indépendants ({self.options['segments']}), "
+              f"le plus gros : {self.format_size(largest)}")
+
+    def record_duplicates(self, target, duplicates, members, mode, saved):
+        """Reporte les fichiers identiques d'une archive et les octets évités"""
+        sizes = {m['path']: m['size'] for m in members}
+        self.report.setdefault('duplicates', {})[target] = {
+            'mode': mode,
+            'files': len(duplicates),
+            'duplicate_bytes': sum(sizes[path] for path in duplicates),
+            'saved_bytes': saved,
+            'pairs': [{'path': dup, 'same_as': src} for dup, src in sorted(duplicates.items())][:50],
+        }
+        if duplicates:
+            print(f"  🔁 {len(duplicates)} doublon(s) ({self.format_size(sum(sizes[p] for p in duplicates))}), "
+                  f"{self.format_size(saved)} évités ({mode})")
     
     def create_distribution_guide(self):
         guide_content = f"""# Guide de Distribution PageForge v{self.version}
@@ -831,7 +6803,8 @@ $setup->run();
 ## Instructions de Distribution
 
 1. **Testez** chaque package avant distribution
-2. **Vérifiez** que tous les fichiers sont présents
+2. **Vérifiez** que tous les fichiers sont présents :
+   `python3 build-scripts/create-packages.py verify` (CRC, manifeste, fichiers requis)
 3. **Documentez** les changements de version
 4. **Publiez** sur les plateformes appropriées
 
@@ -860,19 +6833,28 @@ sha256sum pageforge-*
         print("-" * 40)
         
         total_size = 0
-        for file_path in self.packages_dir.iterdir():
-            if file_path.is_file() and file_path.suffix in ['.zip', '.tar.gz']:
-                size = file_path.stat().st_size
+        for target in self.targets:
+            archive_name = self.archive_name(target)
+            if self.archive_exists(archive_name):
+                size = self.archive_size(archive_name)
                 total_size += size
-                print(f"📦 {file_path.name:<35} {self.format_size(size):>10}")
+                volumes = "" if (self.packages_dir / archive_name).is_file() else " (en volumes)"
+                print(f"📦 {archive_name:<35} {self.format_size(size):>10}{volumes}")
         
         print("-" * 40)
         print(f"📊 Taille totale: {self.format_size(total_size)}")
+        
+        if 'cache' in self.report:
+            cache = self.report['cache']
+            for kind in ArtifactCache.KINDS:
+                print(f"♻️  Cache {kind:<10} {cache['hits'][kind]:>5} hit(s) {cache['misses'][kind]:>5} miss(es)")
+            print(f"♻️  Cache: {cache['evictions']} éviction(s)")
         print()
         print("🎯 PRÊT POUR LA DISTRIBUTION !")
         print("   Consultez DISTRIBUTION-GUIDE.md pour les détails")
     
-    def format_size(self, size_bytes):
+    @staticmethod
+    def format_size(size_bytes):
         """Formate la taille en bytes en format lisible"""
         if size_bytes == 0:
             return "0 B"
@@ -1557,11 +7539,771 @@ Pour questions spécifiques de développement, consultez README.md
 """
         (package_dir / 'DEVELOPMENT.txt').write_text(instructions, encoding='utf-8')
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Générateur de packages PageForge")
+    parser.add_argument('--cache-dir', default=DEFAULT_OPTIONS['cache_dir'],
+                        help="Dossier du cache d'artefacts partagé (défaut: $PAGEFORGE_CACHE_DIR)")
+    parser.add_argument('--cache-max-size', type=int, default=DEFAULT_OPTIONS['cache_max_size'] // 1024 ** 2,
+                        help="Taille maximale du cache en Mo (éviction LRU)")
+    parser.add_argument('--store-dir', default=os.environ.get('PAGEFORGE_STORE_DIR'),
+                        help="Store dédupliqué où archiver les packages générés (défaut: $PAGEFORGE_STORE_DIR)")
+    parser.add_argument('--verify', action='store_true',
+                        help="Vérifier toutes les archives après la génération (échec si invalide)")
+    parser.add_argument('--no-precompress', action='store_true',
+                        help="Ne pas générer les variantes .gz/.br des assets statiques cPanel")
+    parser.add_argument('--db-snapshot', action='store_true',
+                        help="Inclure une base SQLite pré-migrée (cPanel, Windows, Linux)")
+    parser.add_argument('--layout', choices=['install-order', 'alphabetical'], default=DEFAULT_OPTIONS['layout'],
+                        help="Ordre des membres d'archive : fichiers d'installation d'abord (install-order) ou alphabétique")
+    parser.add_argument('--no-tar-hardlinks', action='store_true',
+                        help="Ne pas remplacer les fichiers identiques par des hardlinks dans les .tar.gz")
+    parser.add_argument('--zip-duplicates', choices=['off', 'report', 'shared'], default=DEFAULT_OPTIONS['zip_duplicates'],
+                        help="Doublons des .zip : signalés (report) ou livrés une fois si l'installateur sait les recopier (shared)")
+    parser.add_argument('--analyze', action='store_true',
+                        help="Afficher la répartition des tailles de chaque archive (SIZE-ANALYSIS.json/.txt)")
+    parser.add_argument('--budgets', type=Path, default=DEFAULT_OPTIONS['budgets'],
+                        help="Fichier JSON des budgets de taille par cible")
+    parser.add_argument('--history-db', type=Path, help="Historique SQLite des métriques (défaut: packages/.build-history.sqlite)")
+    parser.add_argument('--history-window', type=int, default=DEFAULT_OPTIONS['history_window'],
+                        help="Nombre d'exécutions servant de référence (médiane)")
+    parser.add_argument('--size-regression', type=float, default=DEFAULT_OPTIONS['size_regression'],
+                        help="Hausse de taille tolérée avant alerte (0.25 = +25%%)")
+    parser.add_argument('--time-regression', type=float, default=DEFAULT_OPTIONS['time_regression'],
+                        help="Hausse de durée tolérée avant alerte (0.5 = +50%%)")
+    parser.add_argument('--fail-on-regression', action='store_true',
+                        help="Échouer (code 1) si une régression est détectée")
+    parser.add_argument('--governed', action='store_true',
+                        help="Mode gouverné pour un serveur en production (débits, workers, priorité et mémoire bornés)")
+    parser.add_argument('--max-read-rate', type=float, default=DEFAULT_OPTIONS['max_read_rate'] / 1024 ** 2,
+                        help="Débit de lecture maximal en Mo/s en mode gouverné (0 = illimité)")
+    parser.add_argument('--max-write-rate', type=float, default=DEFAULT_OPTIONS['max_write_rate'] / 1024 ** 2,
+                        help="Débit d'écriture maximal en Mo/s en mode gouverné (0 = illimité)")
+    parser.add_argument('--max-workers', type=int, default=DEFAULT_OPTIONS['max_workers'],
+                        help="Nombre maximal de workers en mode gouverné")
+    parser.add_argument('--nice', type=int, default=DEFAULT_OPTIONS['nice'],
+                        help="Incrément de priorité CPU (nice) en mode gouverné")
+    parser.add_argument('--buffer-size', type=int, default=DEFAULT_OPTIONS['buffer_size'] // 1024,
+                        help="Taille des tampons en Ko en mode gouverné (borne la mémoire par fichier)")
+    parser.add_argument('--load-threshold', type=float, default=DEFAULT_OPTIONS['load_threshold'],
+                        help="Charge par CPU au-delà de laquelle les débits sont réduits")
+    parser.add_argument('--prebuild', action='store_true',
+                        help="Compiler dist/ une fois (mis en cache) et le livrer aux packages cPanel, Windows et Linux")
+    parser.add_argument('--build-command', default=DEFAULT_OPTIONS['build_command'],
+                        help="Commande de build exécutée à la racine du projet (doit produire dist/index.js)")
+    parser.add_argument('--with-sources', action='store_true',
+                        help="Avec --prebuild, livrer aussi client/, server/ et shared/")
+    parser.add_argument('--optimize-images', action='store_true',
+                        help="Optimiser sans perte les PNG des packages cPanel, Windows et Linux (résultats en cache)")
+    parser.add_argument('--hash-assets', action='store_true',
+                        help="Renommer les assets statiques avec une empreinte de contenu (cache immuable)")
+    parser.add_argument('--preload-hints', action='store_true',
+                        help="Ajouter aux pages d'entrée des indications preload/modulepreload (CSS, polices, modules)")
+    parser.add_argument('--inline-css-max', type=parse_size, default=DEFAULT_OPTIONS['inline_css_max'],
+                        help="Avec --preload-hints, intégrer dans la page les CSS du <head> jusqu'à cette taille (ex: 4KB)")
+    parser.add_argument('--npm-offline', action='store_true',
+                        help="Vendoriser les tarballs de package-lock.json pour une installation hors ligne")
+    parser.add_argument('--npm-cache-dir', default=DEFAULT_OPTIONS['npm_cache_dir'],
+                        help="Cache npm local (_cacache) où chercher les tarballs")
+    parser.add_argument('--npm-mirror-dir', help="Miroir local de tarballs (arborescence du registre)")
+    parser.add_argument('--npm-registry', help="Registre npm (ou stand-in local) à utiliser en dernier recours")
+    parser.add_argument('--build-nodes', type=lambda value: [node.strip() for node in value.split(',') if node.strip()],
+                        help="Nœuds de compression HÔTE:PORT séparés par des virgules (voir la commande build-node)")
+    parser.add_argument('--node-connections', type=int, default=DEFAULT_OPTIONS['node_connections'],
+                        help="Connexions (blocs en parallèle) par nœud de build")
+    parser.add_argument('--segments', choices=['size', 'directory'],
+                        help="Archives Linux et VS Code en segments compressés indépendamment (extraction parallèle, voir extract)")
+    parser.add_argument('--segment-size', type=parse_size, default=DEFAULT_OPTIONS['segment_size'],
+                        help="Taille visée d'un segment (ex: 4MB) ; par dossier, coupure dès le quart atteint")
+    parser.add_argument('--gzip-checkpoints', type=parse_size, default=DEFAULT_OPTIONS['gzip_checkpoint_interval'],
+                        help="Point de reprise gzip (vidage complet) entre deux membres tous les N octets de tar (ex: 1MB), 0 pour aucun (défaut)")
+    parser.add_argument('--plan', action='store_true',
+                        help="Prévoir taille, nombre de fichiers et durée de chaque archive sans construire (BUILD-PLAN.json)")
+    parser.add_argument('--trace', type=Path,
+                        help="Écrire la timeline du build (Trace Event JSON, à ouvrir dans ui.perfetto.dev)")
+    parser.add_argument('--copy-workers', type=int,
+                        help="Threads de copie des sources (défaut: 4 par CPU, 1 sur une machine mono-CPU)")
+    parser.add_argument('--volume-size', type=int,
+                        help="Découper le package cPanel en volumes de N Mo (+ index .volumes.json)")
+    parser.add_argument('--publish-endpoint',
+                        help="Endpoint compatible S3 où publier les volumes (ex: http://127.0.0.1:9000)")
+    parser.add_argument('--publish-bucket', default=DEFAULT_OPTIONS['publish_bucket'])
+    parser.add_argument('--publish-prefix', default=DEFAULT_OPTIONS['publish_prefix'])
+    parser.add_argument('--upload-concurrency', type=int, default=DEFAULT_OPTIONS['upload_concurrency'],
+                        help="Nombre de parts envoyées en parallèle")
+    
+    commands = parser.add_subparsers(dest='command')
+    
+    store = commands.add_parser('store', help="Historique dédupliqué des packages publiés")
+    store.add_argument('--store-dir', default=argparse.SUPPRESS, help="Dossier du store")
+    store_commands = store.add_subparsers(dest='store_command', required=True)
+    store_put = store_commands.add_parser('put', help="Ajouter des packages au store")
+    store_put.add_argument('archives', nargs='+', type=Path)
+    store_put.add_argument('--replace', action='store_true', help="Remplacer un package existant de même nom")
+    store_get = store_commands.add_parser('get', help="Reconstruire un package à l'identique")
+    store_get.add_argument('name')
+    store_get.add_argument('-o', '--output', type=Path, help="Fichier de sortie (défaut: ./<nom>)")
+    store_gc = store_commands.add_parser('gc', help="Supprimer les blocs non référencés")
+    store_gc.add_argument('--remove', nargs='*', default=[], help="Packages à retirer avant le nettoyage")
+    
+    commands.add_parser('verify', help="Vérifier les archives présentes dans packages/")
+
+    inspect = commands.add_parser('inspect', help="Lister, lire ou comparer des packages sans les extraire")
+    inspect_commands = inspect.add_subparsers(dest='inspect_command', required=True)
+    inspect_list = inspect_commands.add_parser('list', help="Lister les membres (tar.gz : index de reprise mis en cache)")
+    inspect_list.add_argument('archive', help="Archive, ou nom d'un package de packages/")
+    inspect_cat = inspect_commands.add_parser('cat', help="Écrire un membre sur stdout")
+    inspect_cat.add_argument('archive')
+    inspect_cat.add_argument('member', help="Chemin complet ou relatif à la racine du package (ex: server/routes.ts)")
+    inspect_extract = inspect_commands.add_parser('extract', help="Extraire quelques membres")
+    inspect_extract.add_argument('archive')
+    inspect_extract.add_argument('members', nargs='+')
+    inspect_extract.add_argument('-o', '--output', type=Path, default=Path('.'), help="Dossier de destination")
+    inspect_diff = inspect_commands.add_parser('diff', help="Comparer deux packages par empreinte de membre")
+    inspect_diff.add_argument('old')
+    inspect_diff.add_argument('new')
+    inspect_diff.add_argument('--json', action='store_true', help="Résultat complet en JSON")
+    
+    sync = commands.add_parser('sync', help="Mettre à jour une installation existante en n'écrivant que les fichiers modifiés")
+    sync.add_argument('target', choices=['cpanel', 'windows', 'linux', 'vscode'])
+    sync.add_argument('dest', type=Path, help="Dossier de l'installation")
+    sync.add_argument('--dry-run', action='store_true', help="Lister les changements sans rien écrire")
+    sync.add_argument('--previous-manifest', type=Path,
+                      help="Manifeste du paquet installé (fichiers supprimés dès la première synchronisation)")
+    
+    commands.add_parser('publish', help="Publier (ou reprendre la publication) des volumes existants")
+    
+    commands.add_parser('analyze', help="Analyser les tailles des archives présentes et contrôler les budgets")
+    
+    bench = commands.add_parser('bench-archive', help="Mesurer mémoire (RSS) et débit de l'archivage selon la taille d'entrée")
+    bench.add_argument('--sizes', default='10MB,100MB,1GB', help="Tailles d'arborescence à tester (ex. 10MB,1GB,10GB)")
+    bench.add_argument('--format', choices=['zip', 'tar.gz'], default='zip')
+    bench.add_argument('--dir', type=Path, default=Path(tempfile.gettempdir()) / 'pageforge-bench')
+    bench.add_argument('--keep', action='store_true', help="Conserver les arborescences générées")
+    bench.add_argument('--child', type=Path, help=argparse.SUPPRESS)
+    
+    node = commands.add_parser('build-node', help="Nœud de compression pour un build réparti (--build-nodes)")
+    node.add_argument('--bind', default='127.0.0.1', help="Adresse d'écoute (0.0.0.0 pour le réseau)")
+    node.add_argument('--port', type=int, default=7300, help="Port d'écoute (0 = port libre)")
+    node.add_argument('--max-items', type=int, help="Tomber après N blocs (test de reprise)")
+    
+    bench_nodes = commands.add_parser('bench-distributed', help="Mesurer l'efficacité de la compression répartie selon le nombre de nœuds locaux")
+    bench_nodes.add_argument('--nodes', default='1,2,4', help="Nombres de nœuds à comparer")
+    bench_nodes.add_argument('--size', default='256MB', help="Volume de données à compresser")
+    bench_nodes.add_argument('--kill-one', action='store_true', help="Arrêter un nœud en cours de route (test de reprise)")
+    
+    extract = commands.add_parser('extract', help="Extraire une archive segmentée sur plusieurs cœurs en vérifiant chaque segment")
+    extract.add_argument('archive', type=Path)
+    extract.add_argument('dest', type=Path)
+    extract.add_argument('--jobs', type=int, help="Processus d'extraction (défaut: nombre de CPU)")
+
+    bench_extract = commands.add_parser('bench-extract', help="Comparer tar/unzip et l'extraction segmentée parallèle sur une grande arborescence")
+    bench_extract.add_argument('--size', default='256MB', help="Volume de l'arborescence synthétique")
+    bench_extract.add_argument('--segments', choices=['size', 'directory'], default='size')
+    bench_extract.add_argument('--segment-size', type=parse_size, default=DEFAULT_OPTIONS['segment_size'])
+    bench_extract.add_argument('--jobs', help="Nombres de processus à comparer (défaut: 1 et le nombre de CPU)")
+    bench_extract.add_argument('--dir', type=Path, default=Path(tempfile.gettempdir()) / 'pageforge-bench-extract')
+    bench_extract.add_argument('--keep', action='store_true', help="Conserver l'arborescence et les archives")
+
+    check_plan = commands.add_parser('check-plan', help="Comparer les prévisions de --plan à un build réel")
+    check_plan.add_argument('--max-size-error', type=float, default=0.1,
+                            help="Erreur relative maximale tolérée sur la taille des archives (0.1 = 10 %%)")
+    
+    bench_copy = commands.add_parser('bench-copy', help="Comparer shutil.copytree et la copie parallèle sur une arborescence de petits fichiers")
+    bench_copy.add_argument('--files', type=int, default=2000)
+    bench_copy.add_argument('--file-size', type=int, default=4096, help="Taille de chaque fichier en octets")
+    bench_copy.add_argument('--dir', type=Path, default=Path(tempfile.gettempdir()) / 'pageforge-bench-copy',
+                            help="Dossier de travail (ex. un montage NFS)")
+    bench_copy.add_argument('--rounds', type=int, default=3)
+    bench_copy.add_argument('--workers', default='1,4,16', help="Nombres de threads à comparer")
+    
+    stream = commands.add_parser('stream', help="Envoyer l'archive d'une cible vers stdout, un descripteur ou un socket, sans fichier")
+    stream.add_argument('target', choices=['cpanel', 'windows', 'linux', 'vscode'])
+    stream.add_argument('--to', default='-', help="Sortie : - (stdout), fd:N ou tcp:hôte:port")
+    stream.add_argument('--staging-dir', help="Dossier d'assemblage temporaire (défaut: /dev/shm, requis sans tmpfs)")
+    
+    bench_stream = commands.add_parser('bench-stream', help="Comparer l'envoi sur socket : écriture puis copie contre flux direct")
+    bench_stream.add_argument('--target', choices=['cpanel', 'windows', 'linux', 'vscode'], default='linux')
+    bench_stream.add_argument('--rounds', type=int, default=3)
+    
+    history = commands.add_parser('history', help="Évolution des tailles et durées de build par version")
+    history.add_argument('--target', help="Limiter à une cible (cpanel, windows, linux, vscode)")
+    
+    standin = commands.add_parser('s3-standin', help="Serveur local compatible S3 pour les essais de publication")
+    standin.add_argument('--port', type=int, default=9000)
+    standin.add_argument('--dir', type=Path, default=Path(tempfile.gettempdir()) / 'pageforge-s3')
+    standin.add_argument('--fail-parts', type=int, default=0, help="Faire échouer les N premières parts (test de reprise)")
+    standin.add_argument('--check-signatures', action='store_true',
+                         help="Vérifier la signature SigV4 (identifiants AWS_ACCESS_KEY_ID / AWS_SECRET_ACCESS_KEY)")
+    
+    registry = commands.add_parser('registry-standin', help="Registre npm local servant un miroir de tarballs")
+    registry.add_argument('--port', type=int, default=4873)
+    registry.add_argument('--dir', type=Path, required=True, help="Miroir (arborescence <scope>/<nom>/-/<fichier>.tgz)")
+    
+    return parser.parse_args(argv)
+
+def run_archive_benchmark(args):
+    """Archive des arborescences synthétiques de tailles croissantes, chacune dans un processus neuf"""
+    target = 'cpanel' if args.format == 'zip' else 'linux'
+    
+    if args.child:
+        # Processus mesuré : une seule archive, RSS maximal relevé à la fin
+        generator = PageForgePackageGenerator({'progress_threshold': 1 << 62})
+        generator.packages_dir = args.child.parent / 'out'
+        generator.packages_dir.mkdir(exist_ok=True)
+        start = time.perf_counter()
+        if args.format == 'zip':
+            generator.create_zip_archive(args.child, generator.archive_name(target))
+        else:
+            generator.create_tar_archive(args.child, generator.archive_name(target))
+        seconds = time.perf_counter() - start
+        archive = generator.packages_dir / generator.archive_name(target)
+        print(json.dumps({
+            'seconds': seconds,
+            'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None,
+            'archive_bytes': archive.stat().st_size,
+        }))
+        return
+    
+    results = []
+    block = os.urandom(512 * 1024) + b'PageForge ' * 52429  # moitié aléatoire, moitié compressible
+    for label in args.sizes.split(','):
+        size = parse_size(label)
+        tree = args.dir / label.strip() / f'pageforge-bench-{label.strip()}'
+        if not tree.exists():
+            print(f"🧪 Génération de {label.strip()}...")
+            media = tree / 'client' / 'public' / 'media'
+            media.mkdir(parents=True)
+            (tree / 'package.json').write_text('{"name": "bench"}', encoding='utf-8')
+            # Petits fichiers puis gros médias de 256 Mo maximum
+            small = min(size // 10, 1000 * 64 * 1024)
+            for i in range(small // (64 * 1024)):
+                (tree / 'client' / f'module-{i:04d}.js').write_bytes(block[i % 8 * 65536:(i % 8 + 1) * 65536])
+            remaining = size - small
+            index = 0
+            while remaining > 0:
+                file_size = min(remaining, 256 * 1024 ** 2)
+                with open(media / f'asset-{index:04d}.bin', 'wb') as f:
+                    written = 0
+                    while written < file_size:
+                        written += f.write(block[:file_size - written])
+                remaining -= file_size
+                index += 1
+        
+        for previous in (tree.parent / 'out').glob('*'):
+            previous.unlink()
+        output = subprocess.run(
+            [sys.executable, str(Path(__file__).resolve()), 'bench-archive', '--format', args.format, '--child', str(tree)],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip().splitlines()[-1]
+        result = dict(json.loads(output), input=label.strip(), input_bytes=size)
+        results.append(result)
+        rate = size / result['seconds']
+        print(f"  {label.strip():>8}  RSS max {result['max_rss_kb'] / 1024:7.1f} Mo  "
+              f"{result['seconds']:7.1f}s  {PageForgePackageGenerator.format_size(rate)}/s  "
+              f"archive {PageForgePackageGenerator.format_size(result['archive_bytes'])}")
+        if not args.keep:
+            shutil.rmtree(tree.parent)
+    
+    args.dir.mkdir(parents=True, exist_ok=True)
+    (args.dir / f'results-{args.format}.json').write_text(json.dumps(results, indent=2), encoding='utf-8')
+
+
+def run_distributed_benchmark(args):
+    """Compresse un même volume avec 1, 2, 4… nœuds locaux : accélération et efficacité"""
+    size = parse_size(args.size)
+    block = os.urandom(256 * 1024) + b'PageForge component ' * 39322  # moitié aléatoire, moitié compressible
+    chunks = [block[:DistributedCompressor.BLOCK_SIZE]] * (size // DistributedCompressor.BLOCK_SIZE)
+    fmt = PageForgePackageGenerator.format_size
+    
+    start = time.perf_counter()
+    compress_block(block, 6, False)
+    local = (time.perf_counter() - start) * len(chunks)
+    print(f"🧪 {fmt(size)} en blocs de {fmt(DistributedCompressor.BLOCK_SIZE)} "
+          f"(référence locale estimée : {local:.2f}s)")
+    
+    results = []
+    for count in [int(n) for n in args.nodes.split(',')]:
+        processes = []
+        nodes = []
+        for _ in range(count):
+            process = subprocess.Popen([sys.executable, str(Path(__file__).resolve()), 'build-node', '--port', '0'],
+                                       stdout=subprocess.PIPE, text=True)
+            for line in process.stdout:
+                match = re.search(r'Nœud de build sur (\S+)$', line.strip())
+                if match:
+                    nodes.append(match.group(1))
+                    break
+            processes.append(process)
+        
+        compressor = DistributedCompressor(nodes)
+        start = time.perf_counter()
+        decompressor = zlib.decompressobj(-15)
+        restored = 0
+        for index, piece in enumerate(compressor.deflate_stream(iter(chunks), 6)):
+            restored += len(decompressor.decompress(piece))
+            if args.kill_one and count > 1 and index == len(chunks) // 3:
+                processes[0].kill()
+        seconds = time.perf_counter() - start
+        compressor.close()
+        for process in processes:
+            process.kill()
+            process.wait()
+        
+        if restored != size or not decompressor.eof:
+            raise RuntimeError("Flux réparti invalide")
+        stats = compressor.stats()
+        result = {'nodes': count, 'seconds': round(seconds, 3), 'retried': stats['retried'],
+                  'local_items': stats['local_items'], 'items': stats['items']}
+        results.append(result)
+        base = results[0]
+        speedup = base['seconds'] / seconds
+        result['speedup'] = round(speedup, 2)
+        result['efficiency'] = round(speedup * base['nodes'] / count, 2)
+        print(f"  {count:>2} nœud(s)  {seconds:7.2f}s  {fmt(size / seconds)}/s  "
+              f"x{speedup:.2f}  efficacité {result['efficiency']:.0%}  "
+              f"({stats['retried']} renvoi(s), {stats['local_items']} bloc(s) en local)")
+    return results
+
+
+def run_copy_benchmark(args):
+    """Copie une arborescence de petits fichiers (façon client/src/components) avec les deux copieurs"""
+    source = args.dir / 'source'
+    if source.exists():
+        shutil.rmtree(source)
+    block = os.urandom(args.file_size)
+    for i in range(args.files):
+        folder = source / f'group-{i // 100:03d}' / f'component-{i // 10 % 10}'
+        folder.mkdir(parents=True, exist_ok=True)
+        (folder / f'file-{i:05d}.tsx').write_bytes(block)
+    
+    ignore_func = PageForgePackageGenerator().create_ignore_function()
+    copiers = {'shutil.copytree': lambda dst: shutil.copytree(source, dst, ignore=ignore_func)}
+    for workers in args.workers.split(','):
+        generator = PageForgePackageGenerator({'copy_workers': int(workers)})
+        copiers[f'parallèle x{int(workers)}'] = functools.partial(generator.copy_tree_parallel, source, ignore_func=ignore_func)
+    
+    print(f"🧪 {args.files} fichiers de {args.file_size} o dans {args.dir} ({args.rounds} passe(s), médianes)")
+    timings = {}
+    for name, copy in copiers.items():
+        runs = []
+        for _ in range(args.rounds):
+            dst = args.dir / 'copy'
+            if dst.exists():
+                shutil.rmtree(dst)
+            start = time.perf_counter()
+            copy(dst)
+            runs.append(time.perf_counter() - start)
+        timings[name] = sorted(runs)[len(runs) // 2]
+        print(f"  {name:<20} {timings[name]:7.3f}s  {args.files / timings[name]:8.0f} fichiers/s  "
+              f"x{timings['shutil.copytree'] / timings[name]:.1f}")
+    shutil.rmtree(source)
+    shutil.rmtree(args.dir / 'copy')
+
+
+def run_stream_benchmark(args):
+    """Envoie l'archive d'une cible sur un socket local : écriture disque puis copie, contre flux direct"""
+    server = socket.create_server(('127.0.0.1', 0))
+    port = server.getsockname()[1]
+    
+    def receive():
+        # Récepteur : premier octet, fin de flux et volume reçu
+        conn, _ = server.accept()
+        first = None
+        total = 0
+        with conn:
+            while True:
+                data = conn.recv(1024 * 1024)
+                if not data:
+                    break
+                if first is None:
+                    first = time.perf_counter()
+                total += len(data)
+        return first, time.perf_counter(), total
+    
+    fmt = PageForgePackageGenerator.format_size
+    results = {'write-then-copy': [], 'stream': []}
+    with ThreadPoolExecutor(max_workers=1) as receiver, tempfile.TemporaryDirectory() as tmp:
+        for _ in range(args.rounds):
+            for mode in results:
+                generator = PageForgePackageGenerator({'progress_threshold': 1 << 62})
+                generator.packages_dir = Path(tmp)
+                pending = receiver.submit(receive)
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    if mode == 'stream':
+                        # Sans tmpfs, le banc assemble dans le même dossier que l'écriture disque
+                        staging = None if os.path.isdir(STREAM_STAGING_DIR) else tmp
+                        generator.stream_package(args.target, f'tcp:127.0.0.1:{port}', staging)
+                    else:
+                        getattr(generator, f'generate_{args.target}_package')()
+                        archive = generator.packages_dir / generator.archive_name(args.target)
+                        with socket.create_connection(('127.0.0.1', port)) as sock, open(archive, 'rb') as f:
+                            sock.sendfile(f)
+                first, end, total = pending.result()
+                results[mode].append({
+                    'seconds': end - start,
+                    'first_byte_seconds': first - start,
+                    'bytes': total,
+                })
+                for path in Path(tmp).iterdir():
+                    shutil.rmtree(path) if path.is_dir() else path.unlink()
+    server.close()
+    
+    print(f"🧪 {args.target}, {args.rounds} passe(s) (médianes)")
+    for mode, runs in results.items():
+        seconds = sorted(r['seconds'] for r in runs)[len(runs) // 2]
+        first = sorted(r['first_byte_seconds'] for r in runs)[len(runs) // 2]
+        size = runs[-1]['bytes']
+        print(f"  {mode:<16} {seconds:7.2f}s  premier octet {first:6.2f}s  "
+              f"{fmt(size)}  {fmt(size / seconds)}/s")
+
+
+def run_extract_benchmark(args):
+    """Extraction d'une grande arborescence : tar/unzip standard contre l'extracteur segmenté (1 et N processus)"""
+    size = parse_size(args.size)
+    jobs = [int(j) for j in args.jobs.split(',')] if args.jobs else sorted({1, os.cpu_count() or 1})
+    shutil.rmtree(args.dir, ignore_errors=True)
+    tree = args.dir / 'pageforge-bench-extract'
+    
+    # Arborescence type : beaucoup de petits modules par dossier, un média de quelques Mo tous les 50 fichiers
+    print(f"🧪 Génération de {args.size}...")
+    block = os.urandom(2 * 1024 ** 2) + b'export const component = () => null;\n' * 56000
+    written = index = 0
+    while written < size:
+        file_size = min(size - written, 1024 ** 2 + index % 3 * 1024 ** 2 if index % 50 == 49 else 2048 + index * 7919 % 62000)
+        path = tree / 'src' / f'feature-{index // 200:03d}' / f'module-{index:05d}.js'
+        path.parent.mkdir(parents=True, exist_ok=True)
+        offset = index * 4099 % (len(block) - file_size) if file_size < len(block) else 0
+        path.write_bytes(block[offset:offset + file_size])
+        written += file_size
+        index += 1
+    
+    def tree_digests(root):
+        return {p.relative_to(root).as_posix(): file_sha256(p) for p in root.rglob('*')
+                if p.is_file() and not p.name.startswith('.pageforge-')}
+    
+    expected = {f'{tree.name}/{k}': v for k, v in tree_digests(tree).items()}
+    generator = PageForgePackageGenerator({'segments': args.segments, 'segment_size': args.segment_size,
+                                           'progress_threshold': 1 << 62})
+    generator.packages_dir = args.dir / 'out'
+    generator.packages_dir.mkdir()
+    results = []
+    for target, stock in (('linux', ['tar', '-xzf']), ('vscode', ['unzip', '-q'])):
+        archive = generator.packages_dir / generator.archive_name(target)
+        if target == 'linux':
+            generator.create_tar_archive(tree, archive.name)
+        else:
+            generator.create_zip_archive(tree, archive.name)
+        index = read_segment_index(archive)
+        result = {'archive': archive.name, 'archive_bytes': archive.stat().st_size,
+                  'segments': len(index['segments']), 'files': index['files'], 'bytes': index['bytes']}
+        
+        # Outils standard : l'archive doit rester lisible telle quelle
+        dest = args.dir / 'stock'
+        shutil.rmtree(dest, ignore_errors=True)
+        dest.mkdir()
+        if shutil.which(stock[0]):
+            command = stock + [str(archive)] + (['-C', str(dest)] if target == 'linux' else ['-d', str(dest)])
+            start = time.perf_counter()
+            ok = subprocess.run(command, capture_output=True).returncode == 0
+            result['stock_seconds'] = time.perf_counter() - start
+            result['stock_identical'] = ok and tree_digests(dest) == expected
+        
+        for count in jobs:
+            shutil.rmtree(dest, ignore_errors=True)
+            start = time.perf_counter()
+            extract_segmented_archive(archive, dest, count)
+            result[f'jobs_{count}_seconds'] = time.perf_counter() - start
+            result[f'jobs_{count}_identical'] = tree_digests(dest) == expected
+        results.append(result)
+        
+        timings = '  '.join(f"{count} proc. {result[f'jobs_{count}_seconds']:6.2f}s" for count in jobs)
+        stock_timing = f"{stock[0]} {result['stock_seconds']:6.2f}s" if 'stock_seconds' in result else f"{stock[0]} absent"
+        speedup = result[f'jobs_{jobs[0]}_seconds'] / result[f'jobs_{jobs[-1]}_seconds']
+        identical = all(v for k, v in result.items() if k.endswith('_identical'))
+        print(f"  {archive.name}: {result['segments']} segments  {stock_timing}  {timings}  "
+              f"accélération x{speedup:.2f}  {'✅ contenu identique' if identical else '❌ contenu différent'}")
+    
+    (args.dir / 'results-extract.json').write_text(json.dumps(results, indent=2), encoding='utf-8')
+    if not args.keep:
+        shutil.rmtree(tree)
+        shutil.rmtree(args.dir / 'stock', ignore_errors=True)
+        shutil.rmtree(generator.packages_dir)
+
+
+def run_inspect_command(args, packages_dir):
+    """Accès direct aux membres des packages ; un nom seul est cherché dans packages/"""
+    fmt = PageForgePackageGenerator.format_size
+    
+    def open_package(name):
+        path = Path(name)
+        if not path.exists() and ((packages_dir / name).exists() or (packages_dir / f'{name}.volumes.json').exists()):
+            path = packages_dir / name
+        start = time.perf_counter()
+        package = PackageInspector(path)
+        if package.index_built:
+            print(f"🔎 Index de reprise construit en {time.perf_counter() - start:.2f}s "
+                  f"({len(package.index['checkpoints'])} points de reprise) : {package.index_path.name}")
+        return package
+    
+    if args.inspect_command == 'diff':
+        with open_package(args.old) as old, open_package(args.new) as new:
+            result = diff_packages(old, new)
+        if args.json:
+            print(json.dumps(result, indent=2))
+            return
+        for entry in result['added']:
+            print(f"  + {entry['path']} ({fmt(entry['size'])})")
+        for entry in result['removed']:
+            print(f"  - {entry['path']} ({fmt(entry['size'])})")
+        for entry in result['changed']:
+            print(f"  ~ {entry['path']} ({fmt(entry['old_size'])} → {fmt(entry['new_size'])})")
+        print(f"📊 {result['old']} → {result['new']} : {len(result['added'])} ajouté(s), {len(result['removed'])} supprimé(s), "
+              f"{len(result['changed'])} modifié(s), {result['unchanged']} identique(s)")
+        return
+    
+    with open_package(args.archive) as package:
+        if args.inspect_command == 'list':
+            for entry in package.members():
+                if entry['type'] != 'file':
+                    digest = entry['type']
+                else:
+                    digest = entry['sha256'][:12] if 'sha256' in entry else f"{entry['crc32']:08x}"
+                print(f"{entry['size']:>12}  {digest:<12}  {entry['name']}")
+            print(f"📦 {package.path.name} : {len(package.by_name)} membre(s)")
+        elif args.inspect_command == 'cat':
+            out = sys.__stdout__.buffer
+            for chunk in package.iter_member(args.member):
+                out.write(chunk)
+            out.flush()
+        elif args.inspect_command == 'extract':
+            for member in args.members:
+                name = package.resolve(member)
+                target = _segment_target(args.output, name)
+                target.parent.mkdir(parents=True, exist_ok=True)
+                with open(target, 'wb') as f:
+                    for chunk in package.iter_member(name):
+                        f.write(chunk)
+                entry = package.by_name[name]
+                if entry['mode']:
+                    os.chmod(target, entry['mode'])
+                os.utime(target, (entry['mtime'], entry['mtime']))
+                print(f"  📄 {target} ({fmt(target.stat().st_size)})")
+
+
+def run_store_command(args, base_dir):
+    store = ChunkStore(args.store_dir or base_dir / '.release-store')
+    fmt = PageForgePackageGenerator.format_size
+    
+    if args.store_command == 'put':
+        for archive in args.archives:
+            result = store.put(archive, replace=args.replace)
+            print(f"🗄️  {result['name']:<35} {result['chunks']:>5} blocs, "
+                  f"{result['new_chunks']:>5} nouveaux (+{fmt(result['new_bytes'])})")
+    elif args.store_command == 'get':
+        output = args.output or Path(args.name)
+        start = time.perf_counter()
+        size = store.get(args.name, output)
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        print(f"📦 {args.name} reconstruit ({fmt(size)}, {fmt(size / elapsed)}/s)")
+    elif args.store_command == 'gc':
+        for name in args.remove:
+            store.remove(name)
+        removed, freed = store.gc()
+        print(f"🧹 {removed} bloc(s) supprimé(s), {fmt(freed)} libéré(s)")
+    
+    logical, stored = store.stats()
+    ratio = logical / stored if stored else 0
+    print(f"📊 Store: {fmt(logical)} logiques, {fmt(stored)} stockés "
+          f"(ratio de déduplication {ratio:.2f}x)")
+
 def main():
+    args = parse_args()
+    
+    # L'archive (ou le membre) occupe stdout : les messages passent sur stderr
+    if args.command == 'stream' and args.to == '-' or args.command == 'inspect' and args.inspect_command == 'cat':
+        sys.stdout = sys.stderr
+    
     print("🚀 PageForge Package Generator")
     print("==============================")
     
-    generator = PageForgePackageGenerator()
+    if args.command == 'store':
+        run_store_command(args, Path(__file__).parent.parent)
+        return
+
+    if args.command == 'inspect':
+        try:
+            run_inspect_command(args, Path(__file__).parent.parent / 'packages')
+        except (OSError, EOFError, ValueError, zlib.error, tarfile.TarError, zipfile.BadZipFile) as e:
+            print(f"❌ Inspection impossible: {e}")
+            exit(1)
+        return
+    
+    if args.command == 'registry-standin':
+        server = NpmRegistryStandIn(('127.0.0.1', args.port), args.dir)
+        print(f"📦 Stand-in registre npm sur http://127.0.0.1:{args.port} ({args.dir})")
+        server.serve_forever()
+        return
+    
+    if args.command == 'bench-archive':
+        run_archive_benchmark(args)
+        return
+    
+    if args.command == 'build-node':
+        server = CompressionNode((args.bind, args.port), args.max_items)
+        print(f"🛠️  Nœud de build sur {args.bind}:{server.server_address[1]}", flush=True)
+        server.serve_forever()
+        return
+    
+    if args.command == 'bench-distributed':
+        run_distributed_benchmark(args)
+        return
+    
+    if args.command == 'bench-copy':
+        run_copy_benchmark(args)
+        return
+
+    if args.command == 'extract':
+        start = time.perf_counter()
+        try:
+            result = extract_segmented_archive(args.archive, args.dest, args.jobs)
+        except (OSError, EOFError, ValueError, zlib.error, tarfile.TarError, zipfile.BadZipFile) as e:
+            print(f"❌ Extraction impossible: {e}")
+            exit(1)
+        print(f"✅ {result['files']} fichier(s), {PageForgePackageGenerator.format_size(result['bytes'])} extraits "
+              f"({result['segments']} segments vérifiés, {result['jobs']} processus) en {time.perf_counter() - start:.2f}s")
+        return
+
+    if args.command == 'bench-extract':
+        run_extract_benchmark(args)
+        return
+    
+    if args.command == 'bench-stream':
+        run_stream_benchmark(args)
+        return
+    
+    if args.command == 's3-standin':
+        credentials = None
+        if args.check_signatures:
+            credentials = (os.environ.get('AWS_ACCESS_KEY_ID'), os.environ.get('AWS_SECRET_ACCESS_KEY'))
+            if not all(credentials):
+                print("❌ --check-signatures : AWS_ACCESS_KEY_ID et AWS_SECRET_ACCESS_KEY requis")
+                exit(1)
+        server = LocalS3StandIn(('127.0.0.1', args.port), args.dir, args.fail_parts, credentials)
+        print(f"☁️  Stand-in S3 sur http://127.0.0.1:{args.port} ({args.dir})")
+        server.serve_forever()
+        return
+    
+    if args.preload_hints and not args.prebuild:
+        print("❌ --preload-hints requiert --prebuild (indications calculées sur dist/public/index.html)")
+        exit(1)
+    
+    generator = PageForgePackageGenerator({
+        'cache_dir': args.cache_dir,
+        'cache_max_size': args.cache_max_size * 1024 ** 2,
+        'store_dir': args.store_dir,
+        'verify': args.verify,
+        'precompress': not args.no_precompress,
+        'db_snapshot': args.db_snapshot,
+        'layout': args.layout,
+        'tar_hardlinks': not args.no_tar_hardlinks,
+        'zip_duplicates': args.zip_duplicates,
+        'segments': args.segments,
+        'segment_size': args.segment_size,
+        'gzip_checkpoint_interval': args.gzip_checkpoints,
+        'analyze': args.analyze,
+        'budgets': args.budgets,
+        'history_db': args.history_db,
+        'history_window': args.history_window,
+        'size_regression': args.size_regression,
+        'time_regression': args.time_regression,
+        'fail_on_regression': args.fail_on_regression,
+        'governed': args.governed,
+        'max_read_rate': int(args.max_read_rate * 1024 ** 2),
+        'max_write_rate': int(args.max_write_rate * 1024 ** 2),
+        'max_workers': args.max_workers,
+        'nice': args.nice,
+        'buffer_size': args.buffer_size * 1024,
+        'load_threshold': args.load_threshold,
+        'prebuild': args.prebuild,
+        'build_command': args.build_command,
+        'prebuild_sources': args.with_sources,
+        'optimize_images': args.optimize_images,
+        'hash_assets': args.hash_assets,
+        'preload_hints': args.preload_hints,
+        'inline_css_max': args.inline_css_max,
+        'npm_offline': args.npm_offline,
+        'npm_cache_dir': args.npm_cache_dir,
+        'npm_mirror_dir': args.npm_mirror_dir,
+        'npm_registry': args.npm_registry,
+        'volume_size': args.volume_size * 1024 ** 2 if args.volume_size else None,
+        'publish_endpoint': args.publish_endpoint,
+        'publish_bucket': args.publish_bucket,
+        'publish_prefix': args.publish_prefix,
+        'upload_concurrency': args.upload_concurrency,
+        'copy_workers': args.copy_workers,
+        'trace': args.trace,
+        'build_nodes': args.build_nodes,
+        'node_connections': args.node_connections,
+    })
+    
+    if args.command == 'history':
+        generator.print_history(args.target)
+        return
+    
+    if args.plan:
+        generator.plan_packages()
+        return
+    
+    if args.command == 'check-plan':
+        ok, _ = generator.check_plan(args.max_size_error)
+        if not ok:
+            exit(1)
+        return
+    
+    if args.command == 'stream':
+        try:
+            generator.stream_package(args.target, args.to, args.staging_dir)
+        except (OSError, ValueError) as e:
+            print(f"❌ Erreur de flux: {e}")
+            exit(1)
+        return
+    
+    if args.command == 'analyze':
+        analyses = generator.analyze_packages()
+        if generator.check_size_budgets(analyses, generator.load_size_budgets()):
+            exit(1)
+        return
+    
+    if args.command == 'verify':
+        if not generator.verify_packages():
+            exit(1)
+        return
+    
+    if args.command == 'sync':
+        try:
+            result = generator.sync_installation(args.target, args.dest, args.dry_run, args.previous_manifest)
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile, tarfile.TarError) as e:
+            print(f"❌ Synchronisation impossible: {e}")
+            exit(1)
+        print(f"🔄 {args.dest}: {result['changed']} modifié(s), {result['added']} ajouté(s), "
+              f"{result['removed']} supprimé(s), {result['unchanged']} inchangé(s) "
+              f"({result['hashed']} empreinte(s) recalculée(s), "
+              f"{generator.format_size(result['written_bytes'])} écrits, {result['seconds']:.2f}s)"
+              + (" [simulation]" if args.dry_run else ""))
+        return
+    
+    if args.command == 'publish':
+        if not generator.publisher:
+            print("❌ --publish-endpoint requis")
+            exit(1)
+        for index_path in sorted(generator.packages_dir.glob('pageforge-*.volumes.json')):
+            index = json.loads(index_path.read_text(encoding='utf-8'))
+            for volume in index['volumes']:
+                generator.publisher.submit(generator.packages_dir / volume['name'])
+        generator.finish_publication()
+        return
+    
     generator.generate_all_packages()
 
 if __name__ == "__main__":
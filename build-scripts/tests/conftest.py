@@ -0,0 +1,99 @@
+"""
+Fixtures communes : chaque test travaille sur une copie du dépôt (bac à sable)
+pour que les packages, le cache et les fichiers modifiés restent dans tmp_path.
+"""
+
+import datetime
+import importlib.util
+import shlex
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+# Contenu minimal nécessaire à la génération des packages
+SANDBOX_ENTRIES = [
+    'client', 'server', 'shared', 'docs', 'config', 'build-scripts',
+    '.htaccess', '.env.example', '.gitignore', 'README.md', 'components.json',
+    'drizzle.config.ts', 'package.json', 'package-lock.json', 'postcss.config.js',
+    'tailwind.config.ts', 'tsconfig.json', 'vite.config.ts',
+]
+
+
+def load_packager(base_dir):
+    """Importe create-packages.py depuis un bac à sable (base_dir = racine de la copie)"""
+    script = Path(base_dir) / 'build-scripts' / 'create-packages.py'
+    name = f'create_packages_{abs(hash(str(script)))}'
+    spec = importlib.util.spec_from_file_location(name, script)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def sandbox(tmp_path):
+    """Copie du dépôt dans tmp_path (sans packages/, node_modules ni caches)"""
+    root = tmp_path / 'repo'
+    root.mkdir()
+    ignore = shutil.ignore_patterns('node_modules', '__pycache__', '.pytest_cache', 'tests')
+    for entry in SANDBOX_ENTRIES:
+        src = REPO_ROOT / entry
+        if src.is_dir():
+            shutil.copytree(src, root / entry, ignore=ignore)
+        elif src.exists():
+            shutil.copy2(src, root / entry)
+    # Installateurs référencés par les cibles mais absents du dépôt : contenu factice
+    for installer in ('install-cpanel.php', 'install-local.php'):
+        path = root / 'build-scripts' / installer
+        if not path.exists():
+            path.write_text(f'<?php\n// {installer} (bac à sable de test)\n', encoding='utf-8')
+    return root
+
+
+@pytest.fixture
+def packager(sandbox):
+    """Module create-packages chargé depuis le bac à sable"""
+    return load_packager(sandbox)
+
+
+@pytest.fixture
+def make_generator(packager, tmp_path):
+    """Fabrique de générateurs : options par défaut sans budgets ni seuil de progression"""
+    budgets = tmp_path / 'no-budgets.json'
+    budgets.write_text('{}', encoding='utf-8')
+
+    def factory(**options):
+        options.setdefault('budgets', budgets)
+        options.setdefault('progress_threshold', 1 << 62)
+        return packager.PageForgePackageGenerator(options)
+
+    return factory
+
+
+@pytest.fixture
+def frozen_date(packager, monkeypatch):
+    """Date fixe dans PACKAGE-INFO.md : deux builds successifs sont comparables octet par octet"""
+    class FrozenDatetime(datetime.datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return cls(2026, 1, 1, 12, 0, 0)
+
+    monkeypatch.setattr(packager, 'datetime', FrozenDatetime)
+
+
+@pytest.fixture
+def vite_build():
+    """Commande de build précompilé factice (--prebuild) : dist/index.js et `files` dans dist/public"""
+    def command(files):
+        script = ("import pathlib\npathlib.Path('dist').mkdir()\npathlib.Path('dist/index.js').write_text('')\n"
+                  f"for name, text in {files!r}.items():\n"
+                  "    path = pathlib.Path('dist/public') / name\n"
+                  "    path.parent.mkdir(parents=True, exist_ok=True)\n"
+                  "    path.write_text(text)\n")
+        return f'{shlex.quote(sys.executable)} -c {shlex.quote(script)}'
+
+    return command
@@ -0,0 +1,54 @@
+"""Assets à empreinte de contenu (--hash-assets) sur un build Vite (dist/public)"""
+
+import json
+import re
+import zipfile
+
+VITE_FILES = {
+    'index.html': '<!doctype html><head><link rel="icon" href="/logo.svg">'
+                  '<script type="module" src="/assets/index-Ab12Cd34.js"></script>'
+                  '<link rel="stylesheet" href="/assets/index-Xy98Zw76.css"></head>',
+    'assets/index-Ab12Cd34.js': 'console.log("app")',
+    'assets/index-Xy98Zw76.css': 'body{margin:0}',
+}
+
+
+def cpanel_files(generator):
+    with zipfile.ZipFile(generator.packages_dir / generator.archive_name('cpanel')) as zipf:
+        return {name.split('/', 1)[-1]: zipf.read(name).decode('utf-8')
+                for name in zipf.namelist() if not name.endswith('/')}
+
+
+def test_public_assets_renamed_and_vite_assets_immutable(make_generator, vite_build):
+    generator = make_generator(prebuild=True, hash_assets=True,
+                               build_command=vite_build(dict(VITE_FILES, **{'logo.svg': '<svg/>'})))
+    generator.generate_cpanel_package()
+    files = cpanel_files(generator)
+
+    manifest = json.loads(files['asset-manifest.json'])
+    logo = manifest['assets']['dist/public/logo.svg']
+    assert re.fullmatch(r'dist/public/logo\.[0-9a-f]{10}\.svg', logo['file'])
+    assert logo['file'] in files and 'dist/public/logo.svg' not in files
+    assert f'href="{logo["url"]}"' in files['dist/public/index.html']
+    # Fichiers Vite : gardent leur nom, listés dans le manifeste
+    assert sorted(manifest['vite_assets']) == ['dist/public/assets/index-Ab12Cd34.js',
+                                               'dist/public/assets/index-Xy98Zw76.css']
+    assert 'dist/public/assets/index-Ab12Cd34.js' in files
+
+    htaccess = files['.htaccess']
+    assert htaccess.count('immutable') == 2
+    assert '\\.[0-9a-f]{10}\\.(svg)' in htaccess
+    assert '-[A-Za-z0-9_-]{8}\\.(css|js)' in htaccess
+    assert generator.report['fingerprinted'][f'pageforge-cpanel-v{generator.version}']['vite_assets'] == 2
+
+
+def test_vite_only_build_still_gets_manifest_and_cache_rules(make_generator, vite_build, capsys):
+    generator = make_generator(prebuild=True, hash_assets=True, build_command=vite_build(VITE_FILES))
+    generator.generate_cpanel_package()
+    files = cpanel_files(generator)
+
+    manifest = json.loads(files['asset-manifest.json'])
+    assert manifest['assets'] == {} and len(manifest['vite_assets']) == 2
+    assert manifest['vite_assets']['dist/public/assets/index-Xy98Zw76.css']['size'] == len('body{margin:0}')
+    assert files['.htaccess'].count('immutable') == 1
+    assert 'aucun asset à renommer' in capsys.readouterr().out
@@ -0,0 +1,86 @@
+"""Analyse des tailles (--analyze, analyze) et budgets par cible (package-budgets.json)"""
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+
+@pytest.fixture
+def cpanel_analysis(make_generator):
+    generator = make_generator()
+    generator.generate_cpanel_package()
+    return generator, generator.analyze_packages(print_treemap=False)['cpanel']
+
+
+def used(analysis, prefix=None, suffix=None, kind='compressed'):
+    return sum(e[kind] for e in analysis['files']
+               if (prefix is None or e['path'].startswith(prefix)) and (suffix is None or e['path'].endswith(suffix)))
+
+
+def test_shipped_budgets_hold_for_current_tree(packager, make_generator):
+    # Budgets vérifiés à chaque build : le dépôt actuel doit les respecter
+    generator = make_generator(budgets=packager.DEFAULT_OPTIONS['budgets'])
+    budgets = generator.load_size_budgets()
+    assert set(budgets) == set(generator.targets)
+    for target in generator.targets:
+        getattr(generator, f'generate_{target}_package')()
+    assert generator.check_size_budgets(generator.analyze_packages(print_treemap=False), budgets) == []
+
+
+def test_violations_name_budget_and_offenders(cpanel_analysis, capsys):
+    generator, analysis = cpanel_analysis
+    budgets = {'cpanel': {
+        'archive': '1 KB',
+        'compressed': {'server/': '1 KB', '*.MD': 1, 'client/': '100 MB'},
+        'uncompressed': {'server/storage.ts': '1 KB'},
+    }}
+    violations = generator.check_size_budgets({'cpanel': analysis}, budgets)
+    by_budget = {(v['budget'], v['kind']): v for v in violations}
+    assert set(by_budget) == {('archive', 'compressed'), ('server/', 'compressed'), ('*.MD', 'compressed'),
+                              ('server/storage.ts', 'uncompressed')}
+
+    assert by_budget['archive', 'compressed']['used'] == analysis['archive_bytes']
+    server = by_budget['server/', 'compressed']
+    assert server['limit'] == 1024 and server['used'] == used(analysis, 'server/')
+    # Au plus les 5 plus gros fichiers du budget, du plus gros au plus petit
+    offenders = [o['bytes'] for o in server['offenders']]
+    assert offenders == sorted((e['compressed'] for e in analysis['files'] if e['path'].startswith('server/')),
+                               reverse=True)[:5]
+    assert len(by_budget['archive', 'compressed']['offenders']) == 5
+    # Motif d'extension insensible à la casse
+    assert by_budget['*.MD', 'compressed']['used'] == used(analysis, suffix='.md')
+    assert by_budget['server/storage.ts', 'uncompressed']['offenders'] == [
+        {'path': 'server/storage.ts', 'bytes': used(analysis, 'server/storage.ts', kind='uncompressed')}]
+
+    assert generator.report['size_budgets']['violations'] == violations
+    assert '❌ Budget cpanel « server/ » (compressed) dépassé' in capsys.readouterr().out
+
+
+def test_ignore_patterns_apply_to_every_budget(cpanel_analysis):
+    generator, analysis = cpanel_analysis
+    ignored = used(analysis, 'server/') + used(analysis, suffix='.md')
+    limit = analysis['archive_bytes'] - ignored
+    budget = {'archive': limit, 'ignore': ['server/', '*.md'], 'compressed': {'server/': 0, '*.md': 0}}
+    assert generator.check_size_budgets({'cpanel': analysis}, {'cpanel': budget}) == []
+
+    # Un octet de moins : seul le budget global (en-têtes compris) est dépassé
+    budget['archive'] = limit - 1
+    violations = generator.check_size_budgets({'cpanel': analysis}, {'cpanel': budget})
+    assert [(v['budget'], v['used']) for v in violations] == [('archive', limit)]
+    assert not any(o['path'].startswith('server/') or o['path'].endswith('.md') for o in violations[0]['offenders'])
+
+    # Motif de dossier : préfixe complet, pas de correspondance partielle du nom
+    budget = {'ignore': ['serv'], 'compressed': {'server': 0}}
+    assert [v['budget'] for v in generator.check_size_budgets({'cpanel': analysis}, {'cpanel': budget})] == ['server']
+
+
+def test_analyze_command_fails_on_exceeded_budget(sandbox, cpanel_analysis, tmp_path):
+    budgets = tmp_path / 'budgets.json'
+    budgets.write_text(json.dumps({'cpanel': {'compressed': {'server/': '1 KB'}}}), encoding='utf-8')
+    result = subprocess.run([sys.executable, str(sandbox / 'build-scripts' / 'create-packages.py'),
+                             '--budgets', str(budgets), 'analyze'], capture_output=True, text=True)
+    assert result.returncode == 1
+    assert '❌ Budget cpanel « server/ »' in result.stdout
+    assert (sandbox / 'packages' / 'SIZE-ANALYSIS.json').is_file()
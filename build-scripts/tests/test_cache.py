@@ -0,0 +1,75 @@
+"""Cache d'artefacts (--cache-dir) : clés des cibles et écritures concurrentes"""
+
+import os
+import threading
+
+
+def test_root_htaccess_change_misses_cpanel_cache(sandbox, make_generator, tmp_path):
+    cache_dir = tmp_path / 'cache'
+    generator = make_generator(cache_dir=str(cache_dir))
+    key = generator.compute_target_key('cpanel')
+    generator.generate_cpanel_package()
+    generator.store_in_cache('cpanel', key)
+    assert generator.cache.get('archives', key) is not None
+
+    # Le .htaccess racine est recopié dans le .htaccess cPanel : le modifier invalide le cache
+    htaccess = sandbox / '.htaccess'
+    htaccess.write_text(htaccess.read_text(encoding='utf-8') + '\nHeader set X-Test "1"\n', encoding='utf-8')
+
+    fresh = make_generator(cache_dir=str(cache_dir))
+    new_key = fresh.compute_target_key('cpanel')
+    assert new_key != key
+    assert fresh.cache.get('archives', new_key) is None
+
+
+def test_root_htaccess_change_keeps_other_targets_cached(sandbox, make_generator):
+    generator = make_generator()
+    keys = {target: generator.compute_target_key(target) for target in ('windows', 'linux', 'vscode')}
+
+    htaccess = sandbox / '.htaccess'
+    htaccess.write_text(htaccess.read_text(encoding='utf-8') + '\n# test\n', encoding='utf-8')
+
+    fresh = make_generator()
+    assert {target: fresh.compute_target_key(target) for target in keys} == keys
+
+
+def test_rewritten_key_never_pairs_new_data_with_old_meta(packager, tmp_path):
+    cache = packager.ArtifactCache(tmp_path / 'cache')
+    versions = [b'index v1 ' * 5000, b'index v2 ' * 6000]
+    cache.put_bytes('stages', 'layout-index', versions[0])
+
+    stop = threading.Event()
+
+    def writer():
+        for i in range(200):
+            cache.put_bytes('stages', 'layout-index', versions[i % 2])
+        stop.set()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    seen = []
+    while not stop.is_set():
+        entry = cache.get_bytes('stages', 'layout-index')
+        assert entry is not None
+        data, meta = entry
+        assert data in versions and meta['size'] == len(data)
+        seen.append(data)
+    thread.join()
+    # Aucune lecture n'a supprimé l'entrée valide
+    assert cache.get_bytes('stages', 'layout-index')[0] == versions[199 % 2]
+    assert cache.misses['stages'] == 0
+
+
+def test_replaced_versions_are_collected_after_grace_period(packager, tmp_path):
+    cache = packager.ArtifactCache(tmp_path / 'cache')
+    old = cache.put_bytes('archives', 'abc123', b'ancienne archive')
+    new = cache.put_bytes('archives', 'abc123', b'nouvelle archive')
+    assert old != new and old.exists()
+
+    # Un lecteur a pu obtenir l'ancien chemin juste avant la réécriture : gardé pendant ORPHAN_AGE
+    cache.enforce_size_limit()
+    assert old.exists()
+    os.utime(old, (0, 0))
+    cache.enforce_size_limit()
+    assert not old.exists()
+    assert cache.get('archives', 'abc123') == new
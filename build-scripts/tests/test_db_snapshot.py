@@ -0,0 +1,77 @@
+"""Base SQLite pré-migrée (--db-snapshot) confrontée à shared/schema.ts"""
+
+import json
+import re
+import sqlite3
+import tarfile
+
+import pytest
+
+
+def schema_columns(source):
+    """Tables et colonnes déclarées dans schema.ts : {table: {colonne: notNull}}"""
+    tables = {}
+    for match in re.finditer(r'= \w+Table\("(\w+)", \{(.*?)\n\}\);', source, re.S):
+        columns = {}
+        for line in match.group(2).splitlines():
+            column = re.match(r'\s*\w+: \w+\("(\w+)"\)(.*)', line)
+            if column:
+                columns[column.group(1)] = '.notNull()' in column.group(2) or '.primaryKey()' in column.group(2)
+        tables[match.group(1)] = columns
+    return tables
+
+
+@pytest.fixture
+def linux_snapshot(make_generator, tmp_path):
+    generator = make_generator(db_snapshot=True)
+    generator.generate_linux_package()
+    with tarfile.open(generator.packages_dir / generator.archive_name('linux'), 'r:gz') as tar:
+        files = {m.name.split('/', 1)[-1]: tar.extractfile(m).read() for m in tar.getmembers() if m.isfile()}
+    database = tmp_path / 'database.sqlite'
+    database.write_bytes(files['database.snapshot.sqlite'])
+    return files, database
+
+
+def test_snapshot_matches_schema_tables_and_columns(sandbox, linux_snapshot):
+    files, database = linux_snapshot
+    expected = schema_columns((sandbox / 'shared' / 'schema.ts').read_text(encoding='utf-8'))
+    assert set(expected) == {'users', 'projects', 'templates', 'pages', 'deployments'}
+
+    connection = sqlite3.connect(database)
+    try:
+        tables = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        assert tables == set(expected) | {'__pageforge_snapshot'}
+        for table, columns in expected.items():
+            info = {row[1]: bool(row[3] or row[5]) for row in connection.execute(f'PRAGMA table_info("{table}")')}
+            assert info == columns, table
+        references = {(row[3], row[2], row[4]) for row in connection.execute('PRAGMA foreign_key_list("pages")')}
+        assert references == {('project_id', 'projects', 'id')}
+        # Les valeurs par défaut SQL sont exécutables : une ligne minimale s'insère
+        connection.execute('INSERT INTO "projects" ("name") VALUES (?)', ('Démo',))
+        row = connection.execute('SELECT "id", "type", "content", "is_active" FROM "projects"').fetchone()
+        assert len(row[0]) == 32 and row[1:] == ('standalone', '{}', 1)
+        schema_sha256, = connection.execute('SELECT "schema_sha256" FROM "__pageforge_snapshot"').fetchone()
+    finally:
+        connection.close()
+
+    info = json.loads(files['database.snapshot.json'])
+    assert info['schema_sha256'] == schema_sha256
+    assert info['tables'] == list(expected)
+
+
+def test_installers_apply_the_snapshot(linux_snapshot):
+    files, _ = linux_snapshot
+    assert b'function pageforge_install_database_snapshot' in files['install-database.php']
+    assert files['install.php'].startswith(b'<?php\nif (is_file(__DIR__ . \'/install-database.php\'))')
+    for script in ('start-installer.sh', 'install-cli.sh'):
+        content = files[script].decode('utf-8')
+        installer = 'php install.php' if 'cli' in script else 'php -S'
+        assert content.index('php install-database.php || exit 1') < content.index(installer)
+
+
+def test_unsupported_drizzle_construct_fails_the_build(packager):
+    with pytest.raises(ValueError, match='jsonb2'):
+        packager.drizzle_schema_to_sqlite('export const t = pgTable("t", {\n  a: jsonb2("a"),\n});')
+    with pytest.raises(ValueError, match='generatedAlwaysAs'):
+        packager.drizzle_schema_to_sqlite(
+            'export const t = pgTable("t", {\n  a: integer("a").generatedAlwaysAs(sql`1`),\n});')
@@ -0,0 +1,82 @@
+"""Compression répartie (--build-nodes) sur des CompressionNode de localhost"""
+
+import tarfile
+import threading
+import zipfile
+
+import pytest
+
+pytestmark = pytest.mark.usefixtures('frozen_date')
+
+
+@pytest.fixture
+def build_nodes(packager):
+    """Démarre des CompressionNode sur des ports libres ; rend leurs adresses HÔTE:PORT"""
+    servers = []
+
+    def start(*limits):
+        for max_items in limits:
+            server = packager.CompressionNode(('127.0.0.1', 0), max_items)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            servers.append(server)
+        return servers, [f'127.0.0.1:{server.server_address[1]}' for server in servers]
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def archive_contents(path):
+    """Contenu de chaque membre : {chemin: (octets, données compressées brutes ou None)}"""
+    if path.name.endswith('.zip'):
+        with zipfile.ZipFile(path) as archive, open(path, 'rb') as raw:
+            contents = {}
+            for info in archive.infolist():
+                # Entête local : 30 octets + nom + extra, puis les données compressées
+                raw.seek(info.header_offset + 26)
+                name_size, extra_size = int.from_bytes(raw.read(2), 'little'), int.from_bytes(raw.read(2), 'little')
+                raw.seek(name_size + extra_size, 1)
+                contents[info.filename] = (archive.read(info), raw.read(info.compress_size))
+            return contents
+    with tarfile.open(path, 'r:gz') as archive:
+        return {m.name: (archive.extractfile(m).read() if m.isfile() else b'', None) for m in archive.getmembers()}
+
+
+def build_archives(generator):
+    generator.generate_all_packages()
+    return {
+        target: archive_contents(generator.packages_dir / generator.archive_name(target))
+        for target in ('cpanel', 'windows', 'linux')
+    }
+
+
+def test_distributed_build_matches_local_build(make_generator, build_nodes):
+    local = build_archives(make_generator())
+    servers, nodes = build_nodes(None, None)
+
+    generator = make_generator(build_nodes=nodes)
+    distributed = build_archives(generator)
+    # Mêmes membres, mêmes octets ; dans les zip, les données compressées elles-mêmes sont identiques
+    assert distributed == local
+    stats = generator.report['distributed']
+    assert all(count > 0 for count in stats['items'].values()), stats
+    assert stats['local_items'] == 0 and stats['retried'] == 0
+
+
+@pytest.mark.parametrize('limits', [(20, None), (20,)], ids=['one-node-drops', 'all-nodes-drop'])
+def test_node_dropping_mid_build_falls_back_cleanly(make_generator, build_nodes, limits):
+    local = build_archives(make_generator())
+    servers, nodes = build_nodes(*limits)
+
+    generator = make_generator(build_nodes=nodes, verify=True)
+    assert build_archives(generator) == local
+    stats = generator.report['distributed']
+    assert stats['retried'] > 0
+    assert stats['items'][nodes[0]] == 20
+    if len(nodes) > 1:
+        # Les blocs du nœud perdu sont repris par le nœud restant
+        assert stats['items'][nodes[1]] > 0 and stats['local_items'] == 0
+    else:
+        # Plus aucun nœud : le coordinateur termine le build lui-même
+        assert stats['local_items'] > 0
@@ -0,0 +1,91 @@
+"""Fichiers identiques : hardlinks tar (--no-tar-hardlinks pour désactiver) et doublons partagés zip"""
+
+import hashlib
+import json
+import shutil
+import tarfile
+import zipfile
+
+import pytest
+
+CONTENT = b'export const shared = "identique";\n' * 40
+
+
+@pytest.fixture
+def identical_files(sandbox):
+    """Trois copies d'un même contenu, dont une avec d'autres droits"""
+    shared = sandbox / 'shared'
+    (shared / 'copy-a.ts').write_bytes(CONTENT)
+    (shared / 'copy-b.ts').write_bytes(CONTENT)
+    (shared / 'copy-exec.ts').write_bytes(CONTENT)
+    for name in ('copy-a.ts', 'copy-b.ts'):
+        (shared / name).chmod(0o644)
+    (shared / 'copy-exec.ts').chmod(0o755)
+
+
+def tar_members(generator):
+    with tarfile.open(generator.packages_dir / generator.archive_name('linux'), 'r:gz') as tar:
+        return {m.name.split('/', 1)[1]: m for m in tar.getmembers() if '/' in m.name}
+
+
+def test_identical_files_become_tar_hardlinks_only_with_same_mode(make_generator, identical_files, tmp_path):
+    generator = make_generator()
+    generator.generate_linux_package()
+    members = tar_members(generator)
+
+    first, second, executable = members['shared/copy-a.ts'], members['shared/copy-b.ts'], members['shared/copy-exec.ts']
+    assert first.isfile() and first.size == len(CONTENT)
+    assert second.type == tarfile.LNKTYPE and second.linkname.endswith('/shared/copy-a.ts') and second.size == 0
+    # Droits différents : un hardlink imposerait ceux de la cible, le fichier est donc stocké
+    assert executable.isfile() and executable.mode & 0o777 == 0o755
+    assert generator.report['duplicates']['linux']['saved_bytes'] >= len(CONTENT)
+
+    # Extraction par tar : chaque copie retrouve son contenu et ses droits
+    with tarfile.open(generator.packages_dir / generator.archive_name('linux'), 'r:gz') as tar:
+        tar.extractall(tmp_path / 'out', filter='data')
+    root = next((tmp_path / 'out').iterdir())
+    for name, mode in (('copy-a.ts', 0o644), ('copy-b.ts', 0o644), ('copy-exec.ts', 0o755)):
+        path = root / 'shared' / name
+        assert path.read_bytes() == CONTENT and path.stat().st_mode & 0o777 == mode
+    assert generator.verify_archive('linux')['ok']
+
+
+def test_hardlinks_can_be_disabled(make_generator, identical_files):
+    generator = make_generator(tar_hardlinks=False)
+    generator.generate_linux_package()
+    members = tar_members(generator)
+    assert not any(m.islnk() for m in members.values())
+    assert members['shared/copy-b.ts'].size == len(CONTENT)
+
+
+def test_zip_shared_duplicates_are_restored(make_generator, identical_files, tmp_path):
+    generator = make_generator(zip_duplicates='shared')
+    generator.generate_vscode_package()
+    archive = generator.packages_dir / generator.archive_name('vscode')
+
+    with zipfile.ZipFile(archive) as zipf:
+        names = {name.split('/', 1)[1] for name in zipf.namelist()}
+        zipf.extractall(tmp_path / 'out')
+    root = next((tmp_path / 'out').iterdir())
+    duplicates = json.loads((root / '.pageforge-duplicates.json').read_text(encoding='utf-8'))['files']
+    # Une seule copie livrée par contenu (droits ignorés : zip ne les restaure pas à l'installation)
+    stored = {'shared/copy-a.ts', 'shared/copy-b.ts', 'shared/copy-exec.ts'} & names
+    assert len(stored) == 1
+    assert {dup for dup, src in duplicates.items() if src in stored} == \
+        {'shared/copy-a.ts', 'shared/copy-b.ts', 'shared/copy-exec.ts'} - stored
+
+    # Restauration comme l'installateur (copie de la source vers chaque doublon), puis contrôle du manifeste
+    for dup, src in duplicates.items():
+        shutil.copyfile(root / src, root / dup)
+    manifest_path = generator.packages_dir / f'{archive.name}.manifest.json'
+    for member in json.loads(manifest_path.read_text(encoding='utf-8'))['members']:
+        assert hashlib.sha256((tmp_path / 'out' / member['path']).read_bytes()).hexdigest() == member['sha256']
+    assert generator.verify_archive('vscode')['ok']
+
+    # Mode report : tout est livré, les doublons sont seulement signalés
+    generator = make_generator(zip_duplicates='report')
+    generator.generate_vscode_package()
+    with zipfile.ZipFile(generator.packages_dir / generator.archive_name('vscode')) as zipf:
+        names = {name.split('/', 1)[1] for name in zipf.namelist()}
+    assert {'shared/copy-a.ts', 'shared/copy-b.ts', 'shared/copy-exec.ts'} <= names
+    assert '.pageforge-duplicates.json' not in names
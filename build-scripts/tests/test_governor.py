@@ -0,0 +1,73 @@
+"""Temporisation du ResourceGovernor (--governed)"""
+
+import threading
+import time
+
+
+def frozen_load(governor, factor):
+    """Facteur de charge imposé, sans relecture de la charge système pendant le test"""
+    governor.factor = factor
+    governor.load_interval = 3600
+    governor._last_load_check = time.monotonic()
+
+
+def work(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_load_factor_applies_without_rate_limit(packager):
+    governor = packager.ResourceGovernor(read_rate=None, write_rate=None)
+    frozen_load(governor, 0.5)
+
+    governor.throttle('read', 4096)
+    work(0.05)
+    start = time.perf_counter()
+    governor.throttle('read', 4096)
+    # Facteur 1/2 : autant de pause que de travail
+    assert time.perf_counter() - start >= 0.045
+    assert 0.045 <= governor.throttled_seconds['read'] <= 0.1
+    assert governor.bytes['read'] == 8192
+
+
+def test_no_pause_at_full_speed(packager):
+    governor = packager.ResourceGovernor(read_rate=None, write_rate=None)
+    frozen_load(governor, 1.0)
+    for _ in range(3):
+        governor.throttle('write', 4096)
+        work(0.01)
+    assert governor.throttled_seconds['write'] == 0
+
+
+def test_high_load_backs_off_unlimited_transfers(packager, monkeypatch):
+    monkeypatch.setattr(packager.os, 'getloadavg', lambda: (64.0 * (packager.os.cpu_count() or 1),) * 3)
+    governor = packager.ResourceGovernor(read_rate=None, write_rate=None, load_interval=0)
+    governor.throttle('read', 1)
+    work(0.02)
+    governor.throttle('read', 1)
+    assert governor.backoffs == 2 and governor.factor == 0.25
+    assert governor.throttled_seconds['read'] > 0
+
+
+def test_throttled_seconds_are_consistent_across_threads(packager):
+    # 4 threads à 1 Mo/s partagé : 400 Ko au-delà de la rafale tolérée ~ 0,4 s de temporisation cumulée
+    governor = packager.ResourceGovernor(read_rate=1024 ** 2, write_rate=None, buffer_size=4096)
+    frozen_load(governor, 1.0)
+    delays = []
+
+    def transfer():
+        for _ in range(25):
+            start = time.perf_counter()
+            governor.throttle('read', 4096)
+            delays.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=transfer) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert governor.bytes['read'] == 100 * 4096
+    # Chaque attente est comptée une seule fois, sans perte sous concurrence
+    assert governor.throttled_seconds['read'] <= sum(delays)
+    assert governor.throttled_seconds['read'] >= 0.9 * sum(d for d in delays if d > 0.001) - 0.05
@@ -0,0 +1,71 @@
+"""Historique des builds (SQLite) et détection des régressions de taille et de durée"""
+
+import pytest
+
+
+@pytest.fixture
+def linux_build(make_generator, tmp_path):
+    """Archive Linux construite, historique dans tmp_path, référence sur les 3 dernières exécutions"""
+    generator = make_generator(history_db=tmp_path / 'history.sqlite', history_window=3)
+    generator.generate_linux_package()
+    return generator
+
+
+def run(generator, seconds, build_seconds=None, cached=False):
+    generator.report = {
+        'targets': {'linux': {'seconds': seconds, 'cached': cached}},
+        'build_seconds': seconds if build_seconds is None else build_seconds,
+    }
+    return {(r['target'], r['metric']) for r in generator.record_build_history()}
+
+
+def seed(packager, generator, archive_bytes, seconds, runs=3):
+    history = packager.BuildHistory(generator.history_path)
+    try:
+        for _ in range(runs):
+            history.record(generator.version, None, seconds, {'linux': {
+                'archive_bytes': archive_bytes, 'uncompressed_bytes': archive_bytes * 4, 'files': 100,
+                'seconds': seconds}}, {}, {})
+    finally:
+        history.close()
+
+
+def test_first_runs_set_the_baseline(linux_build):
+    assert run(linux_build, 2.0) == set()
+    assert linux_build.report['regressions'] == []
+    assert run(linux_build, 2.4) == set()
+    assert linux_build.report['history']['run_id'] == 2
+
+
+def test_size_regression_against_rolling_median(packager, linux_build):
+    size = linux_build.archive_size(linux_build.archive_name('linux'))
+    # Runs anciens hors fenêtre (3) : ils ne comptent plus dans la référence
+    seed(packager, linux_build, size * 10, 2.0)
+    seed(packager, linux_build, size // 2, 2.0)
+    assert run(linux_build, 2.0) == {('linux', 'archive_bytes')}
+    regression = linux_build.report['regressions'][0]
+    assert regression['baseline'] == size // 2 and regression['ratio'] == pytest.approx(2, rel=0.01)
+    assert regression['threshold'] == linux_build.options['size_regression']
+
+    # Sous le seuil de +25 % : pas de régression
+    seed(packager, linux_build, int(size / 1.2), 2.0)
+    assert run(linux_build, 2.0) == set()
+
+
+def test_sub_second_timings_are_ignored(packager, linux_build):
+    size = linux_build.archive_size(linux_build.archive_name('linux'))
+    seed(packager, linux_build, size, 0.1)
+    # x8 mais sous la seconde : bruit, ni la cible ni le build ne sont signalés
+    assert run(linux_build, 0.8) == set()
+
+    seed(packager, linux_build, size, 0.5)
+    assert run(linux_build, 1.5) == {('linux', 'seconds'), (None, 'build_seconds')}
+    assert linux_build.report['regressions'][0]['ratio'] == 3.0
+
+
+def test_cached_targets_skip_time_checks(packager, linux_build):
+    size = linux_build.archive_size(linux_build.archive_name('linux'))
+    seed(packager, linux_build, size, 1.0)
+    # Restauration du cache : sa durée n'est comparée à rien, seule celle du build l'est
+    assert run(linux_build, 5.0, build_seconds=1.0, cached=True) == set()
+    assert run(linux_build, 5.0, cached=False) == {('linux', 'seconds'), (None, 'build_seconds')}
@@ -0,0 +1,92 @@
+"""Optimisation PNG sans perte (--optimize-images)"""
+
+import struct
+import tarfile
+import zlib
+
+WIDTH, HEIGHT = 24, 10
+
+
+def chunk(kind, body):
+    return struct.pack('>I', len(body)) + kind + body + struct.pack('>I', zlib.crc32(kind + body))
+
+
+def make_png():
+    """PNG RVB 8 bits : un filtre différent par ligne, IDAT peu compressé et coupé en deux, chunk texte"""
+    raw = bytearray()
+    for y in range(HEIGHT):
+        raw.append(y % 5)
+        raw.extend((x * 7 + y * 13 + c * 31) % 256 for x in range(WIDTH) for c in range(3))
+    idat = zlib.compress(bytes(raw), 1)
+    return b''.join([
+        b'\x89PNG\r\n\x1a\n',
+        chunk(b'IHDR', struct.pack('>IIBBBBB', WIDTH, HEIGHT, 8, 2, 0, 0, 0)),
+        chunk(b'tEXt', b'Comment\0capture d\'ecran'),
+        chunk(b'IDAT', idat[:len(idat) // 2]),
+        chunk(b'IDAT', idat[len(idat) // 2:]),
+        chunk(b'IEND', b''),
+    ])
+
+
+def decode_pixels(data):
+    """Décodeur de référence : IDAT décompressé puis lignes défiltrées (RVB 8 bits)"""
+    pos, idat = 8, b''
+    while pos < len(data):
+        length, kind = struct.unpack('>I4s', data[pos:pos + 8])
+        body = data[pos + 8:pos + 8 + length]
+        if kind == b'IHDR':
+            width, height, depth, colour = struct.unpack('>IIBB', body[:10])
+            assert (depth, colour) == (8, 2)
+        elif kind == b'IDAT':
+            idat += body
+        pos += 12 + length
+    raw = zlib.decompress(idat)
+    stride, bpp = width * 3, 3
+    rows, previous = [], bytearray(stride)
+    for y in range(height):
+        kind = raw[y * (stride + 1)]
+        row = bytearray(raw[y * (stride + 1) + 1:(y + 1) * (stride + 1)])
+        for i in range(stride):
+            a = row[i - bpp] if i >= bpp else 0
+            b = previous[i]
+            c = previous[i - bpp] if i >= bpp else 0
+            if kind == 1:
+                row[i] = (row[i] + a) & 0xFF
+            elif kind == 2:
+                row[i] = (row[i] + b) & 0xFF
+            elif kind == 3:
+                row[i] = (row[i] + (a + b) // 2) & 0xFF
+            elif kind == 4:
+                p = a + b - c
+                pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+                row[i] = (row[i] + (a if pa <= pb and pa <= pc else b if pb <= pc else c)) & 0xFF
+        rows.append(bytes(row))
+        previous = row
+    return rows
+
+
+def test_redeflated_png_decodes_to_identical_pixels(packager):
+    original = make_png()
+    optimized = packager.optimize_png(original)
+
+    assert optimized is not None and len(optimized) < len(original)
+    assert b'tEXt' not in optimized
+    assert decode_pixels(optimized) == decode_pixels(original)
+
+
+def test_shipped_public_images_are_optimized(sandbox, make_generator):
+    original = make_png()
+    (sandbox / 'client' / 'public').mkdir(parents=True, exist_ok=True)
+    (sandbox / 'client' / 'public' / 'logo.png').write_bytes(original)
+
+    generator = make_generator(optimize_images=True)
+    generator.generate_linux_package()
+
+    with tarfile.open(generator.packages_dir / generator.archive_name('linux'), 'r:gz') as tar:
+        files = {m.name.split('/', 1)[-1]: tar.extractfile(m).read() for m in tar.getmembers() if m.isfile()}
+    shipped = files['client/public/logo.png']
+    assert len(shipped) < len(original)
+    assert decode_pixels(shipped) == decode_pixels(original)
+    # attached_assets n'est pas livré : seules les images du package sont comptées
+    assert not any(name.startswith('attached_assets/') for name in files)
+    assert generator.report['images']['files'] == 1
@@ -0,0 +1,124 @@
+"""Inspection sans extraction (inspect) : index de reprise des .tar.gz, lecture de membres, diff"""
+
+import hashlib
+import json
+import os
+import random
+import subprocess
+import sys
+import tarfile
+import zipfile
+
+import pytest
+
+
+@pytest.fixture
+def seed_data(sandbox):
+    """Fichier peu compressible : plusieurs points de reprise dans l'archive Linux"""
+    rng = random.Random(5)
+    (sandbox / 'server' / 'seed-data.txt').write_text(
+        '\n'.join(f'{rng.getrandbits(128):032x}' for _ in range(20000)), encoding='utf-8')
+
+
+def tar_contents(archive):
+    with tarfile.open(archive, 'r:gz') as tar:
+        return {m.name: tar.extractfile(m).read() for m in tar.getmembers() if m.isfile()}
+
+
+@pytest.mark.parametrize('checkpoints', [0, 64 * 1024], ids=['single-stream', 'gzip-checkpoints'])
+def test_list_and_cat_tar_gz_through_seek_index(packager, make_generator, seed_data, checkpoints):
+    generator = make_generator(gzip_checkpoint_interval=checkpoints)
+    generator.generate_linux_package()
+    archive = generator.packages_dir / generator.archive_name('linux')
+    expected = tar_contents(archive)
+
+    with packager.PackageInspector(archive, checkpoint_spacing=64 * 1024) as package:
+        assert package.index_built and package.index_path.exists()
+        files = {m['name']: m for m in package.members() if m['type'] == 'file'}
+        assert {name: m['sha256'] for name, m in files.items()} == {
+            name: hashlib.sha256(data).hexdigest() for name, data in expected.items()}
+        flushes = [c for c in package.index['checkpoints'] if c[2] == 'flush']
+        assert bool(flushes) == bool(checkpoints)
+        for name, data in expected.items():
+            assert b''.join(package.iter_member(name)) == data
+        # Nom relatif à la racine du package
+        assert b''.join(package.iter_member('server/seed-data.txt')) == expected[f'{package.root}/server/seed-data.txt']
+
+
+def test_seek_index_cache_and_invalidation(packager, make_generator):
+    generator = make_generator()
+    generator.generate_linux_package()
+    archive = generator.packages_dir / generator.archive_name('linux')
+
+    with packager.PackageInspector(archive) as package:
+        assert package.index_built
+    with packager.PackageInspector(archive) as package:
+        assert not package.index_built
+
+    # Archive reconstruite (taille ou date différente) : index recalculé
+    stat = archive.stat()
+    os.utime(archive, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    with packager.PackageInspector(archive) as package:
+        assert package.index_built
+
+    # Index illisible : recalculé au lieu d'échouer
+    package.index_path.write_text('{', encoding='utf-8')
+    with packager.PackageInspector(archive) as package:
+        assert package.index_built
+
+    # Index encore daté de l'archive mais faux : le membre lu est refusé
+    index = json.loads(package.index_path.read_text(encoding='utf-8'))
+    entry = next(m for m in index['members'] if m['name'].endswith('/package.json'))
+    entry['sha256'] = '0' * 64
+    package.index_path.write_text(json.dumps(index), encoding='utf-8')
+    with packager.PackageInspector(archive) as package:
+        assert not package.index_built
+        with pytest.raises(ValueError, match='SHA-256'):
+            b''.join(package.iter_member('package.json'))
+
+
+def test_list_and_cat_zip(packager, make_generator):
+    generator = make_generator()
+    generator.generate_cpanel_package()
+    archive = generator.packages_dir / generator.archive_name('cpanel')
+
+    with zipfile.ZipFile(archive) as zipf, packager.PackageInspector(archive) as package:
+        assert package.is_zip and not package.index_path.exists()
+        assert set(package.by_name) == {info.filename.rstrip('/') for info in zipf.infolist()}
+        for info in zipf.infolist():
+            if not info.is_dir():
+                assert package.by_name[info.filename]['crc32'] == info.CRC
+                assert b''.join(package.iter_member(info.filename)) == zipf.read(info)
+
+
+@pytest.mark.parametrize('target', ['linux', 'cpanel'])
+def test_diff_between_versions(packager, sandbox, make_generator, target):
+    generator = make_generator()
+    build = {'linux': generator.generate_linux_package, 'cpanel': generator.generate_cpanel_package}[target]
+    build()
+    old = generator.packages_dir / generator.archive_name(target)
+
+    schema = sandbox / 'shared' / 'schema.ts'
+    schema.write_text(schema.read_text(encoding='utf-8') + '// v2\n', encoding='utf-8')
+    (sandbox / 'shared' / 'validators.ts').write_text('export {}\n', encoding='utf-8')
+    removed = sorted((sandbox / 'server').rglob('*.ts'))[-1]
+    removed.unlink()
+    generator.version = '2.0.1'
+    build()
+    new = generator.packages_dir / generator.archive_name(target)
+
+    with packager.PackageInspector(old) as a, packager.PackageInspector(new) as b:
+        result = packager.diff_packages(a, b)
+    assert [entry['path'] for entry in result['added']] == ['shared/validators.ts']
+    assert [entry['path'] for entry in result['removed']] == [removed.relative_to(sandbox).as_posix()]
+    changed = {entry['path'] for entry in result['changed']}
+    assert 'shared/schema.ts' in changed
+    # Autres changements admis : documents qui citent la version, index d'ordre d'installation
+    assert all(path.endswith(('.md', '.txt', '.pageforge-layout.json')) for path in changed - {'shared/schema.ts'})
+    assert result['unchanged'] > 50
+
+    # Même résultat par la commande (--json)
+    output = subprocess.run([sys.executable, str(sandbox / 'build-scripts' / 'create-packages.py'),
+                             'inspect', 'diff', str(old), str(new), '--json'],
+                            capture_output=True, text=True, check=True).stdout
+    assert json.loads(output[output.index('{'):]) == result
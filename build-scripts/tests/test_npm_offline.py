@@ -0,0 +1,118 @@
+"""Bundle npm hors ligne (--npm-offline) servi par le stand-in de registre"""
+
+import base64
+import hashlib
+import io
+import json
+import tarfile
+import threading
+
+import pytest
+
+PACKAGES = [('left-pad', '1.3.0'), ('@pageforge/util', '0.2.1'), ('ms', '2.1.3')]
+
+
+def make_tarball(name, version):
+    """Tarball npm minimal (package/package.json)"""
+    manifest = json.dumps({'name': name, 'version': version}).encode()
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode='w:gz') as tar:
+        info = tarfile.TarInfo('package/package.json')
+        info.size = len(manifest)
+        info.mtime = 0
+        tar.addfile(info, io.BytesIO(manifest))
+    return buffer.getvalue()
+
+
+def integrity_of(data):
+    return 'sha512-' + base64.b64encode(hashlib.sha512(data).digest()).decode()
+
+
+@pytest.fixture
+def npm_mirror(packager, sandbox, tmp_path):
+    """Miroir de tarballs servi en HTTP et package-lock.json du bac à sable qui le référence"""
+    mirror = tmp_path / 'mirror'
+    tarballs = {}
+    lock = {'name': 'pageforge', 'lockfileVersion': 3, 'packages': {'': {'name': 'pageforge'}}}
+    for name, version in PACKAGES:
+        data = make_tarball(name, version)
+        url_path = f"{name}/-/{name.rsplit('/', 1)[-1]}-{version}.tgz"
+        (mirror / url_path).parent.mkdir(parents=True, exist_ok=True)
+        (mirror / url_path).write_bytes(data)
+        tarballs[name] = data
+        lock['packages'][f'node_modules/{name}'] = {
+            'version': version,
+            'resolved': f'https://registry.npmjs.org/{url_path}',
+            'integrity': integrity_of(data),
+        }
+    # Même tarball à deux emplacements de l'arbre : un seul fichier embarqué
+    lock['packages']['node_modules/@pageforge/util/node_modules/ms'] = dict(lock['packages']['node_modules/ms'])
+    lock['packages']['node_modules/pageforge-shared'] = {'resolved': 'shared', 'link': True}
+    (sandbox / 'package-lock.json').write_text(json.dumps(lock, indent=2), encoding='utf-8')
+
+    server = packager.NpmRegistryStandIn(('127.0.0.1', 0), mirror, quiet=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield {
+        'registry': f'http://127.0.0.1:{server.server_address[1]}',
+        'mirror': mirror,
+        'tarballs': tarballs,
+        'lock': lock,
+    }
+    server.shutdown()
+    server.server_close()
+
+
+def offline_generator(make_generator, npm_mirror, tmp_path):
+    npm_cache = tmp_path / 'empty-npm-cache'
+    npm_cache.mkdir(exist_ok=True)
+    return make_generator(npm_offline=True, npm_registry=npm_mirror['registry'], npm_cache_dir=npm_cache)
+
+
+def test_bundle_from_registry_matches_lockfile_integrity(make_generator, npm_mirror, tmp_path):
+    generator = offline_generator(make_generator, npm_mirror, tmp_path)
+    bundle = generator.build_npm_offline_bundle()
+
+    assert generator.report['npm_offline']['sources'] == {'registry': len(PACKAGES)}
+    assert generator.report['npm_offline']['lock_entries'] == len(PACKAGES) + 1
+    assert len(bundle['tarballs']) == len(PACKAGES)
+    for path, info in bundle['lock']['packages'].items():
+        if not path or info.get('link'):
+            continue
+        original = npm_mirror['lock']['packages'][path]
+        # Intégrité inchangée, source réécrite vers le tarball embarqué, dont le contenu la vérifie
+        assert info['integrity'] == original['integrity']
+        assert info['resolved'].startswith('file:npm-offline/')
+        data = bundle['tarballs'][info['resolved'][len('file:npm-offline/'):]]
+        assert integrity_of(data) == info['integrity']
+    for name, version in PACKAGES:
+        entry = bundle['index'][f'{name}@{version}']
+        assert bundle['tarballs'][entry['file']] == npm_mirror['tarballs'][name]
+        assert entry['resolved'].startswith('https://registry.npmjs.org/')
+
+    # Un second build reprend les tarballs du cache sans interroger le registre
+    again = offline_generator(make_generator, npm_mirror, tmp_path)
+    again.build_npm_offline_bundle()
+    assert again.report['npm_offline']['sources'] == {'cache': len(PACKAGES)}
+
+
+def test_linux_package_embeds_verified_tarballs(make_generator, npm_mirror, tmp_path):
+    generator = offline_generator(make_generator, npm_mirror, tmp_path)
+    generator.generate_linux_package()
+
+    with tarfile.open(generator.packages_dir / generator.archive_name('linux'), 'r:gz') as tar:
+        files = {m.name.split('/', 1)[-1]: tar.extractfile(m).read() for m in tar.getmembers() if m.isfile()}
+    lock = json.loads(files['package-lock.json'])
+    index = json.loads(files['npm-offline/index.json'])
+    assert len(index) == len(PACKAGES)
+    for path, info in lock['packages'].items():
+        if path and not info.get('link'):
+            assert integrity_of(files[info['resolved'][len('file:'):]]) == info['integrity']
+
+
+def test_corrupted_registry_tarball_is_rejected(make_generator, npm_mirror, tmp_path):
+    tarball = npm_mirror['mirror'] / 'left-pad' / '-' / 'left-pad-1.3.0.tgz'
+    tarball.write_bytes(tarball.read_bytes() + b'\0')
+
+    generator = offline_generator(make_generator, npm_mirror, tmp_path)
+    with pytest.raises(ValueError, match='Intégrité invalide pour left-pad@1.3.0'):
+        generator.build_npm_offline_bundle()
@@ -0,0 +1,40 @@
+"""Prévision --plan comparée à des builds réels (check-plan)"""
+
+
+def test_plan_predictions_fall_within_intervals(make_generator):
+    # Les cibles de ce dépôt se construisent en quelques dizaines de millisecondes : un essai
+    # de plus départage une gigue ponctuelle de l'ordonnanceur d'une vraie erreur de modèle
+    for attempt in range(3):
+        ok, results = make_generator().check_plan(max_size_error=0.1)
+        for target, result in results.items():
+            assert result['size_within_bounds'], (target, result)
+            assert abs(result['size_error']) <= 0.1, (target, result)
+            assert result['files'][0] == result['files'][1], (target, result)
+        if ok:
+            break
+    assert ok, results
+
+
+def test_plan_writes_nothing_and_costs_a_fraction_of_the_build(sandbox, make_generator):
+    generator = make_generator()
+    plan = generator.plan_packages(write=False)
+    assert not any(generator.packages_dir.glob('pageforge-*'))
+
+    generator.generate_all_packages()
+    assert plan['plan_seconds'] < 0.5 * generator.report['build_seconds']
+
+
+def test_check_plan_fails_outside_interval(make_generator):
+    generator = make_generator()
+    plan_packages = generator.plan_packages
+
+    def narrowed(write=True):
+        plan = plan_packages(write)
+        plan['targets']['linux'].update(bytes_low=1, bytes_high=1)
+        return plan
+
+    generator.plan_packages = narrowed
+    ok, results = generator.check_plan(max_size_error=0.1)
+    assert not ok
+    assert not results['linux']['size_within_bounds']
+    assert results['cpanel']['size_within_bounds']
@@ -0,0 +1,46 @@
+"""Build précompilé (--prebuild) exécuté hors du dépôt"""
+
+import shlex
+import sys
+import tarfile
+
+# Build factice : dist/index.js et dist/public à partir des sources copiées
+FAKE_BUILD = (
+    "import pathlib; dist = pathlib.Path('dist'); (dist / 'public').mkdir(parents=True); "
+    "(dist / 'index.js').write_text('// ' + str(len(pathlib.Path('shared/schema.ts').read_text()))); "
+    "(dist / 'public' / 'index.html').write_text('<!doctype html>')"
+)
+
+
+def prebuild_generator(make_generator):
+    return make_generator(prebuild=True, build_command=f'{shlex.quote(sys.executable)} -c {shlex.quote(FAKE_BUILD)}')
+
+
+def test_prebuild_leaves_repository_dist_untouched(sandbox, make_generator):
+    dist = sandbox / 'dist'
+    (dist / 'public').mkdir(parents=True)
+    (dist / 'index.js').write_text('// build du développeur\n', encoding='utf-8')
+    (dist / 'public' / 'dev-only.js').write_text('console.log(1)\n', encoding='utf-8')
+    before = {path.relative_to(dist): path.read_bytes() for path in dist.rglob('*') if path.is_file()}
+
+    generator = prebuild_generator(make_generator)
+    generator.generate_linux_package()
+
+    assert {path.relative_to(dist): path.read_bytes() for path in dist.rglob('*') if path.is_file()} == before
+    with tarfile.open(generator.packages_dir / generator.archive_name('linux'), 'r:gz') as tar:
+        files = {m.name.split('/', 1)[-1]: tar.extractfile(m).read() for m in tar.getmembers() if m.isfile()}
+    schema = (sandbox / 'shared' / 'schema.ts').read_text()
+    assert files['dist/index.js'] == f'// {len(schema)}'.encode()
+    assert 'dist/public/dev-only.js' not in files
+    assert generator.report['prebuild']['files'] == 2
+
+
+def test_prebuild_without_repository_dist(sandbox, make_generator):
+    generator = prebuild_generator(make_generator)
+    generator.run_prebuild()
+    assert not (sandbox / 'dist').exists()
+
+    # Second générateur : dist/ repris du cache sans relancer la commande
+    again = prebuild_generator(make_generator)
+    again.run_prebuild()
+    assert again.report['prebuild']['cached']
@@ -0,0 +1,68 @@
+"""Indications preload (--preload-hints) sur la page construite par Vite"""
+
+import tarfile
+
+CSS = "@font-face{font-family:Inter;src:url(./inter-Fo11Nt22.woff2) format('woff2'),url(./inter-Fo11Nt22.woff)}"
+VITE_FILES = {
+    'index.html': '<!doctype html>\n<html>\n  <head>\n    <meta charset="UTF-8">\n'
+                  '    <link rel="modulepreload" href="/assets/vendor-Ve11Nd22.js">\n'
+                  '    <script type="module" src="/assets/index-Ab12Cd34.js"></script>\n'
+                  '    <link rel="stylesheet" href="/assets/index-Xy98Zw76.css">\n  </head>\n'
+                  '  <body><div id="root"></div></body>\n</html>\n',
+    'assets/index-Ab12Cd34.js': 'import{a}from"./vendor-Ve11Nd22.js";import"./router-Ro11Ut22.js";'
+                                'const p=()=>import("./lazy-La11Zy22.js");',
+    'assets/vendor-Ve11Nd22.js': 'export const a=1;',
+    'assets/router-Ro11Ut22.js': 'import"./vendor-Ve11Nd22.js";export default 1;',
+    'assets/lazy-La11Zy22.js': 'export default 2;',
+    'assets/index-Xy98Zw76.css': CSS,
+    'assets/inter-Fo11Nt22.woff2': 'woff2',
+    'assets/inter-Fo11Nt22.woff': 'woff',
+}
+
+
+def built_page(generator):
+    generator.generate_linux_package()
+    with tarfile.open(generator.packages_dir / generator.archive_name('linux'), 'r:gz') as tar:
+        member = next(m for m in tar.getmembers() if m.name.endswith('/dist/public/index.html'))
+        return tar.extractfile(member).read().decode('utf-8')
+
+
+def test_hints_follow_module_graph_and_skip_existing(make_generator, vite_build):
+    generator = make_generator(prebuild=True, preload_hints=True, build_command=vite_build(VITE_FILES))
+    html = built_page(generator)
+
+    report = generator.report['preload'][f'pageforge-linux-v{generator.version}/dist/public/index.html']
+    assert [(hint['rel'], hint['href']) for hint in report['hints']] == [
+        ('modulepreload', '/assets/router-Ro11Ut22.js'),
+        ('preload', '/assets/inter-Fo11Nt22.woff2'),
+    ]
+    assert report['existing'] == ['/assets/vendor-Ve11Nd22.js'] and report['inlined'] == []
+    # Juste après <meta charset>, sans doublon de l'indication Vite ni import() dynamique
+    assert '<meta charset="UTF-8">\n    <link rel="modulepreload" href="/assets/router-Ro11Ut22.js"' in html
+    assert html.count('vendor-Ve11Nd22.js') == 1 and 'lazy-La11Zy22.js' not in html
+    assert ('<link rel="preload" href="/assets/inter-Fo11Nt22.woff2" as="font" type="font/woff2" crossorigin'
+            in html)
+    assert 'inter-Fo11Nt22.woff"' not in html
+
+
+def test_small_head_stylesheet_is_inlined_under_threshold(make_generator, vite_build):
+    command = vite_build(VITE_FILES)
+    below = built_page(make_generator(prebuild=True, preload_hints=True, build_command=command,
+                                      inline_css_max=len(CSS) - 1))
+    assert '<link rel="stylesheet" href="/assets/index-Xy98Zw76.css">' in below
+
+    generator = make_generator(prebuild=True, preload_hints=True, build_command=command, inline_css_max=len(CSS))
+    html = built_page(generator)
+    assert '<link rel="stylesheet"' not in html
+    # URL relatives de la feuille réécrites en absolu, la police reste indiquée
+    assert '<style data-pageforge-inline="/assets/index-Xy98Zw76.css">' in html
+    assert 'url("/assets/inter-Fo11Nt22.woff2")' in html
+    report = generator.report['preload'][f'pageforge-linux-v{generator.version}/dist/public/index.html']
+    assert report['inlined'] == [{'href': '/assets/index-Xy98Zw76.css', 'bytes': len(CSS)}]
+
+
+def test_page_without_new_hints_is_reported(make_generator, vite_build, capsys):
+    files = {'index.html': '<!doctype html><head><meta charset="UTF-8"></head><body></body>'}
+    generator = make_generator(prebuild=True, preload_hints=True, build_command=vite_build(files))
+    assert built_page(generator) == files['index.html']
+    assert 'rien à ajouter à dist/public/index.html' in capsys.readouterr().out
@@ -0,0 +1,132 @@
+"""Archives segmentées (--segments) et extracteur parallèle (extract)"""
+
+import hashlib
+import json
+import subprocess
+import sys
+import tarfile
+import zipfile
+
+import pytest
+
+
+def segmented_generator(make_generator, mode='size', **options):
+    return make_generator(segments=mode, segment_size=64 * 1024, **options)
+
+
+def manifest_digests(generator, target):
+    """Chemin dans l'archive -> SHA-256, d'après le manifeste (doublons partagés compris, index de tête exclu)"""
+    manifest_path = generator.packages_dir / f'{generator.archive_name(target)}.manifest.json'
+    return {m['path']: m['sha256'] for m in json.loads(manifest_path.read_text(encoding='utf-8'))['members']
+            if not m['path'].endswith('/.pageforge-segments.json')}
+
+
+def tree_digests(root):
+    return {path.relative_to(root).as_posix(): hashlib.sha256(path.read_bytes()).hexdigest()
+            for path in root.rglob('*') if path.is_file()}
+
+
+def test_segmented_tar_gz_round_trip(packager, make_generator, tmp_path):
+    generator = segmented_generator(make_generator)
+    generator.generate_linux_package()
+    archive = generator.packages_dir / generator.archive_name('linux')
+
+    index = packager.read_segment_index(archive)
+    assert index['archive'] == 'tar.gz' and len(index['segments']) > 2
+    # Chaque segment est un membre gzip complet, contigu au suivant
+    segments = index['segments']
+    assert all(a['offset'] + a['length'] == b['offset'] for a, b in zip(segments, segments[1:]))
+    assert segments[-1]['offset'] + segments[-1]['length'] <= archive.stat().st_size
+
+    # tarfile lit la suite de membres gzip comme un seul flux
+    with tarfile.open(archive, 'r:gz') as tar:
+        expected = {m.name: hashlib.sha256(tar.extractfile(m).read()).hexdigest()
+                    for m in tar.getmembers() if m.isfile() or m.islnk()}
+    # L'index de tête est hors segments : il n'est pas extrait
+    del expected[f'{index["root"]}/{packager.SEGMENT_INDEX_NAME}']
+    result = packager.extract_segmented_archive(archive, tmp_path / 'out', jobs=2)
+    extracted = tree_digests(tmp_path / 'out')
+    assert extracted == expected
+    assert {path: extracted[path] for path in manifest_digests(generator, 'linux')} == manifest_digests(generator, 'linux')
+    assert result['segments'] == len(segments) and result['files'] == index['files']
+
+
+def test_segmented_zip_round_trip_with_shared_duplicates(packager, make_generator, tmp_path):
+    generator = segmented_generator(make_generator, 'directory', zip_duplicates='shared')
+    generator.generate_vscode_package()
+    archive = generator.packages_dir / generator.archive_name('vscode')
+
+    index = packager.read_segment_index(archive)
+    assert index['archive'] == 'zip' and len(index['segments']) > 1
+    with zipfile.ZipFile(archive) as zipf:
+        assert zipf.testzip() is None
+        stored = {info.filename: hashlib.sha256(zipf.read(info)).hexdigest()
+                  for info in zipf.infolist()[1:] if not info.is_dir()}
+
+    result = packager.extract_segmented_archive(archive, tmp_path / 'out', jobs=2)
+    assert result['files'] == index['files'] == len(stored)
+    extracted = tree_digests(tmp_path / 'out')
+    # Membres du zip (hors index de tête) à l'identique, doublons partagés recréés depuis leur source
+    assert {name: extracted[name] for name in stored} == stored
+    manifest = manifest_digests(generator, 'vscode')
+    assert {path: extracted.get(path) for path in manifest} == manifest
+
+
+def test_single_segment_extracts_on_its_own(packager, make_generator, tmp_path):
+    generator = segmented_generator(make_generator)
+    generator.generate_linux_package()
+    archive = generator.packages_dir / generator.archive_name('linux')
+    index = packager.read_segment_index(archive)
+    segment = index['segments'][len(index['segments']) // 2]
+
+    # Décompression depuis l'offset du segment seul, sans rien lire de ce qui précède
+    files, size, links = packager.extract_segment(str(archive), 'tar.gz', segment, str(tmp_path / 'part'))
+    assert (files, size) == (segment['files'], segment['bytes'])
+    extracted = tree_digests(tmp_path / 'part')
+    with tarfile.open(archive, 'r:gz') as tar:
+        for name, digest in extracted.items():
+            assert hashlib.sha256(tar.extractfile(name).read()).hexdigest() == digest
+    assert len(extracted) == files
+
+
+def rewrite_tar_index(packager, archive, change):
+    """Réécrit l'index de tête d'un .tar.gz segmenté (CRC gzip recalculé, taille inchangée)"""
+    raw = archive.read_bytes()
+    index = packager.read_segment_index(archive)
+    change(index)
+    data = json.dumps(index, separators=(',', ':')).encode('utf-8')
+    with tarfile.open(archive, 'r:gz') as tar:
+        info = tar.next()
+    reserved = info.size
+    member = packager.stored_gzip_member(packager.tar_member_bytes(info, data + b' ' * (reserved - len(data))))
+    archive.write_bytes(member + raw[len(member):])
+
+
+def run_extract(sandbox, archive, dest):
+    return subprocess.run([sys.executable, str(sandbox / 'build-scripts' / 'create-packages.py'), 'extract',
+                           str(archive), str(dest), '--jobs', '2'], capture_output=True, text=True)
+
+
+def test_damaged_index_is_refused(packager, sandbox, make_generator, tmp_path):
+    generator = segmented_generator(make_generator)
+    generator.generate_linux_package()
+    archive = generator.packages_dir / generator.archive_name('linux')
+    assert run_extract(sandbox, archive, tmp_path / 'ok').returncode == 0
+
+    # Empreinte d'un segment fausse : le segment est refusé après extraction
+    def wrong_digest(index):
+        index['segments'][1]['sha256'] = '0' * 64
+
+    rewrite_tar_index(packager, archive, wrong_digest)
+    with pytest.raises(ValueError, match='corrompu'):
+        packager.extract_segmented_archive(archive, tmp_path / 'bad-digest', jobs=1)
+    result = run_extract(sandbox, archive, tmp_path / 'bad-digest-cli')
+    assert result.returncode == 1 and 'Extraction impossible' in result.stdout
+
+    # Octets de l'index altérés : CRC gzip faux, l'archive n'est plus reconnue comme segmentée
+    raw = bytearray(archive.read_bytes())
+    raw[200] ^= 0xFF
+    archive.write_bytes(bytes(raw))
+    assert packager.read_segment_index(archive) is None
+    with pytest.raises(ValueError, match="n'est pas segmentée"):
+        packager.extract_segmented_archive(archive, tmp_path / 'bad-bytes', jobs=1)
@@ -0,0 +1,85 @@
+"""Store dédupliqué (ChunkStore) : découpage par contenu et verrou du store"""
+
+import os
+import random
+import threading
+import time
+
+import pytest
+
+
+def test_content_chunks_survive_insertion_and_stay_fast(packager):
+    rng = random.Random(7)
+    words = [bytes(rng.choice(b'abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(2, 9))) for _ in range(500)]
+    text = b' '.join(rng.choice(words) for _ in range(400000))
+    data = text + os.urandom(2 * 1024 * 1024)
+
+    start = time.perf_counter()
+    chunks = [bytes(chunk) for chunk in packager.iter_content_chunks(data)]
+    seconds = time.perf_counter() - start
+    assert b''.join(chunks) == data
+    assert all(2048 <= len(chunk) <= 65536 for chunk in chunks[:-1])
+    assert 4096 <= len(data) / len(chunks) <= 24576
+    # Aucune boucle Python par octet : bien au-delà des ~6 Mo/s du gear hash octet par octet
+    assert len(data) / seconds > 20 * 1024 ** 2
+
+    # Une insertion ne change que les blocs qui la touchent
+    edited = data[:100000] + b'insertion' + data[100000:]
+    known = set(chunks)
+    moved = [chunk for chunk in map(bytes, packager.iter_content_chunks(edited)) if chunk not in known]
+    assert len(moved) <= 2
+
+
+def test_gc_waits_for_put_in_progress(packager, tmp_path):
+    store = packager.ChunkStore(tmp_path / 'store')
+    archive = tmp_path / 'pageforge-linux-v2.0.0.tar.gz'
+    archive.write_bytes(os.urandom(200000))
+
+    # put en cours : ses blocs sont écrits mais sa recette pas encore
+    writing = store._locked()
+    writing.__enter__()
+    digests = store._store_chunks(archive.read_bytes(), {'new_bytes': 0, 'new_chunks': 0, 'chunks': 0})
+    collected = []
+    collector = threading.Thread(target=lambda: collected.append(store.gc()))
+    collector.start()
+    collector.join(0.3)
+    assert collector.is_alive() and not collected
+    assert all(store._chunk_path(digest).exists() for digest in digests)
+    writing.__exit__(None, None, None)
+    collector.join(5)
+    assert collected[0][0] == len(set(digests))
+
+    # Séquence réelle : put puis gc ne perd rien, get reconstruit à l'identique
+    store.put(archive)
+    assert store.gc() == (0, 0)
+    store.get(archive.name, tmp_path / 'restored.tar.gz')
+    assert (tmp_path / 'restored.tar.gz').read_bytes() == archive.read_bytes()
+
+
+@pytest.mark.parametrize('checkpoints', [None, 256 * 1024], ids=['default', 'gzip-checkpoints'])
+def test_large_linux_package_is_recompressed_exactly(sandbox, make_generator, packager, tmp_path, checkpoints):
+    # Données peu compressibles : archive Linux bien au-delà de 1 Mo
+    rng = random.Random(3)
+    (sandbox / 'server' / 'seed-data.txt').write_text(
+        '\n'.join(f'{rng.getrandbits(128):032x}' for _ in range(60000)), encoding='utf-8')
+    options = {} if checkpoints is None else {'gzip_checkpoint_interval': checkpoints}
+    generator = make_generator(**options)
+    generator.generate_linux_package()
+    archive = generator.packages_dir / generator.archive_name('linux')
+    assert archive.stat().st_size > 1024 ** 2
+
+    store = packager.ChunkStore(tmp_path / 'store')
+    stats = store.put(archive)
+    recipe = store._read_recipe(store._recipe_path(archive.name))
+    # Flux stocké décompressé (dédupliquable), vidages éventuels rejoués à l'identique
+    assert 'gzip' in recipe
+    assert bool(recipe['gzip'].get('flushes')) == bool(checkpoints)
+    store.get(archive.name, tmp_path / 'restored.tar.gz')
+    assert (tmp_path / 'restored.tar.gz').read_bytes() == archive.read_bytes()
+
+    # Version suivante : un fichier modifié, le reste des blocs est déjà connu
+    (sandbox / 'shared' / 'schema.ts').write_text('// v2\n', encoding='utf-8')
+    generator.version = '2.0.1'
+    generator.generate_linux_package()
+    again = store.put(generator.packages_dir / generator.archive_name('linux'))
+    assert again['new_bytes'] < stats['new_bytes'] / 10
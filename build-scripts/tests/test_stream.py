@@ -0,0 +1,47 @@
+"""Envoi d'une archive en flux (stream) sans écriture dans packages/"""
+
+import hashlib
+import os
+import tarfile
+
+import pytest
+
+
+@pytest.fixture
+def stream_output(tmp_path):
+    """Fichier de réception ouvert en écriture : (spec fd:N, chemin)"""
+    path = tmp_path / 'received.tar.gz'
+    with open(path, 'wb') as output:
+        yield f'fd:{output.fileno()}', path
+
+
+def test_stream_assembles_in_tmpfs(packager, make_generator, stream_output, tmp_path, monkeypatch):
+    shm = tmp_path / 'shm'
+    shm.mkdir()
+    monkeypatch.setattr(packager, 'STREAM_STAGING_DIR', str(shm))
+    spec, path = stream_output
+
+    generator = make_generator()
+    result = generator.stream_package('linux', spec)
+
+    data = path.read_bytes()
+    assert result['bytes'] == len(data) and result['sha256'] == hashlib.sha256(data).hexdigest()
+    with tarfile.open(path, 'r:gz') as tar:
+        assert any(name.endswith('/package.json') for name in tar.getnames())
+    assert not any(shm.iterdir())
+    assert not any(generator.packages_dir.glob('pageforge-*'))
+
+
+def test_stream_refuses_disk_staging_without_tmpfs(packager, make_generator, stream_output, tmp_path, monkeypatch):
+    monkeypatch.setattr(packager, 'STREAM_STAGING_DIR', str(tmp_path / 'absent'))
+    spec, path = stream_output
+
+    with pytest.raises(ValueError, match='--staging-dir'):
+        make_generator().stream_package('linux', spec)
+    assert path.stat().st_size == 0
+
+    # Dossier d'assemblage choisi explicitement : accepté
+    staging = tmp_path / 'staging'
+    staging.mkdir()
+    result = make_generator().stream_package('linux', spec, staging)
+    assert result['bytes'] > 0 and not any(staging.iterdir())
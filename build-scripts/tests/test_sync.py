@@ -0,0 +1,112 @@
+"""Mise à jour d'une installation existante (sync)"""
+
+import json
+import tarfile
+
+import pytest
+
+
+@pytest.fixture
+def installed(make_generator, tmp_path, frozen_date):
+    """Package Linux construit puis décompressé comme sur un hôte : (générateur, dossier installé)"""
+    generator = make_generator()
+    generator.generate_linux_package()
+    with tarfile.open(generator.packages_dir / generator.archive_name('linux'), 'r:gz') as tar:
+        tar.extractall(tmp_path / 'srv', filter='data')
+    return generator, tmp_path / 'srv' / f'pageforge-linux-v{generator.version}'
+
+
+def tree(root):
+    return {path.relative_to(root).as_posix(): path.read_bytes() for path in root.rglob('*') if path.is_file()}
+
+
+def test_first_sync_removes_files_dropped_from_previous_manifest(installed, tmp_path):
+    generator, dest = installed
+    archive_name = generator.archive_name('linux')
+    # Version installée : le paquet actuel plus un fichier retiré depuis
+    (dest / 'server' / 'legacy-route.ts').write_text('export {}\n', encoding='utf-8')
+    (dest / 'database.sqlite').write_bytes(b'donnees de l hote')
+    manifest = json.loads((generator.packages_dir / f'{archive_name}.manifest.json').read_text(encoding='utf-8'))
+    previous = {'members': [
+        dict(member, path=member['path'].replace(f'v{generator.version}', 'v1.9.0'))
+        for member in manifest['members']
+    ]}
+    previous['members'].append({'path': 'pageforge-linux-v1.9.0/server/legacy-route.ts', 'size': 10, 'sha256': ''})
+    previous_path = tmp_path / 'pageforge-linux-v1.9.0.tar.gz.manifest.json'
+    previous_path.write_text(json.dumps(previous), encoding='utf-8')
+
+    # Sans manifeste précédent ni état, rien n'est supprimé
+    assert generator.sync_installation('linux', dest, dry_run=True)['removed'] == 0
+
+    result = generator.sync_installation('linux', dest, previous_manifest=previous_path)
+    assert result['removed'] == 1 and result['changed'] == result['added'] == 0
+    assert not (dest / 'server' / 'legacy-route.ts').exists()
+    # Les données de l'hôte, absentes de tout manifeste, restent en place
+    assert (dest / 'database.sqlite').read_bytes() == b'donnees de l hote'
+
+
+def test_sync_rewrites_only_changed_files_in_place(installed, sandbox):
+    generator, dest = installed
+    generator.sync_installation('linux', dest)
+    schema = dest / 'shared' / 'schema.ts'
+    unchanged = dest / 'package.json'
+    before_inode = unchanged.stat().st_ino
+    dest_inode = dest.stat().st_ino
+    old_schema = schema.read_bytes()
+
+    (sandbox / 'shared' / 'schema.ts').write_text(old_schema.decode() + '// v2\n', encoding='utf-8')
+    generator.generate_linux_package()
+    result = generator.sync_installation('linux', dest)
+
+    assert result['changed'] == 1 and result['written_bytes'] == len(old_schema) + 6
+    assert schema.read_bytes() == old_schema + b'// v2\n'
+    # Ni le dossier ni les fichiers inchangés ne sont remplacés
+    assert dest.stat().st_ino == dest_inode
+    assert unchanged.stat().st_ino == before_inode
+    assert not any('pageforge-sync' in path.name for path in dest.rglob('*') if path.name != '.pageforge-sync.json')
+    assert not any(path.name.startswith(f'.{dest.name}.') for path in dest.parent.iterdir())
+
+
+def test_files_created_during_sync_survive(installed, sandbox, monkeypatch):
+    generator, dest = installed
+    (sandbox / 'shared' / 'schema.ts').write_text('// réécrit\n', encoding='utf-8')
+    generator.generate_linux_package()
+    iter_sync_sources = generator.iter_sync_sources
+
+    def with_live_writes(*args):
+        # L'application tourne pendant la synchronisation : upload et journal SQLite
+        (dest / 'uploads').mkdir(exist_ok=True)
+        (dest / 'uploads' / 'photo.jpg').write_bytes(b'upload')
+        yield from iter_sync_sources(*args)
+        (dest / 'database.sqlite-journal').write_bytes(b'journal')
+
+    monkeypatch.setattr(generator, 'iter_sync_sources', with_live_writes)
+    assert generator.sync_installation('linux', dest)['changed'] == 1
+    assert (dest / 'shared' / 'schema.ts').read_text(encoding='utf-8') == '// réécrit\n'
+    assert (dest / 'uploads' / 'photo.jpg').read_bytes() == b'upload'
+    assert (dest / 'database.sqlite-journal').read_bytes() == b'journal'
+
+
+def test_failed_sync_leaves_installation_untouched(installed, sandbox, monkeypatch):
+    generator, dest = installed
+    before = tree(dest)
+    (sandbox / 'shared' / 'schema.ts').write_text('// réécrit\n', encoding='utf-8')
+    (sandbox / 'shared' / 'validators').mkdir()
+    (sandbox / 'shared' / 'validators' / 'page.ts').write_text('export {}\n', encoding='utf-8')
+    generator.generate_linux_package()
+    dry_run = generator.sync_installation('linux', dest, dry_run=True)
+    assert (dry_run['changed'], dry_run['added']) == (1, 1)
+    iter_sync_sources = generator.iter_sync_sources
+
+    def failing(*args):
+        # Échec après l'écriture des premiers temporaires (dont un dans un nouveau dossier)
+        sources = iter_sync_sources(*args)
+        yield next(sources)
+        yield next(sources)
+        raise OSError('disque plein')
+
+    monkeypatch.setattr(generator, 'iter_sync_sources', failing)
+    with pytest.raises(OSError, match='disque plein'):
+        generator.sync_installation('linux', dest)
+    assert tree(dest) == before
+    assert not (dest / 'shared' / 'validators').exists()
@@ -0,0 +1,98 @@
+"""Vérification des archives (--verify, verify) : chemins d'échec"""
+
+import io
+import tarfile
+import zipfile
+
+import pytest
+
+
+@pytest.fixture
+def cpanel(make_generator):
+    generator = make_generator()
+    generator.generate_cpanel_package()
+    assert generator.verify_archive('cpanel')['ok']
+    return generator, generator.packages_dir / generator.archive_name('cpanel')
+
+
+@pytest.fixture
+def linux(make_generator):
+    generator = make_generator()
+    generator.generate_linux_package()
+    assert generator.verify_archive('linux')['ok']
+    return generator, generator.packages_dir / generator.archive_name('linux')
+
+
+def rewrite_zip(archive, transform):
+    """Réécrit un zip valide (CRC corrects) : transform(nom, données) -> données, None pour retirer"""
+    with zipfile.ZipFile(archive) as zipf:
+        members = [(info, zipf.read(info)) for info in zipf.infolist()]
+    root = members[0][0].filename.split('/', 1)[0]
+    with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        for info, data in members:
+            data = transform(info.filename[len(root) + 1:], data)
+            if data is not None:
+                zipf.writestr(info, data)
+    return root
+
+
+def errors_of(generator, target):
+    result = generator.verify_archive(target)
+    assert not result['ok']
+    return result['errors']
+
+
+def test_truncated_archives(cpanel, linux):
+    for (generator, archive), target in ((cpanel, 'cpanel'), (linux, 'linux')):
+        archive.write_bytes(archive.read_bytes()[:-200])
+        assert any(e.startswith('Archive corrompue') for e in errors_of(generator, target))
+
+
+def test_flipped_byte_fails_crc(cpanel):
+    generator, archive = cpanel
+    with zipfile.ZipFile(archive) as zipf:
+        info = max(zipf.infolist(), key=lambda i: i.compress_size)
+    raw = bytearray(archive.read_bytes())
+    raw[info.header_offset + 30 + len(info.filename) + len(info.extra) + info.compress_size // 2] ^= 0xFF
+    archive.write_bytes(bytes(raw))
+    assert any(e.startswith('Archive corrompue') for e in errors_of(generator, 'cpanel'))
+
+
+def test_changed_member_in_valid_zip(cpanel):
+    generator, archive = cpanel
+    # Même taille, contenu différent : seul le SHA-256 du manifeste le révèle
+    rewrite_zip(archive, lambda name, data: data.replace(b'a', b'b', 1) if name == 'package.json' else data)
+    assert errors_of(generator, 'cpanel') == [f'Contenu différent du manifeste: {generator.archive_name("cpanel")[:-4]}/package.json']
+
+
+def test_changed_member_in_valid_tar_gz(linux):
+    generator, archive = linux
+    with tarfile.open(archive, 'r:gz') as tar:
+        members = [(m, tar.extractfile(m).read() if m.isfile() else None) for m in tar.getmembers()]
+    with tarfile.open(archive, 'w:gz') as tar:
+        for member, data in members:
+            if member.name.endswith('/package.json'):
+                data = data + b'\n'
+                member.size = len(data)
+            tar.addfile(member, io.BytesIO(data) if data is not None else None)
+    assert any(e.startswith('Taille incorrecte:') and e.endswith('/package.json') for e in errors_of(generator, 'linux'))
+
+
+def test_missing_and_extra_members(cpanel):
+    generator, archive = cpanel
+    root = rewrite_zip(archive, lambda name, data: None if name == 'package.json' else data)
+    with zipfile.ZipFile(archive, 'a') as zipf:
+        zipf.writestr(f'{root}/notes.txt', 'ajouté après coup')
+        zipf.writestr(f'{root}/server/.env', 'SECRET=1')
+    errors = errors_of(generator, 'cpanel')
+    assert f'Fichier manquant: {root}/package.json' in errors
+    assert 'Fichier requis absent: package.json' in errors
+    assert f'Fichier inattendu: {root}/notes.txt' in errors
+    assert f'Fichier inattendu: {root}/server/.env' in errors
+    assert 'Fichier exclu présent: server/.env' in errors
+
+
+def test_missing_manifest(cpanel):
+    generator, archive = cpanel
+    (generator.packages_dir / f'{archive.name}.manifest.json').unlink()
+    assert errors_of(generator, 'cpanel') == [f'Manifeste absent ou illisible: {archive.name}.manifest.json']
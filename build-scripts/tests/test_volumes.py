@@ -0,0 +1,49 @@
+"""Archive cPanel découpée en volumes (--volume-size)"""
+
+import json
+import zipfile
+
+import pytest
+
+
+def test_volumes_replace_full_archive(packager, make_generator):
+    generator = make_generator(volume_size=100 * 1024, verify=True, analyze=True)
+    generator.generate_all_packages()
+    archive_name = generator.archive_name('cpanel')
+    packages = generator.packages_dir
+
+    # Pas de copie complète : l'archive n'occupe sur disque que ses volumes
+    assert not (packages / archive_name).exists()
+    index = json.loads((packages / f'{archive_name}.volumes.json').read_text(encoding='utf-8'))
+    volumes = sorted(packages.glob(f'{archive_name}.[0-9]*'))
+    assert [path.name for path in volumes] == [volume['name'] for volume in index['volumes']]
+    assert len(volumes) > 1
+    assert sum(path.stat().st_size for path in volumes) == index['size'] == generator.archive_size(archive_name)
+
+    # Leur concaténation est le zip attendu, relu tel quel par verify, l'analyse et inspect
+    reassembled = packages / 'reassembled.zip'
+    reassembled.write_bytes(b''.join(path.read_bytes() for path in volumes))
+    manifest = json.loads((packages / f'{archive_name}.manifest.json').read_text(encoding='utf-8'))
+    with zipfile.ZipFile(reassembled) as zipf:
+        assert zipf.testzip() is None
+        names = set(zipf.namelist())
+    assert {member['path'] for member in manifest['members']} <= names
+    assert generator.verify_archive('cpanel')['ok']
+    inspector = packager.PackageInspector(packages / archive_name)
+    assert set(inspector.by_name) == names
+    inspector.close()
+    analysis = json.loads((packages / 'SIZE-ANALYSIS.json').read_text(encoding='utf-8'))
+    assert analysis['cpanel']['archive_bytes'] == index['size']
+
+
+def test_volume_reader_rejects_truncated_volume(packager, make_generator):
+    generator = make_generator(volume_size=100 * 1024)
+    generator.generate_cpanel_package()
+    archive_name = generator.archive_name('cpanel')
+    last = sorted(generator.packages_dir.glob(f'{archive_name}.[0-9]*'))[-1]
+    last.write_bytes(last.read_bytes()[:-1])
+
+    with pytest.raises(ValueError, match='Volume'):
+        packager.VolumeReader(generator.volume_index_path(archive_name))
+    result = generator.verify_archive('cpanel')
+    assert not result['ok']